@@ -5,221 +5,505 @@ This Flask application provides REST API endpoints for crop disease prediction.
 
 Endpoints:
 - POST /predict: Upload image and get disease prediction with treatment advice
-- GET /health: Health check endpoint
+- POST /predict/batch: Upload many images (or a zip/tar archive) in one request
+- GET /health: Liveness check endpoint
+- GET /ready: Readiness check (model loaded and warmed up)
+- GET /stats: Serving statistics (micro-batching histograms, prediction and weather caches)
+- GET /metrics: Prometheus metrics for all workers (requests, per-stage latency, caches, memory)
 """
 
+import gc
 import os
 import numpy as np
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, Request
 from flask_cors import CORS
-import tensorflow as tf
-from tensorflow import keras
-from werkzeug.utils import secure_filename
-from PIL import Image
 import io
-import json
-from flask import send_from_directory
+import tarfile
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.exceptions import HTTPException, NotFound
+
+from batching import BATCH_SIZE_BUCKETS, MicroBatcher
+from class_registry import CLASS_REGISTRY, DISEASE_CLASSES, dumps
+from inference_backends import BACKEND_ARTIFACTS, CASCADE_ARTIFACTS, CascadeBackend, create_backend, create_cascade
+from metrics import MetricsRegistry, process_rss_bytes, scale_histogram
+from model_host import ModelHostClient
+from model_registry import ModelRegistry, RegistryError, RegistryWatcher
+from prediction_cache import (
+    MemoryStore, PredictionCache, SQLiteStore, bytes_key, content_key, tensor_key
+)
+from preprocessing import IMG_SIZE, new_batch_buffer, preprocess_image
+from static_assets import StaticAssets
+from weather import WeatherService, parse_coordinates
 
 # =====================================================
 # Configuration
 # =====================================================
 UPLOAD_FOLDER = './uploads/'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
-IMG_SIZE = 224
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10 MB
 
-# Model path
-MODEL_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'model', 'crop_model.h5'))
+# Uploads are decoded from memory. Set a byte threshold to spool larger
+# payloads to an anonymous temp file in UPLOAD_FOLDER instead (0 = never).
+UPLOAD_SPOOL_THRESHOLD = int(os.environ.get('UPLOAD_SPOOL_THRESHOLD', 0))
+
+# Batch endpoint limits
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz')
+MAX_BATCH_FILES = int(os.environ.get('MAX_BATCH_FILES', 64))
+# Uncompressed bytes all archives in one request may expand to
+MAX_BATCH_BYTES = int(os.environ.get('MAX_BATCH_BYTES', MAX_BATCH_FILES * MAX_FILE_SIZE))
+DECODE_WORKERS = int(os.environ.get('DECODE_WORKERS', os.cpu_count() or 4))
+
+# Prediction cache: 'memory' (per worker), 'sqlite' (shared on host) or 'off'
+PREDICTION_CACHE_BACKEND = os.environ.get('PREDICTION_CACHE', 'memory').lower()
+PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', 1024))
+PREDICTION_CACHE_TTL = float(os.environ.get('PREDICTION_CACHE_TTL', 3600))
+PREDICTION_CACHE_PATH = os.environ.get('PREDICTION_CACHE_PATH', './prediction_cache.sqlite3')
+PREDICTION_CACHE_TENSOR_KEYS = os.environ.get('PREDICTION_CACHE_TENSOR_KEYS', 'false').lower() == 'true'
+
+# Serving mode: 'in_process' (each worker loads the model) or 'model_host'
+# (workers send tensors to one shared model process, see model_host.py)
+SERVING_MODE = os.environ.get('SERVING_MODE', 'in_process').lower()
+MODEL_HOST_ADDRESS = os.environ.get('MODEL_HOST_ADDRESS', '/tmp/crop-model-host.sock')
+
+# Micro-batching: concurrent requests share one forward pass
+BATCHING_ENABLED = os.environ.get('BATCHING_ENABLED', 'true').lower() == 'true'
+BATCH_MAX_SIZE = int(os.environ.get('BATCH_MAX_SIZE', 16))
+BATCH_MAX_WAIT_MS = float(os.environ.get('BATCH_MAX_WAIT_MS', 5))
+
+# Inference backend: 'keras', 'tflite_fp16', 'tflite_int8' or 'onnx' (see inference_backends.py)
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'keras').lower()
+INFERENCE_THREADS = int(os.environ.get('INFERENCE_THREADS', 0)) or None
+INFERENCE_INTER_OP_THREADS = int(os.environ.get('INFERENCE_INTER_OP_THREADS', 0)) or None
+INFERENCE_JIT_COMPILE = os.environ.get('INFERENCE_JIT_COMPILE', 'false').lower() == 'true'  # XLA (keras only)
+# Batch sizes keras inputs are padded up to; empty disables padding
+INFERENCE_BATCH_BUCKETS = tuple(
+    int(size) for size in os.environ.get('INFERENCE_BATCH_BUCKETS', '1,2,4,8,16,32').split(',') if size.strip()
+)
+
+# Cascade inference (keras and onnx): a small low-resolution first-stage model
+# answers images it is at least CASCADE_THRESHOLD confident about and the rest
+# escalate to the full model. Calibrate with benchmarks/calibrate_cascade.py.
+CASCADE_ENABLED = os.environ.get('CASCADE_ENABLED', 'false').lower() == 'true'
+CASCADE_MODEL_PATH = os.environ.get('CASCADE_MODEL_PATH', CASCADE_ARTIFACTS.get(INFERENCE_BACKEND, ''))
+CASCADE_THRESHOLD = float(os.environ.get('CASCADE_THRESHOLD', 0.9))
+
+# Prometheus metrics. With METRICS_DIR set (gunicorn.conf.py does this), each
+# worker writes its metrics there and /metrics aggregates all workers.
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 1.0))  # seconds
+
+# Model path (defaults to the selected backend's artifact in ../model/)
+MODEL_PATH = os.environ.get('MODEL_PATH', BACKEND_ARTIFACTS.get(INFERENCE_BACKEND, ''))
+
+# Model registry (see model_registry.py). When set, workers serve the registry's
+# active version instead of MODEL_PATH and hot-swap to a newly activated one
+# (or a rollback) in the background, checking every MODEL_REGISTRY_POLL_INTERVAL
+# seconds. In-process serving only.
+MODEL_REGISTRY_DIR = os.environ.get('MODEL_REGISTRY_DIR', '')
+MODEL_REGISTRY_POLL_INTERVAL = float(os.environ.get('MODEL_REGISTRY_POLL_INTERVAL', 5))
+
+class UploadRequest(Request):
+    """Request that keeps uploaded files in memory unless spooling is enabled."""
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if UPLOAD_SPOOL_THRESHOLD > 0:
+            return tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_THRESHOLD, dir=UPLOAD_FOLDER)
+        return io.BytesIO()
 
 app = Flask(__name__)
+app.request_class = UploadRequest
 CORS(app)  # Enable CORS for all routes
 
 FRONTEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'frontend'))
 
+# Frontend served from memory with hashed names, precompression and ETags
+static_assets = StaticAssets(FRONTEND_DIR)
+
 # Configure upload folder
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
 
-# Create upload folder if not exists
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+# Create upload folder only when large uploads may be spooled to disk
+if UPLOAD_SPOOL_THRESHOLD > 0:
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+
+# Global model variable
+model = None
+
+# Registry version being served (None when loaded from MODEL_PATH) and when it was loaded
+model_version = None
+model_loaded_at = None
+
+# Versioned model artifacts; swaps run one at a time on the watcher thread
+model_registry = ModelRegistry(MODEL_REGISTRY_DIR) if MODEL_REGISTRY_DIR and SERVING_MODE != 'model_host' else None
+registry_watcher = None
+_model_swap_lock = threading.Lock()
+
+# True once the model is loaded and warmed up in this worker
+model_ready = False
+
+# True once init_model has run in this process (successfully or not)
+model_init_attempted = False
+_model_init_lock = threading.Lock()
+
+# Per-process micro-batcher (created on first use, after any fork)
+batcher = None
+_batcher_lock = threading.Lock()
+
+# Thread pool for parallel image decoding (threads start lazily)
+decode_executor = ThreadPoolExecutor(max_workers=DECODE_WORKERS, thread_name_prefix='decode')
+
+# Prediction cache keyed by upload content hash
+if PREDICTION_CACHE_BACKEND == 'memory':
+    prediction_cache = PredictionCache(MemoryStore(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL))
+elif PREDICTION_CACHE_BACKEND == 'sqlite':
+    prediction_cache = PredictionCache(
+        SQLiteStore(PREDICTION_CACHE_PATH, PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL)
+    )
+else:
+    prediction_cache = None
+
+# Shared, cached weather lookups (see weather.py)
+weather_service = WeatherService()
 
 # =====================================================
-# Disease Classes and Treatment Information
+# Metrics
 # =====================================================
-DISEASE_CLASSES = [
-    'Apple___Apple_scab',
-    'Apple___Black_rot',
-    'Apple___Cedar_apple_rust',
-    'Apple___healthy',
-    'Blueberry___healthy',
-    'Cherry___Powdery_mildew',
-    'Cherry___healthy',
-    'Corn___Cercospora_leaf_spot',
-    'Corn___Common_rust',
-    'Corn___Northern_Leaf_Blight',
-    'Corn___healthy',
-    'Grape___Black_rot',
-    'Grape___Esca',
-    'Grape___Leaf_blight',
-    'Grape___healthy',
-    'Orange___Haunglongbing',
-    'Peach___Bacterial_spot',
-    'Peach___healthy',
-    'Pepper___Bacterial_spot',
-    'Pepper___healthy',
-    'Potato___Early_blight',
-    'Potato___Late_blight',
-    'Potato___healthy',
-    'Raspberry___healthy',
-    'Soybean___healthy',
-    'Squash___Powdery_mildew',
-    'Strawberry___Leaf_scorch',
-    'Strawberry___healthy',
-    'Tomato___Bacterial_spot',
-    'Tomato___Early_blight',
-    'Tomato___Late_blight',
-    'Tomato___Leaf_Mold',
-    'Tomato___Septoria_leaf_spot',
-    'Tomato___Spider_mites',
-    'Tomato___Target_Spot',
-    'Tomato___Tomato_Yellow_Leaf_Curl_Virus',
-    'Tomato___Tomato_mosaic_virus',
-    'Tomato___healthy'
-]
-
-# Treatment recommendations for diseases
-TREATMENT_GUIDE = {
-    'Apple_scab': {
-        'severity': 'Medium',
-        'description': 'Fungal infection causing dark lesions on leaves and fruits',
-        'treatment': [
-            'Remove infected leaves and branches',
-            'Apply fungicide (Sulfur or Copper-based)',
-            'Improve tree ventilation',
-            'Avoid wetting foliage during irrigation'
-        ],
-        'prevention': [
-            'Use resistant varieties',
-            'Practice good sanitation',
-            'Apply preventive fungicides in spring'
-        ]
-    },
-    'Black_rot': {
-        'severity': 'High',
-        'description': 'Fungal disease causing dark lesions and cankers',
-        'treatment': [
-            'Remove infected branches and fruit',
-            'Prune to improve air circulation',
-            'Apply copper fungicide',
-            'Burn or destroy infected plant material'
-        ],
-        'prevention': [
-            'Plant resistant varieties',
-            'Maintain proper sanitation',
-            'Avoid injury to trees'
-        ]
-    },
-    'Cedar_apple_rust': {
-        'severity': 'Medium',
-        'description': 'Rust infection causing yellow/orange lesions',
-        'treatment': [
-            'Apply sulfur or copper fungicide',
-            'Remove rust-infected cedar trees nearby',
-            'Improve tree ventilation',
-            'Remove galls from cedar trees'
-        ],
-        'prevention': [
-            'Keep distance from cedar trees',
-            'Use resistant apple varieties',
-            'Regular inspections'
-        ]
-    },
-    'Powdery_mildew': {
-        'severity': 'Medium',
-        'description': 'White powdery coating on leaves indicating fungal infection',
-        'treatment': [
-            'Apply sulfur dust or spray',
-            'Use potassium bicarbonate fungicide',
-            'Remove heavily infected leaves',
-            'Improve air circulation'
-        ],
-        'prevention': [
-            'Maintain proper spacing',
-            'Avoid high nitrogen fertilization',
-            'Regular monitoring'
-        ]
-    },
-    'Early_blight': {
-        'severity': 'High',
-        'description': 'Fungal disease causing brown concentric lesions on leaves',
-        'treatment': [
-            'Remove infected leaves promptly',
-            'Apply copper or chlorothalonil fungicide',
-            'Stake plants for better air circulation',
-            'Water at soil level, not foliage'
-        ],
-        'prevention': [
-            'Use resistant varieties',
-            'Mulch to prevent soil splash',
-            'Rotate crops annually'
+metrics = MetricsRegistry(METRICS_DIR or None, METRICS_FLUSH_INTERVAL)
+metrics.counter('crop_http_requests_total', 'HTTP requests by route, method and status code.')
+metrics.histogram('crop_http_request_duration_seconds', 'HTTP request latency by route.')
+metrics.histogram('crop_stage_duration_seconds',
+                  'Prediction pipeline latency by stage: upload_read, decode, preprocess, inference, serialize.')
+metrics.gauge('crop_model_load_seconds', 'Time taken to load the model in this worker.')
+metrics.gauge('crop_model_warmup_seconds', 'Time taken to warm up the model in this worker.')
+metrics.gauge('crop_model_ready', 'Whether the model is loaded and warmed up (1) or not (0).')
+metrics.gauge('crop_model_info', 'Model version served by the worker (always 1; see the version label).')
+metrics.counter('crop_model_swaps_total', 'Registry model version swaps by result (success, failed).')
+metrics.gauge('crop_model_swap_seconds', 'Time taken to load and warm up the last swapped-in model version.')
+metrics.gauge('process_resident_memory_bytes', 'Resident memory of the worker process.')
+metrics.counter('crop_prediction_cache_hits_total', 'Prediction cache hits.')
+metrics.counter('crop_prediction_cache_misses_total', 'Prediction cache misses.')
+metrics.counter('crop_prediction_cache_evictions_total', 'Prediction cache evictions.')
+metrics.gauge('crop_prediction_cache_entries', 'Entries in the prediction cache.')
+metrics.histogram('crop_batch_size', 'Images per micro-batched forward pass.', BATCH_SIZE_BUCKETS)
+metrics.histogram('crop_batch_queue_wait_seconds', 'Time requests wait in the micro-batching queue.')
+metrics.gauge('crop_batch_queue_depth', 'Requests waiting in the micro-batching queue.')
+metrics.counter('crop_cascade_images_total', 'Images seen by the cascade, by outcome (answered, escalated).')
+metrics.histogram('crop_cascade_stage_duration_seconds', 'Cascade forward-pass latency by stage (first, second).')
+metrics.gauge('crop_cascade_threshold', 'Confidence at or above which the cascade first stage answers.')
+metrics.counter('crop_weather_lookups_total', 'Weather lookups by cache result (hit, stale, miss).')
+metrics.counter('crop_weather_upstream_requests_total', 'Requests sent to the weather service.')
+metrics.counter('crop_weather_upstream_errors_total', 'Failed requests to the weather service.')
+
+def stage_timer(stage):
+    """Time one prediction pipeline stage (used as a context manager)."""
+    return metrics.time('crop_stage_duration_seconds', stage=stage)
+
+def serving_samples():
+    """Process, prediction cache and micro-batcher state for the metrics registry."""
+    samples = [
+        ('process_resident_memory_bytes', {}, process_rss_bytes()),
+        ('crop_model_ready', {}, int(model_ready))
+    ]
+    if model_ready:
+        samples.append(('crop_model_info', {'version': model_version or model_info()['fingerprint']}, 1))
+    if prediction_cache is not None:
+        stats = prediction_cache.stats()
+        samples += [
+            ('crop_prediction_cache_hits_total', {}, stats['hits']),
+            ('crop_prediction_cache_misses_total', {}, stats['misses']),
+            ('crop_prediction_cache_evictions_total', {}, stats['evictions']),
+            ('crop_prediction_cache_entries', {}, stats['entries'])
         ]
-    },
-    'Late_blight': {
-        'severity': 'Very High',
-        'description': 'Serious fungal disease causing water-soaked lesions',
-        'treatment': [
-            'Remove infected leaves and fruits immediately',
-            'Apply metalaxyl-based fungicide',
-            'Improve drainage',
-            'Ensure proper plant spacing'
-        ],
-        'prevention': [
-            'Plant resistant varieties',
-            'Use certified disease-free seeds',
-            'Scout for disease regularly',
-            'Avoid overhead watering'
+    if batcher is not None:
+        stats = batcher.stats()
+        samples += [
+            ('crop_batch_size', {}, stats['batch_size']),
+            ('crop_batch_queue_wait_seconds', {}, scale_histogram(stats['queue_wait_ms'], 0.001)),
+            ('crop_batch_queue_depth', {}, stats['queue_depth'])
         ]
-    },
-    'healthy': {
-        'severity': 'None',
-        'description': 'No disease detected - plant appears healthy',
-        'treatment': [
-            'Continue regular monitoring',
-            'Maintain proper watering schedule',
-            'Ensure adequate sunlight',
-            'Regular pest inspection'
-        ],
-        'prevention': [
-            'Maintain good garden hygiene',
-            'Provide proper nutrition',
-            'Monitor for early symptoms of disease'
+    if isinstance(model, CascadeBackend):
+        stats = model.stats()
+        samples += [
+            ('crop_cascade_images_total', {'outcome': 'answered'}, stats['images'] - stats['escalated']),
+            ('crop_cascade_images_total', {'outcome': 'escalated'}, stats['escalated']),
+            ('crop_cascade_threshold', {}, stats['threshold'])
         ]
+        for stage in ('first', 'second'):
+            samples.append((
+                'crop_cascade_stage_duration_seconds', {'stage': stage},
+                scale_histogram(stats[f'{stage}_stage_ms'], 0.001)
+            ))
+    return samples
+
+def model_info():
+    """The model this worker serves, for /info."""
+    return {
+        'version': model_version,
+        'fingerprint': getattr(model, 'version', None) or getattr(model, 'model_version', None),
+        'backend': 'model_host' if SERVING_MODE == 'model_host' else INFERENCE_BACKEND,
+        'loaded_at': model_loaded_at,
+        'registry': MODEL_REGISTRY_DIR if model_registry is not None else None
     }
-}
 
-# Global model variable
-model = None
+def cascade_stats():
+    """Escalation rate and stage latency when cascade inference is active."""
+    if isinstance(model, CascadeBackend):
+        return model.stats()
+    return {'enabled': False}
+
+def weather_samples(service):
+    """Cache and upstream counters of a weather service for the metrics registry."""
+    stats = service.stats()
+    return [
+        ('crop_weather_lookups_total', {'result': 'hit'}, stats['hits']),
+        ('crop_weather_lookups_total', {'result': 'stale'}, stats['stale_hits']),
+        ('crop_weather_lookups_total', {'result': 'miss'}, stats['misses']),
+        ('crop_weather_upstream_requests_total', {}, stats['upstream_calls']),
+        ('crop_weather_upstream_errors_total', {}, stats['upstream_errors'])
+    ]
+
+metrics.add_collector('serving', serving_samples)
+metrics.add_collector('weather', lambda: weather_samples(weather_service))
 
 # =====================================================
 # Model Loading
 # =====================================================
+def build_backend(model_path, first_stage_path=None):
+    """Create the configured inference backend (or cascade) for a model artifact."""
+    options = {
+        'num_threads': INFERENCE_THREADS, 'inter_op_threads': INFERENCE_INTER_OP_THREADS,
+        'jit_compile': INFERENCE_JIT_COMPILE, 'batch_buckets': INFERENCE_BATCH_BUCKETS
+    }
+    if CASCADE_ENABLED:
+        first_stage_path = first_stage_path or CASCADE_MODEL_PATH
+        print(f"Loading {INFERENCE_BACKEND} cascade: {first_stage_path} (threshold {CASCADE_THRESHOLD}), "
+              f"escalating to {model_path}...")
+        return create_cascade(INFERENCE_BACKEND, model_path, first_stage_path, CASCADE_THRESHOLD, **options)
+    print(f"Loading {INFERENCE_BACKEND} model from {model_path}...")
+    return create_backend(INFERENCE_BACKEND, model_path, **options)
+
+def load_registry_version(version):
+    """
+    Verify a registry version against this server and load it.
+    
+    Raises:
+        RegistryError: Missing, corrupt or incompatible version
+    """
+    manifest = model_registry.verify(version, INFERENCE_BACKEND, DISEASE_CLASSES, IMG_SIZE,
+                                     first_stage=CASCADE_ENABLED)
+    first_stage_path = None
+    if CASCADE_ENABLED:
+        first_stage_path = model_registry.artifact_path(version, INFERENCE_BACKEND, first_stage=True)
+    backend = build_backend(model_registry.artifact_path(version, INFERENCE_BACKEND), first_stage_path)
+    if backend.img_size != manifest['img_size'] or backend.num_classes != len(manifest['classes']):
+        raise RegistryError(
+            f"Model version '{version}' takes {backend.img_size}px inputs and predicts {backend.num_classes} "
+            f"classes, but its manifest says {manifest['img_size']}px and {len(manifest['classes'])} classes"
+        )
+    return backend
+
 def load_model():
-    """Load the trained model on application startup."""
-    global model
+    """
+    Load the trained model on application startup.
+    
+    In 'model_host' serving mode this connects to the shared model process
+    instead, and TensorFlow is never imported in the web worker. With a
+    model registry the active version is loaded instead of MODEL_PATH.
+    """
+    global model, model_version, model_loaded_at
     try:
-        if os.path.exists(MODEL_PATH):
-            print(f"Loading model from {MODEL_PATH}...")
-            model = keras.models.load_model(MODEL_PATH)
-            print("✓ Model loaded successfully!")
+        if SERVING_MODE == 'model_host':
+            print(f"Connecting to model host at {MODEL_HOST_ADDRESS}...")
+            client = ModelHostClient(MODEL_HOST_ADDRESS, capacity=BATCH_MAX_SIZE)
+            client.connect()
+            model = client
+            if prediction_cache is not None:
+                prediction_cache.set_model_version(client.model_version)
+            print("✓ Connected to model host!")
             return True
+        elif model_registry is not None:
+            version = model_registry.active_version()
+            if version is None:
+                print(f"⚠️  No active model version in the registry at {MODEL_REGISTRY_DIR}")
+                print("Publish one with: python model_registry.py publish ../model --activate")
+                return False
+            model = load_registry_version(version)
+            model_version = version
+        elif os.path.exists(MODEL_PATH):
+            model = build_backend(MODEL_PATH)
         else:
             print(f"⚠️  Model file not found at {MODEL_PATH}")
             print("Please train the model first using train_model.py")
             return False
+        model_loaded_at = time.time()
+        if prediction_cache is not None:
+            prediction_cache.set_model_version(model.version)
+        print(f"✓ Model {model_version or model.version} loaded successfully!")
+        return True
     except Exception as e:
         print(f"Error loading model: {str(e)}")
         return False
 
+def warm_up_backend(backend):
+    """
+    Run dummy inferences so graph tracing happens before real traffic.
+    
+    Covers a single image and a full micro-batch, the two shapes that
+    dominate steady-state traffic, plus every padding bucket of the keras
+    backend up to a full micro-batch. Both cascade stages are warmed
+    directly, since dummy input may never escalate.
+    """
+    buckets = getattr(backend, 'batch_buckets', ())
+    batch_sizes = sorted({1, BATCH_MAX_SIZE, *(size for size in buckets if size <= BATCH_MAX_SIZE)})
+    for stage in (*getattr(backend, 'stages', ()), backend):
+        for batch_size in batch_sizes:
+            stage.predict(np.zeros((batch_size, IMG_SIZE, IMG_SIZE, 3), dtype=np.float32))
+
+def warm_up_model():
+    """Warm up the loaded model and start the batcher thread."""
+    warm_up_backend(model)
+    run_inference(np.zeros((1, IMG_SIZE, IMG_SIZE, 3), dtype=np.float32))
+
+def swap_model(version):
+    """
+    Switch this worker to another registry version without downtime.
+    
+    Runs on the registry watcher thread. The new version is loaded and
+    warmed up while requests keep using the current model, then the global
+    reference is swapped: in-flight forward passes finish on the old model
+    and the next batch uses the new one. Only one candidate is loaded at a
+    time and the old model is released right after the swap, so at most
+    two models are ever resident. A version that fails to load, verify or
+    warm up is dropped and the current model keeps serving.
+    
+    When no model was loaded at startup (an empty registry, or an active
+    version that failed), the first successful swap starts the batcher and
+    marks the worker ready.
+    """
+    global model, model_version, model_loaded_at, model_ready
+    with _model_swap_lock:
+        if version == model_version:
+            return True
+        print(f"Loading model version {version} (serving {model_version})...")
+        start = time.perf_counter()
+        candidate, error = None, None
+        try:
+            candidate = load_registry_version(version)
+            warm_up_backend(candidate)
+        except Exception as e:
+            error = str(e)
+        if error is not None:
+            # Release a partly loaded candidate before the next attempt
+            candidate = None
+            gc.collect()
+            metrics.inc('crop_model_swaps_total', result='failed')
+            print(f"⚠️  Could not load model version {version}, still serving {model_version}: {error}")
+            return False
+        
+        previous, model = model, candidate
+        model_version, model_loaded_at = version, time.time()
+        if prediction_cache is not None:
+            prediction_cache.set_model_version(candidate.version)
+        del previous, candidate
+        gc.collect()
+        if not model_ready:
+            # First model in this worker: start the batcher before taking traffic
+            run_inference(np.zeros((1, IMG_SIZE, IMG_SIZE, 3), dtype=np.float32))
+            model_ready = True
+        
+        elapsed = time.perf_counter() - start
+        metrics.inc('crop_model_swaps_total', result='success')
+        metrics.set('crop_model_swap_seconds', elapsed)
+        print(f"✓ Now serving model version {version} (loaded and warmed up in {elapsed:.2f}s)")
+        return True
+
+def init_model():
+    """
+    Load and warm up the model for this worker process.
+    
+    Called once per worker at startup (see gunicorn.conf.py), never from
+    the request path. Marks the worker ready on success. With a model
+    registry it starts watching it for new active versions either way, so
+    a worker that booted without a usable version becomes ready as soon
+    as one is activated, without a restart.
+    """
+    global model_ready, model_init_attempted, registry_watcher
+    model_init_attempted = True
+    metrics.start()
+    
+    if CLASS_REGISTRY.missing_treatment:
+        print(f"⚠️  No treatment guide for {len(CLASS_REGISTRY.missing_treatment)} classes; "
+              "their predictions report severity 'Unknown'")
+    
+    start = time.perf_counter()
+    loaded = load_model()
+    if loaded:
+        metrics.set('crop_model_load_seconds', time.perf_counter() - start)
+        
+        start = time.perf_counter()
+        warm_up_model()
+        model_ready = True
+        elapsed = time.perf_counter() - start
+        metrics.set('crop_model_warmup_seconds', elapsed)
+        print(f"✓ Model warmed up in {elapsed:.2f}s")
+    
+    if model_registry is not None and registry_watcher is None:
+        registry_watcher = RegistryWatcher(
+            model_registry, swap_model, current=model_version, interval=MODEL_REGISTRY_POLL_INTERVAL
+        )
+        registry_watcher.start()
+        if not loaded:
+            print(f"Watching {MODEL_REGISTRY_DIR}; this worker becomes ready once a model version is activated")
+    return loaded
+
+def ensure_model():
+    """
+    Load the model on first use when no warm-up phase ran in this process.
+    
+    Gunicorn workers and the ASGI app load it at boot; this covers
+    `flask run` and scripts that use the app directly, so importing the
+    app alone never imports the inference framework. Loading is attempted
+    once per process.
+    """
+    if model is None and not model_init_attempted:
+        with _model_init_lock:
+            if model is None and not model_init_attempted:
+                init_model()
+    return model is not None
+
+# =====================================================
+# Inference
+# =====================================================
+def get_batcher():
+    """Return this process's micro-batcher, starting it on first use."""
+    global batcher
+    if batcher is None:
+        with _batcher_lock:
+            if batcher is None:
+                batcher = MicroBatcher(
+                    lambda batch: model.predict(batch),
+                    max_batch_size=BATCH_MAX_SIZE,
+                    max_wait_ms=BATCH_MAX_WAIT_MS
+                )
+    return batcher
+
+def run_inference(img_array):
+    """
+    Run the model on a preprocessed batch.
+    
+    When batching is enabled the request is merged with other in-flight
+    requests into a single forward pass. In 'model_host' mode batching
+    happens inside the host, across all workers.
+    """
+    if BATCHING_ENABLED and SERVING_MODE != 'model_host':
+        return get_batcher().predict(img_array)
+    return model.predict(img_array)
+
 # =====================================================
 # Utility Functions
 # =====================================================
@@ -227,94 +511,245 @@ def allowed_file(filename):
     """Check if file extension is allowed."""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def preprocess_image(image_path):
+def is_archive(filename):
+    """Check if a filename looks like a supported zip/tar archive."""
+    return filename.lower().endswith(ARCHIVE_EXTENSIONS)
+
+class ArchiveLimitError(ValueError):
+    """An archive holds more images or more uncompressed bytes than one batch allows."""
+
+def read_member(stream):
+    """Read one archive member, or None if it turns out larger than MAX_FILE_SIZE."""
+    with stream:
+        data = stream.read(MAX_FILE_SIZE + 1)
+    return data if len(data) <= MAX_FILE_SIZE else None
+
+def read_archive(filename, data, max_members=MAX_BATCH_FILES, max_bytes=MAX_BATCH_BYTES):
     """
-    Load and preprocess image for model prediction.
+    Extract (filename, bytes) pairs from the bytes of a zip or tar archive.
+    
+    Directories and hidden files are skipped; members larger than
+    MAX_FILE_SIZE are returned with `None` data so they can be reported.
+    The member count and declared uncompressed sizes are checked against
+    `max_members` and `max_bytes` from the archive headers, before any
+    member is decompressed, and no member is read past MAX_FILE_SIZE
+    whatever its header claims.
     
-    Steps:
-    1. Load image
-    2. Resize to 224x224
-    3. Normalize to [0, 1]
+    Raises:
+        ArchiveLimitError: Too many members or too many uncompressed bytes
     """
+    selected = []
+    declared = 0
+    
+    def admit(name, size, info):
+        nonlocal declared
+        if size <= MAX_FILE_SIZE:
+            declared += size
+        selected.append((name, size, info))
+        if len(selected) > max_members:
+            raise ArchiveLimitError(f'Too many images. Maximum per request: {MAX_BATCH_FILES}')
+        if declared > max_bytes:
+            raise ArchiveLimitError(
+                f'Archive too large when extracted. Maximum per request: {MAX_BATCH_BYTES // (1024 * 1024)} MB'
+            )
+    
+    data = io.BytesIO(data)
+    if filename.lower().endswith('.zip'):
+        with zipfile.ZipFile(data) as archive:
+            for info in archive.infolist():
+                name = os.path.basename(info.filename)
+                if not info.is_dir() and name and not name.startswith('.'):
+                    admit(name, info.file_size, info)
+            return [
+                (name, read_member(archive.open(info)) if size <= MAX_FILE_SIZE else None)
+                for name, size, info in selected
+            ]
+    
+    with tarfile.open(fileobj=data) as archive:
+        # Iterating reads headers only and stops at the first exceeded limit
+        for info in archive:
+            name = os.path.basename(info.name)
+            if info.isfile() and name and not name.startswith('.'):
+                admit(name, info.size, info)
+        return [
+            (name, read_member(archive.extractfile(info)) if size <= MAX_FILE_SIZE else None)
+            for name, size, info in selected
+        ]
+
+def batch_budget(items):
+    """(members, uncompressed bytes) an archive may still add to a batch holding `items`."""
+    return MAX_BATCH_FILES - len(items), MAX_BATCH_BYTES - sum(len(data) for _, data in items if data is not None)
+
+def decode_batch_item(item, out):
+    """
+    Validate and preprocess one (filename, bytes) batch item into `out`.
+    
+    Returns an error message, or None on success, so a bad item never
+    fails the whole batch.
+    """
+    filename, data = item
+    if not allowed_file(filename):
+        return f'Invalid file type. Allowed: {", ".join(ALLOWED_EXTENSIONS)}'
+    if data is None:
+        return f'File too large. Maximum size: {MAX_FILE_SIZE / (1024 * 1024):.0f} MB'
     try:
-        # Load image
-        img = Image.open(image_path).convert('RGB')
-        
-        # Resize to required dimensions
-        img = img.resize((IMG_SIZE, IMG_SIZE))
-        
-        # Convert to numpy array
-        img_array = np.array(img)
-        
-        # Normalize to [0, 1]
-        img_array = img_array / 255.0
-        
-        # Add batch dimension
-        img_array = np.expand_dims(img_array, axis=0)
-        
-        return img_array
+        preprocess_image(io.BytesIO(data), out=out, stage_timer=stage_timer)
+        return None
     except Exception as e:
-        raise Exception(f"Image preprocessing failed: {str(e)}")
+        return str(e)
+
+def batch_response_json(results):
+    """Assemble the /predict/batch response from per-item JSON results."""
+    return b'{"success":true,"count":%d,"results":[%s]}' % (len(results), b','.join(results))
 
-def get_disease_info(disease_name):
-    """Get treatment information for a disease."""
-    # Extract disease name from class label
-    disease = disease_name.split('___')[-1]
+# =====================================================
+# Prediction Pipeline (shared by the Flask and ASGI apps)
+# =====================================================
+def predict_upload(stream):
+    """
+    Predict the disease for one uploaded image stream.
+    
+    Returns a (class id, confidence %) pair; CLASS_REGISTRY renders the
+    response. Repeated uploads are served from the prediction cache.
+    CPU-bound: the ASGI app (asgi.py) runs it on its inference executor.
+    """
+    # Serve repeated uploads from the cache
+    cache_keys = []
+    if prediction_cache is not None:
+        cache_keys.append(content_key(stream))
+        cached = prediction_cache.get(cache_keys[0])
+        if cached is not None:
+            return cached
+    
+    # Preprocess image straight from the upload stream
+    img_array = preprocess_image(stream, stage_timer=stage_timer)
+    
+    if prediction_cache is not None and PREDICTION_CACHE_TENSOR_KEYS:
+        cache_keys.append(tensor_key(img_array))
+        cached = prediction_cache.get(cache_keys[1])
+        if cached is not None:
+            prediction_cache.put(cache_keys[0], cached)
+            return cached
+    
+    # Make prediction (a model swap meanwhile keeps the result out of the cache)
+    cache_version = prediction_cache.model_version if prediction_cache is not None else None
+    with stage_timer('inference'):
+        predictions = run_inference(img_array)
     
-    # Find matching treatment info (case-insensitive)
-    for key, info in TREATMENT_GUIDE.items():
-        if key.lower() == disease.lower():
-            return info
+    # Get top prediction
+    class_index = int(np.argmax(predictions[0]))
+    prediction = (class_index, float(predictions[0][class_index] * 100))
     
-    # Return generic info if not found
-    return TREATMENT_GUIDE.get('healthy', {})
+    for key in cache_keys:
+        prediction_cache.put(key, prediction, model_version=cache_version)
+    
+    return prediction
 
-def format_prediction_response(class_index, confidence):
-    """Format prediction into a user-friendly response."""
-    disease_class = DISEASE_CLASSES[class_index]
-    crop, disease = disease_class.split('___')
+def predict_items(items):
+    """
+    Predict diseases for a list of (filename, bytes) items.
+    
+    Returns one JSON-encoded result per item, in order; invalid or
+    undecodable items get an error result instead of failing the whole batch.
+    """
+    # Serve repeated images from the cache; only misses are decoded
+    results = [None] * len(items)
+    cache_keys = [None] * len(items)
+    if prediction_cache is not None:
+        for i, (filename, data) in enumerate(items):
+            if data is None or not allowed_file(filename):
+                continue
+            cache_keys[i] = bytes_key(data)
+            cached = prediction_cache.get(cache_keys[i])
+            if cached is not None:
+                results[i] = CLASS_REGISTRY.response_json(*cached, filename=filename)
+    pending = [i for i, result in enumerate(results) if result is None]
     
-    # Get treatment information
-    disease_info = get_disease_info(disease_class)
+    # Decode in parallel straight into one batch buffer, keeping per-item errors
+    batch_buffer = new_batch_buffer(len(pending))
+    errors = list(decode_executor.map(decode_batch_item, [items[i] for i in pending], batch_buffer))
+    for i, error in zip(pending, errors):
+        if error is not None:
+            results[i] = dumps({'filename': items[i][0], 'success': False, 'error': error})
+    valid = [row for row, error in enumerate(errors) if error is None]
     
-    return {
-        'success': True,
-        'crop': crop,
-        'disease': disease,
-        'confidence': f"{float(confidence):.2f}%",
-        'confidence_value': float(confidence),
-        'severity': disease_info.get('severity', 'Unknown'),
-        'description': disease_info.get('description', ''),
-        'treatment': disease_info.get('treatment', []),
-        'prevention': disease_info.get('prevention', [])
-    }
+    # Run the model in sized batches
+    for start in range(0, len(valid), BATCH_MAX_SIZE):
+        chunk = valid[start:start + BATCH_MAX_SIZE]
+        cache_version = prediction_cache.model_version if prediction_cache is not None else None
+        try:
+            with stage_timer('inference'):
+                predictions = run_inference(batch_buffer[chunk])
+        except Exception as e:
+            for row in chunk:
+                i = pending[row]
+                results[i] = dumps({
+                    'filename': items[i][0],
+                    'success': False,
+                    'error': f'Prediction failed: {str(e)}'
+                })
+            continue
+        
+        for row, prediction in zip(chunk, predictions):
+            i = pending[row]
+            class_index = int(np.argmax(prediction))
+            confidence = float(prediction[class_index] * 100)
+            if cache_keys[i] is not None:
+                prediction_cache.put(cache_keys[i], (class_index, confidence), model_version=cache_version)
+            results[i] = CLASS_REGISTRY.response_json(class_index, confidence, filename=items[i][0])
+    
+    return results
 
 # =====================================================
 # API Routes
 # =====================================================
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint."""
+    """Liveness check endpoint: the process is up and serving requests."""
     return jsonify({
         'status': 'healthy',
         'message': 'API is running',
-        'model_loaded': model is not None
+        'model_loaded': model is not None,
+        'ready': model_ready
     }), 200
 
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness check endpoint: the model is loaded and warmed up."""
+    if not model_ready:
+        return jsonify({
+            'status': 'not_ready',
+            'message': 'Model not loaded or still warming up'
+        }), 503
+    return jsonify({
+        'status': 'ready',
+        'message': 'Model loaded and warmed up'
+    }), 200
+
+def frontend_response(filename):
+    """A frontend asset with caching headers; 304 when the client's copy is current."""
+    result = static_assets.respond(
+        filename, request.headers.get('If-None-Match'), request.headers.get('Accept-Encoding')
+    )
+    if result is None:
+        raise NotFound()
+    status, headers, body = result
+    return Response(body, status=status, headers=headers)
+
 @app.route('/', methods=['GET'])
 def serve_frontend_root():
     """Serve frontend index page."""
-    return send_from_directory(FRONTEND_DIR, 'index.html')
+    return frontend_response('index.html')
 
 @app.route('/frontend/', methods=['GET'])
 def serve_frontend_index():
     """Serve frontend index page from /frontend/ path."""
-    return send_from_directory(FRONTEND_DIR, 'index.html')
+    return frontend_response('index.html')
 
 @app.route('/frontend/<path:filename>', methods=['GET'])
 def serve_frontend_assets(filename):
-    """Serve frontend static assets (css/js/images)."""
-    return send_from_directory(FRONTEND_DIR, filename)
+    """Serve frontend static assets (css/js/images), hashed names cached for a year."""
+    return frontend_response(filename)
 
 @app.route('/predict', methods=['POST'])
 def predict():
@@ -339,21 +774,25 @@ def predict():
     }
     """
     try:
-        # Check if model is loaded
-        if model is None:
+        # Check if model is loaded (loads it here if no warm-up phase ran)
+        if not ensure_model():
             return jsonify({
                 'success': False,
                 'error': 'Model not loaded. Please start the server with a trained model.'
             }), 500
         
+        # Receive and parse the upload
+        with stage_timer('upload_read'):
+            files = request.files
+        
         # Check if file is in request
-        if 'file' not in request.files:
+        if 'file' not in files:
             return jsonify({
                 'success': False,
                 'error': 'No file provided. Please upload an image.'
             }), 400
         
-        file = request.files['file']
+        file = files['file']
         
         # Check if file is selected
         if file.filename == '':
@@ -369,34 +808,86 @@ def predict():
                 'error': f'Invalid file type. Allowed: {", ".join(ALLOWED_EXTENSIONS)}'
             }), 400
         
-        # Save uploaded file
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        # Predict (repeated uploads are served from the cache)
+        prediction = predict_upload(file.stream)
         
-        # Preprocess image
-        img_array = preprocess_image(filepath)
+        with stage_timer('serialize'):
+            return Response(CLASS_REGISTRY.response_json(*prediction), mimetype='application/json'), 200
+    
+    except HTTPException:
+        # e.g. 413 from MAX_CONTENT_LENGTH while parsing the upload
+        raise
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Prediction failed: {str(e)}'
+        }), 500
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """
+    POST /predict/batch
+    
+    Predict diseases for many images in one request.
+    
+    Request:
+    - Form data with one or more 'files' fields, each an image or a
+      zip/tar archive of images
+    
+    Response:
+    {
+        "success": true,
+        "count": 2,
+        "results": [
+            {"filename": "leaf1.jpg", "success": true, "crop": "Tomato", ...},
+            {"filename": "notes.txt", "success": false, "error": "Invalid file type..."}
+        ]
+    }
+    """
+    try:
+        # Check if model is loaded (loads it here if no warm-up phase ran)
+        if not ensure_model():
+            return jsonify({
+                'success': False,
+                'error': 'Model not loaded. Please start the server with a trained model.'
+            }), 500
         
-        # Make prediction
-        predictions = model.predict(img_array, verbose=0)
+        with stage_timer('upload_read'):
+            uploads = [file for file in request.files.getlist('files') if file.filename]
+        if not uploads:
+            return jsonify({
+                'success': False,
+                'error': 'No files provided. Please upload one or more images.'
+            }), 400
         
-        # Get top prediction
-        class_index = np.argmax(predictions[0])
-        confidence = predictions[0][class_index] * 100
+        # Expand archives into individual items, within the batch limits
+        items = []
+        try:
+            for file in uploads:
+                if is_archive(file.filename):
+                    items.extend(read_archive(file.filename, file.read(), *batch_budget(items)))
+                else:
+                    items.append((file.filename, file.read()))
+        except ArchiveLimitError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         
-        # Format response
-        response = format_prediction_response(class_index, confidence)
+        if len(items) > MAX_BATCH_FILES:
+            return jsonify({
+                'success': False,
+                'error': f'Too many images. Maximum per request: {MAX_BATCH_FILES}'
+            }), 400
         
-        # Clean up uploaded file
-        if os.path.exists(filepath):
-            os.remove(filepath)
+        results = predict_items(items)
         
-        return jsonify(response), 200
+        with stage_timer('serialize'):
+            return Response(batch_response_json(results), mimetype='application/json'), 200
     
+    except HTTPException:
+        raise
     except Exception as e:
         return jsonify({
             'success': False,
-            'error': f'Prediction failed: {str(e)}'
+            'error': f'Batch prediction failed: {str(e)}'
         }), 500
 
 @app.route('/info', methods=['GET'])
@@ -406,16 +897,50 @@ def get_info():
         'total_classes': len(DISEASE_CLASSES),
         'classes': DISEASE_CLASSES,
         'upload_size_limit_mb': MAX_FILE_SIZE / (1024 * 1024),
-        'supported_formats': list(ALLOWED_EXTENSIONS)
+        'supported_formats': list(ALLOWED_EXTENSIONS),
+        'model': model_info()
     }), 200
 
+@app.route('/stats', methods=['GET'])
+def get_stats():
+    """Get serving statistics for this worker process."""
+    batching = {'enabled': BATCHING_ENABLED}
+    if batcher is not None:
+        batching.update(batcher.stats())
+    
+    return jsonify({
+        'pid': os.getpid(),
+        'batching': batching,
+        'cascade': cascade_stats(),
+        'prediction_cache': prediction_cache.stats() if prediction_cache is not None else {'enabled': False},
+        'weather': weather_service.stats()
+    }), 200
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus metrics, aggregated over all workers (see METRICS_DIR)."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """Count every request and time it, labelled by route template."""
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    metrics.inc('crop_http_requests_total', route=route, method=request.method, status=response.status_code)
+    if 'request_start' in g:
+        metrics.observe('crop_http_request_duration_seconds', time.perf_counter() - g.request_start, route=route)
+    return response
+
 @app.route('/weather', methods=['GET'])
 def get_weather():
     """
     GET /weather
     
     Get weather data for given location (latitude, longitude).
-    Uses OpenWeatherMap free API.
+    Uses the wttr.in API, cached per ~11 km grid cell (see weather.py).
     
     Query Parameters:
     - lat: Latitude (required)
@@ -433,8 +958,6 @@ def get_weather():
     }
     """
     try:
-        import requests
-        
         lat = request.args.get('lat')
         lon = request.args.get('lon')
         
@@ -444,97 +967,17 @@ def get_weather():
                 'error': 'Latitude and longitude are required'
             }), 400
         
-        # OpenWeatherMap free API (no key needed for demo)
-        # Using wttr.in as an alternative that doesn't require API key
-        url = f'https://wttr.in/?format=j1&lat={lat}&lon={lon}'
-        
         try:
-            response = requests.get(url, timeout=5)
-            response.raise_for_status()
-            data = response.json()
-            
-            # Extract current weather data
-            current = data['current_condition'][0]
-            temperature = float(current['temp_C'])
-            humidity = int(current['humidity'])
-            weather_desc = current['weatherDesc'][0]['value']
-            
-            # Assess risk based on humidity and weather conditions
-            risk_level = 'low'
-            risk_message = 'Fungal disease risk is low'
-            recommendations = []
-            
-            if humidity >= 80:
-                risk_level = 'critical'
-                risk_message = '⚠️ CRITICAL: Very high humidity - extreme fungal disease risk'
-                recommendations = [
-                    '🚨 Increase ventilation immediately',
-                    '🌿 Remove affected leaves quickly',
-                    '💧 Reduce watering frequency',
-                    '🔬 Apply fungicide preventatively',
-                    '👀 Monitor plants daily'
-                ]
-            elif humidity >= 70:
-                risk_level = 'high'
-                risk_message = '🌦️ High humidity - increased fungal disease risk'
-                recommendations = [
-                    '🌬️ Improve air circulation',
-                    '💧 Water early morning, avoid evening',
-                    '🔬 Consider preventive fungicide',
-                    '👀 Monitor for symptoms',
-                    '🌿 Prune dense leaf areas'
-                ]
-            elif humidity >= 50:
-                risk_level = 'medium'
-                risk_message = '🌤️ Moderate humidity - normal fungal disease risk'
-                recommendations = [
-                    '💧 Continue regular watering routine',
-                    '🌬️ Maintain good spacing between plants',
-                    '👀 Regular inspections recommended',
-                    '🔬 Keep fungicide on hand'
-                ]
-            else:
-                risk_level = 'low'
-                risk_message = '☀️ Low humidity - fungal disease risk is low'
-                recommendations = [
-                    '✅ Fungal disease risk minimal',
-                    '💧 Monitor irrigation for drought stress',
-                    '☀️ Ideal conditions for most crops',
-                    '🌿 Good air circulation maintained'
-                ]
-            
-            # Add temperature-based warnings
-            if temperature > 32:
-                recommendations.insert(0, '🔥 Very hot - ensure adequate watering')
-            elif temperature < 10:
-                recommendations.insert(0, '❄️ Cold conditions - reduced disease pressure')
-            
+            lat, lon = parse_coordinates(lat, lon)
+        except ValueError as e:
             return jsonify({
-                'success': True,
-                'temperature': temperature,
-                'humidity': humidity,
-                'weather': weather_desc,
-                'risk_level': risk_level,
-                'risk_message': risk_message,
-                'recommendations': recommendations
-            }), 200
-            
-        except requests.exceptions.RequestException:
-            # Fallback: return default weather data
-            return jsonify({
-                'success': True,
-                'temperature': 25,
-                'humidity': 65,
-                'weather': 'Unknown',
-                'risk_level': 'medium',
-                'risk_message': '🌤️ Weather data unavailable - assuming moderate risk',
-                'recommendations': [
-                    'Monitor local weather conditions',
-                    'Maintain proper plant care routine',
-                    'Check weather forecast regularly'
-                ]
-            }), 200
-            
+                'success': False,
+                'error': f'Invalid coordinates: {str(e)}'
+            }), 400
+        
+        # Cached per grid cell; falls back to default data if the service is down
+        return jsonify(weather_service.get(lat, lon)), 200
+    
     except Exception as e:
         return jsonify({
             'success': False,
@@ -571,29 +1014,23 @@ def internal_error(error):
 # =====================================================
 # Application Startup
 # =====================================================
-@app.before_request
-def before_request():
-    """Initialize model on first request."""
-    global model
-    if model is None:
-        load_model()
-
 if __name__ == '__main__':
     print("=" * 60)
     print("AI CROP DISEASE DETECTOR - BACKEND API")
     print("=" * 60)
     print("\nLoading model...")
     
-    # Load model before starting server
-    load_model()
+    # Load and warm up model before starting server
+    init_model()
     
     print("\n✓ Starting Flask server...")
     print("API Documentation:")
     print("  - Health Check: GET http://localhost:5000/health")
+    print("  - Readiness Check: GET http://localhost:5000/ready")
     print("  - Predict Disease: POST http://localhost:5000/predict (send image)")
     print("  - Get Classes: GET http://localhost:5000/info")
     print("\nOpen frontend at: http://localhost:5000/frontend/")
     print("=" * 60 + "\n")
     
-    # Run Flask app
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Run Flask app (no reloader: it would load the model a second time)
+    app.run(debug=True, use_reloader=False, host='0.0.0.0', port=5000)
@@ -0,0 +1,372 @@
+"""
+AI Crop Disease Detector - ASGI Backend
+=======================================
+Serves the same API as app.py on an asyncio server (Starlette + uvicorn).
+
+A slow client only holds a coroutine, not a worker thread: request bodies
+are received without blocking and weather lookups use an async HTTP
+client. Image decoding and inference run on a bounded thread pool
+(ASGI_INFERENCE_WORKERS), where concurrent requests still share
+micro-batches, so hundreds of slow uploads cannot starve the model.
+
+Validation, caching, inference and response formats are shared with
+app.py, so both serving modes behave identically.
+
+Run:
+    uvicorn asgi:app --app-dir backend --host 0.0.0.0 --port 5000
+"""
+
+import asyncio
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.exceptions import HTTPException
+from starlette.formparsers import MultiPartException, MultiPartParser
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from starlette.routing import Match, Route
+
+import app as api
+from weather import AsyncWeatherService, parse_coordinates
+
+# Threads for CPU-bound work (decode + inference). Requests beyond this
+# wait on the event loop without holding a thread.
+ASGI_INFERENCE_WORKERS = int(os.environ.get('ASGI_INFERENCE_WORKERS', api.BATCH_MAX_SIZE))
+
+inference_executor = ThreadPoolExecutor(max_workers=ASGI_INFERENCE_WORKERS, thread_name_prefix='inference')
+weather_service = None
+
+
+async def run_blocking(func, *args):
+    """Run CPU-bound work on the bounded inference executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(inference_executor, func, *args)
+
+
+class UploadParser(MultiPartParser):
+    """Keeps uploads in memory (bodies are capped at MAX_FILE_SIZE) unless spooling is enabled."""
+
+    max_file_size = api.UPLOAD_SPOOL_THRESHOLD or api.MAX_FILE_SIZE
+
+
+async def read_form(request, max_files):
+    """
+    Parse the request's form like `request.form()`, with UploadParser for
+    multipart bodies (Starlette's own parser class is left untouched).
+    """
+    if request.headers.get('content-type', '').split(';')[0].strip().lower() != 'multipart/form-data':
+        return await request.form(max_files=max_files)
+    try:
+        return await UploadParser(request.headers, request.stream(), max_files=max_files).parse()
+    except MultiPartException as e:
+        raise HTTPException(status_code=400, detail=e.message)
+
+
+def error_response(message, status_code):
+    return JSONResponse({'success': False, 'error': message}, status_code=status_code)
+
+
+def too_large_response():
+    return error_response(f'File too large. Maximum size: {api.MAX_FILE_SIZE / (1024 * 1024):.0f} MB', 413)
+
+
+class BodySizeLimitMiddleware:
+    """
+    Enforce MAX_FILE_SIZE on request bodies, like Flask's MAX_CONTENT_LENGTH.
+
+    Declared lengths are rejected before any body is read; chunked bodies
+    are cut off as soon as they cross the limit.
+    """
+
+    def __init__(self, app, max_size):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope['headers']).get(b'content-length')
+        if content_length is not None:
+            try:
+                declared = int(content_length)
+            except ValueError:
+                await error_response('Invalid Content-Length header', 400)(scope, receive, send)
+                return
+            if declared > self.max_size:
+                await too_large_response()(scope, receive, send)
+                return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > self.max_size:
+                    raise HTTPException(status_code=413)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+class MetricsMiddleware:
+    """
+    Count and time every request for /metrics, labelled by route template.
+
+    The route is matched here, before the inner middleware runs, so
+    requests rejected before routing (e.g. a 413 from
+    BodySizeLimitMiddleware) still carry their route.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def route_template(scope):
+        """Path template of the route serving `scope` (a wrong-method match counts), or 'unmatched'."""
+        partial = 'unmatched'
+        for route in scope['app'].routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+            if match == Match.PARTIAL and partial == 'unmatched':
+                partial = route.path
+        return partial
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        route = self.route_template(scope)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            api.metrics.inc('crop_http_requests_total', route=route, method=scope['method'], status=status)
+            api.metrics.observe('crop_http_request_duration_seconds', time.perf_counter() - start, route=route)
+
+
+# =====================================================
+# API Routes
+# =====================================================
+async def health_check(request):
+    """Liveness check endpoint: the process is up and serving requests."""
+    return JSONResponse({
+        'status': 'healthy',
+        'message': 'API is running',
+        'model_loaded': api.model is not None,
+        'ready': api.model_ready
+    })
+
+
+async def readiness_check(request):
+    """Readiness check endpoint: the model is loaded and warmed up."""
+    if not api.model_ready:
+        return JSONResponse({
+            'status': 'not_ready',
+            'message': 'Model not loaded or still warming up'
+        }, status_code=503)
+    return JSONResponse({
+        'status': 'ready',
+        'message': 'Model loaded and warmed up'
+    })
+
+
+async def serve_frontend(request):
+    """Serve frontend assets from memory (see app.static_assets); the index page by default."""
+    result = api.static_assets.respond(
+        request.path_params.get('filename', ''),
+        request.headers.get('if-none-match'), request.headers.get('accept-encoding')
+    )
+    if result is None:
+        raise HTTPException(status_code=404)
+    status, headers, body = result
+    return Response(body, status_code=status, headers=headers)
+
+
+async def predict(request):
+    """POST /predict (see app.predict for the request and response format)."""
+    if api.model is None:
+        return error_response('Model not loaded. Please start the server with a trained model.', 500)
+
+    # One sample per request, like Flask: receiving the body and reading the upload
+    with api.stage_timer('upload_read'):
+        form = await read_form(request, api.MAX_BATCH_FILES)
+        # Like Flask's request.files['file'], the first 'file' part wins
+        file = next(iter(form.getlist('file')), None)
+        data = None if file is None or isinstance(file, str) else await file.read()
+    try:
+        if data is None:
+            return error_response('No file provided. Please upload an image.', 400)
+        if not file.filename:
+            return error_response('No file selected.', 400)
+        if not api.allowed_file(file.filename):
+            return error_response(f'Invalid file type. Allowed: {", ".join(api.ALLOWED_EXTENSIONS)}', 400)
+
+        prediction = await run_blocking(api.predict_upload, io.BytesIO(data))
+        with api.stage_timer('serialize'):
+            return Response(api.CLASS_REGISTRY.response_json(*prediction), media_type='application/json')
+    except Exception as e:
+        return error_response(f'Prediction failed: {str(e)}', 500)
+    finally:
+        await form.close()
+
+
+async def predict_batch(request):
+    """POST /predict/batch (see app.predict_batch for the request and response format)."""
+    if api.model is None:
+        return error_response('Model not loaded. Please start the server with a trained model.', 500)
+
+    with api.stage_timer('upload_read'):
+        form = await read_form(request, api.MAX_BATCH_FILES)
+    try:
+        uploads = [file for file in form.getlist('files') if not isinstance(file, str) and file.filename]
+        if not uploads:
+            return error_response('No files provided. Please upload one or more images.', 400)
+
+        # Expand archives into individual items, within the batch limits
+        items = []
+        try:
+            for file in uploads:
+                data = await file.read()
+                if api.is_archive(file.filename):
+                    items.extend(await run_blocking(api.read_archive, file.filename, data, *api.batch_budget(items)))
+                else:
+                    items.append((file.filename, data))
+        except api.ArchiveLimitError as e:
+            return error_response(str(e), 400)
+
+        if len(items) > api.MAX_BATCH_FILES:
+            return error_response(f'Too many images. Maximum per request: {api.MAX_BATCH_FILES}', 400)
+
+        results = await run_blocking(api.predict_items, items)
+        with api.stage_timer('serialize'):
+            return Response(api.batch_response_json(results), media_type='application/json')
+    except Exception as e:
+        return error_response(f'Batch prediction failed: {str(e)}', 500)
+    finally:
+        await form.close()
+
+
+async def get_info(request):
+    """Get information about available disease classes."""
+    return JSONResponse({
+        'total_classes': len(api.DISEASE_CLASSES),
+        'classes': api.DISEASE_CLASSES,
+        'upload_size_limit_mb': api.MAX_FILE_SIZE / (1024 * 1024),
+        'supported_formats': list(api.ALLOWED_EXTENSIONS),
+        'model': api.model_info()
+    })
+
+
+async def get_stats(request):
+    """Get serving statistics for this worker process."""
+    batching = {'enabled': api.BATCHING_ENABLED}
+    if api.batcher is not None:
+        batching.update(api.batcher.stats())
+
+    return JSONResponse({
+        'pid': os.getpid(),
+        'batching': batching,
+        'cascade': api.cascade_stats(),
+        'prediction_cache': api.prediction_cache.stats() if api.prediction_cache is not None else {'enabled': False},
+        'weather': weather_service.stats()
+    })
+
+
+async def get_metrics(request):
+    """Prometheus metrics, aggregated over all workers (see app.METRICS_DIR)."""
+    return PlainTextResponse(api.metrics.render(), media_type='text/plain; version=0.0.4')
+
+
+async def get_weather(request):
+    """GET /weather (see app.get_weather for the request and response format)."""
+    lat = request.query_params.get('lat')
+    lon = request.query_params.get('lon')
+    if not lat or not lon:
+        return error_response('Latitude and longitude are required', 400)
+
+    try:
+        lat, lon = parse_coordinates(lat, lon)
+    except ValueError as e:
+        return error_response(f'Invalid coordinates: {str(e)}', 400)
+
+    # Cached per grid cell; falls back to default data if the service is down
+    return JSONResponse(await weather_service.get(lat, lon))
+
+
+# =====================================================
+# Error Handlers
+# =====================================================
+async def http_error(request, exc):
+    """Return errors in the API's JSON format."""
+    if exc.status_code == 404:
+        return error_response('Endpoint not found', 404)
+    if exc.status_code == 413:
+        return too_large_response()
+    return error_response(exc.detail, exc.status_code)
+
+
+async def internal_error(request, exc):
+    """Handle internal server error."""
+    return error_response('Internal server error', 500)
+
+
+# =====================================================
+# Application Startup
+# =====================================================
+@asynccontextmanager
+async def lifespan(app):
+    """Load and warm up the model before serving; share one weather service."""
+    global weather_service
+    weather_service = AsyncWeatherService()
+    api.metrics.add_collector('weather', lambda: api.weather_samples(weather_service))
+    await run_blocking(api.init_model)
+    # Build the frontend off the event loop (hashing and compression)
+    await run_blocking(lambda: api.static_assets.assets)
+    try:
+        yield
+    finally:
+        await weather_service.aclose()
+        inference_executor.shutdown(wait=False)
+
+
+app = Starlette(
+    routes=[
+        Route('/health', health_check, methods=['GET']),
+        Route('/ready', readiness_check, methods=['GET']),
+        Route('/', serve_frontend, methods=['GET']),
+        Route('/frontend/', serve_frontend, methods=['GET']),
+        Route('/frontend/{filename:path}', serve_frontend, methods=['GET']),
+        Route('/predict', predict, methods=['POST']),
+        Route('/predict/batch', predict_batch, methods=['POST']),
+        Route('/info', get_info, methods=['GET']),
+        Route('/stats', get_stats, methods=['GET']),
+        Route('/metrics', get_metrics, methods=['GET']),
+        Route('/weather', get_weather, methods=['GET']),
+    ],
+    middleware=[
+        Middleware(MetricsMiddleware),
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*']),
+        Middleware(BodySizeLimitMiddleware, max_size=api.MAX_FILE_SIZE),
+    ],
+    exception_handlers={HTTPException: http_error, Exception: internal_error},
+    lifespan=lifespan
+)
@@ -0,0 +1,147 @@
+"""
+AI Crop Disease Detector - Dynamic Micro-Batching
+=================================================
+Merges concurrent inference requests into a single forward pass.
+
+Requests are queued and a background thread collects them into one batch
+until either the batch is full or the oldest request has waited for the
+configured deadline. The batch is run once and each caller receives its
+own slice of the output.
+"""
+
+import queue
+import threading
+import time
+
+import numpy as np
+
+from metrics import Histogram
+
+# Histogram bounds: batch size (images) and queue wait (milliseconds)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+QUEUE_WAIT_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250)
+
+
+class _PendingRequest:
+    """A queued inference request waiting for its slice of a batch."""
+
+    __slots__ = ('inputs', 'enqueued_at', 'done', 'result', 'error')
+
+    def __init__(self, inputs):
+        self.inputs = inputs
+        self.enqueued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    In-process dynamic batching scheduler.
+
+    Args:
+        predict_fn: Callable taking a (N, H, W, 3) array and returning (N, C)
+        max_batch_size: Maximum number of images per forward pass
+        max_wait_ms: Longest time the first queued request waits for company
+    """
+
+    def __init__(self, predict_fn, max_batch_size=16, max_wait_ms=5.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self.batch_size_histogram = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_histogram = Histogram(QUEUE_WAIT_BUCKETS_MS)
+
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def predict(self, inputs):
+        """
+        Queue an input batch and block until its predictions are ready.
+
+        `inputs` must carry a leading batch dimension; requests with several
+        images are kept together in the same forward pass.
+        """
+        pending = _PendingRequest(inputs)
+        self._queue.put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def stop(self):
+        """Stop the worker thread after draining already-queued requests."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def stats(self):
+        """Return batch-size and queue-wait histograms."""
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+            'queue_depth': self._queue.qsize(),
+            'batch_size': self.batch_size_histogram.snapshot(),
+            'queue_wait_ms': self.queue_wait_histogram.snapshot()
+        }
+
+    def _collect(self, first):
+        """Gather queued requests behind `first` until full or deadline."""
+        batch = [first]
+        size = len(first.inputs)
+        deadline = first.enqueued_at + self.max_wait
+        stop = False
+
+        while size < self.max_batch_size:
+            # Past the deadline, still take whatever is already queued
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    pending = self._queue.get(timeout=remaining)
+                else:
+                    pending = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if pending is None:
+                stop = True
+                break
+            batch.append(pending)
+            size += len(pending.inputs)
+
+        return batch, stop
+
+    def _run(self):
+        """Worker loop: collect, run one forward pass, scatter results."""
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+
+            batch, stop = self._collect(first)
+            started = time.perf_counter()
+            for pending in batch:
+                self.queue_wait_histogram.observe((started - pending.enqueued_at) * 1000.0)
+
+            try:
+                if len(batch) == 1:
+                    inputs = first.inputs
+                else:
+                    inputs = np.concatenate([pending.inputs for pending in batch], axis=0)
+                self.batch_size_histogram.observe(len(inputs))
+                outputs = self.predict_fn(inputs)
+
+                offset = 0
+                for pending in batch:
+                    count = len(pending.inputs)
+                    pending.result = outputs[offset:offset + count]
+                    offset += count
+            except Exception as e:
+                for pending in batch:
+                    pending.error = e
+            finally:
+                for pending in batch:
+                    pending.done.set()
+
+            if stop:
+                return
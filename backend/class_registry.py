@@ -0,0 +1,286 @@
+"""
+AI Crop Disease Detector - Class Registry
+=========================================
+The disease classes and treatment guide, shared by the API and by
+model/train_model.py so class ids always match between training and serving.
+
+CLASS_REGISTRY resolves every class id once at import (crop, disease and
+treatment info) and pre-encodes its prediction response as JSON around the
+confidence, so a response is assembled by splicing in the confidence value
+instead of looking up and serializing the same treatment lists per request.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Index = class id = model output unit; order must match the trained model
+DISEASE_CLASSES = [
+    'Apple___Apple_scab',
+    'Apple___Black_rot',
+    'Apple___Cedar_apple_rust',
+    'Apple___healthy',
+    'Blueberry___healthy',
+    'Cherry___Powdery_mildew',
+    'Cherry___healthy',
+    'Corn___Cercospora_leaf_spot',
+    'Corn___Common_rust',
+    'Corn___Northern_Leaf_Blight',
+    'Corn___healthy',
+    'Grape___Black_rot',
+    'Grape___Esca',
+    'Grape___Leaf_blight',
+    'Grape___healthy',
+    'Orange___Haunglongbing',
+    'Peach___Bacterial_spot',
+    'Peach___healthy',
+    'Pepper___Bacterial_spot',
+    'Pepper___healthy',
+    'Potato___Early_blight',
+    'Potato___Late_blight',
+    'Potato___healthy',
+    'Raspberry___healthy',
+    'Soybean___healthy',
+    'Squash___Powdery_mildew',
+    'Strawberry___Leaf_scorch',
+    'Strawberry___healthy',
+    'Tomato___Bacterial_spot',
+    'Tomato___Early_blight',
+    'Tomato___Late_blight',
+    'Tomato___Leaf_Mold',
+    'Tomato___Septoria_leaf_spot',
+    'Tomato___Spider_mites',
+    'Tomato___Target_Spot',
+    'Tomato___Tomato_Yellow_Leaf_Curl_Virus',
+    'Tomato___Tomato_mosaic_virus',
+    'Tomato___healthy'
+]
+
+# Written next to the model by model/train_model.py: the classes it was
+# actually trained on, recorded by the model registry so a model trained on
+# another class set is never served
+CLASS_NAMES_FILE = 'class_names.json'
+
+# Treatment recommendations, keyed by the disease part of the class name
+TREATMENT_GUIDE = {
+    'Apple_scab': {
+        'severity': 'Medium',
+        'description': 'Fungal infection causing dark lesions on leaves and fruits',
+        'treatment': [
+            'Remove infected leaves and branches',
+            'Apply fungicide (Sulfur or Copper-based)',
+            'Improve tree ventilation',
+            'Avoid wetting foliage during irrigation'
+        ],
+        'prevention': [
+            'Use resistant varieties',
+            'Practice good sanitation',
+            'Apply preventive fungicides in spring'
+        ]
+    },
+    'Black_rot': {
+        'severity': 'High',
+        'description': 'Fungal disease causing dark lesions and cankers',
+        'treatment': [
+            'Remove infected branches and fruit',
+            'Prune to improve air circulation',
+            'Apply copper fungicide',
+            'Burn or destroy infected plant material'
+        ],
+        'prevention': [
+            'Plant resistant varieties',
+            'Maintain proper sanitation',
+            'Avoid injury to trees'
+        ]
+    },
+    'Cedar_apple_rust': {
+        'severity': 'Medium',
+        'description': 'Rust infection causing yellow/orange lesions',
+        'treatment': [
+            'Apply sulfur or copper fungicide',
+            'Remove rust-infected cedar trees nearby',
+            'Improve tree ventilation',
+            'Remove galls from cedar trees'
+        ],
+        'prevention': [
+            'Keep distance from cedar trees',
+            'Use resistant apple varieties',
+            'Regular inspections'
+        ]
+    },
+    'Powdery_mildew': {
+        'severity': 'Medium',
+        'description': 'White powdery coating on leaves indicating fungal infection',
+        'treatment': [
+            'Apply sulfur dust or spray',
+            'Use potassium bicarbonate fungicide',
+            'Remove heavily infected leaves',
+            'Improve air circulation'
+        ],
+        'prevention': [
+            'Maintain proper spacing',
+            'Avoid high nitrogen fertilization',
+            'Regular monitoring'
+        ]
+    },
+    'Early_blight': {
+        'severity': 'High',
+        'description': 'Fungal disease causing brown concentric lesions on leaves',
+        'treatment': [
+            'Remove infected leaves promptly',
+            'Apply copper or chlorothalonil fungicide',
+            'Stake plants for better air circulation',
+            'Water at soil level, not foliage'
+        ],
+        'prevention': [
+            'Use resistant varieties',
+            'Mulch to prevent soil splash',
+            'Rotate crops annually'
+        ]
+    },
+    'Late_blight': {
+        'severity': 'Very High',
+        'description': 'Serious fungal disease causing water-soaked lesions',
+        'treatment': [
+            'Remove infected leaves and fruits immediately',
+            'Apply metalaxyl-based fungicide',
+            'Improve drainage',
+            'Ensure proper plant spacing'
+        ],
+        'prevention': [
+            'Plant resistant varieties',
+            'Use certified disease-free seeds',
+            'Scout for disease regularly',
+            'Avoid overhead watering'
+        ]
+    },
+    'healthy': {
+        'severity': 'None',
+        'description': 'No disease detected - plant appears healthy',
+        'treatment': [
+            'Continue regular monitoring',
+            'Maintain proper watering schedule',
+            'Ensure adequate sunlight',
+            'Regular pest inspection'
+        ],
+        'prevention': [
+            'Maintain good garden hygiene',
+            'Provide proper nutrition',
+            'Monitor for early symptoms of disease'
+        ]
+    }
+}
+
+# Returned for diseases without an entry in TREATMENT_GUIDE
+UNKNOWN_TREATMENT = {
+    'severity': 'Unknown',
+    'description': 'Disease detected - no specific treatment guide is available yet',
+    'treatment': [
+        'Isolate affected plants to limit spread',
+        'Remove and destroy badly infected leaves',
+        'Consult a local agricultural extension service'
+    ],
+    'prevention': [
+        'Inspect plants regularly',
+        'Practice crop rotation and good sanitation'
+    ]
+}
+
+
+def dumps(obj):
+    """Compact JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def read_class_names(path):
+    """
+    The class list in a CLASS_NAMES_FILE, in model output order.
+
+    Raises:
+        ValueError: The file is not a JSON list of class names
+    """
+    with open(path) as f:
+        classes = json.load(f)
+    if not isinstance(classes, list) or not all(isinstance(name, str) for name in classes):
+        raise ValueError(f"{path} must hold a JSON list of class names")
+    return classes
+
+
+class ClassRegistry:
+    """
+    Per-class-id response metadata and pre-encoded JSON fragments.
+
+    Diseases are matched to TREATMENT_GUIDE case-insensitively; classes
+    without a guide get UNKNOWN_TREATMENT and are listed in `missing_treatment`.
+    """
+
+    def __init__(self, classes, treatment_guide):
+        guide = {key.lower(): info for key, info in treatment_guide.items()}
+        self.classes = list(classes)
+        self.entries = []
+        self.missing_treatment = []
+        self._heads = []
+        self._tails = []
+        for class_name in self.classes:
+            crop, disease = class_name.split('___')
+            info = guide.get(disease.lower())
+            if info is None:
+                info = UNKNOWN_TREATMENT
+                self.missing_treatment.append(class_name)
+            entry = {
+                'crop': crop,
+                'disease': disease,
+                'severity': info.get('severity', 'Unknown'),
+                'description': info.get('description', ''),
+                'treatment': list(info.get('treatment', [])),
+                'prevention': list(info.get('prevention', []))
+            }
+            self.entries.append(entry)
+
+            # Everything but the two confidence fields is encoded once, here
+            static = dumps({key: entry[key] for key in ('severity', 'description', 'treatment', 'prevention')})
+            self._heads.append(
+                b'"success":true,"crop":' + dumps(crop) + b',"disease":' + dumps(disease) + b',"confidence":"'
+            )
+            self._tails.append(b',' + static[1:])
+
+    def __len__(self):
+        return len(self.classes)
+
+    def response(self, class_id, confidence):
+        """
+        The prediction response as a dict.
+
+        The treatment and prevention lists are shared between calls and
+        must not be modified.
+        """
+        entry = self.entries[class_id]
+        return {
+            'success': True,
+            'crop': entry['crop'],
+            'disease': entry['disease'],
+            'confidence': f"{float(confidence):.2f}%",
+            'confidence_value': float(confidence),
+            'severity': entry['severity'],
+            'description': entry['description'],
+            'treatment': entry['treatment'],
+            'prevention': entry['prevention']
+        }
+
+    def response_json(self, class_id, confidence, filename=None):
+        """The same response as JSON bytes (with a leading "filename" key for batch results)."""
+        confidence = float(confidence)
+        prefix = (b'{"filename":' + dumps(filename) + b',') if filename is not None else b'{'
+        return b''.join((
+            prefix, self._heads[class_id],
+            b'%.2f%%","confidence_value":' % confidence, repr(confidence).encode('ascii'),
+            self._tails[class_id]
+        ))
+
+
+CLASS_REGISTRY = ClassRegistry(DISEASE_CLASSES, TREATMENT_GUIDE)
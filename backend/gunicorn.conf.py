@@ -0,0 +1,100 @@
+"""
+Gunicorn configuration for the AI Crop Disease Detector API.
+
+Each worker loads and warms up its own copy of the model right after it
+boots, before it accepts traffic, so the first user request sees
+steady-state latency. TensorFlow is never initialized in the master
+process, which keeps forking safe.
+
+With SERVING_MODE=model_host the master instead starts one shared model
+host process (model_host.py) and workers only connect to it. Set
+MODEL_HOST_SPAWN=false when the host runs elsewhere (e.g. a sidecar).
+The master generates a random MODEL_HOST_AUTHKEY for a host it spawns;
+a separately run host and the workers must share one set explicitly.
+
+For the ASGI app (asgi.py) use uvicorn workers:
+    gunicorn -k uvicorn.workers.UvicornWorker -c gunicorn.conf.py asgi:app
+
+Unless INFERENCE_THREADS is set, each worker's inference runtime gets an
+equal share of the CPU cores so workers do not oversubscribe them.
+
+Workers write their metrics to METRICS_DIR (a fresh temporary directory
+unless set), so /metrics on any worker reports the whole server.
+"""
+
+import glob
+import os
+import secrets
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from gunicorn.arbiter import Arbiter
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+threads = int(os.environ.get('WORKER_THREADS', 8))  # lets concurrent requests share a batch
+timeout = 120
+
+SERVING_MODE = os.environ.get('SERVING_MODE', 'in_process').lower()
+MODEL_HOST_SPAWN = os.environ.get('MODEL_HOST_SPAWN', 'true').lower() == 'true'
+
+_model_host = None
+_metrics_tmpdir = None
+
+
+def on_starting(server):
+    """Prepare the shared metrics directory; start the model host before any worker is forked."""
+    global _model_host, _metrics_tmpdir
+    if os.environ.get('METRICS_DIR'):
+        # Counters restart with the server
+        os.makedirs(os.environ['METRICS_DIR'], exist_ok=True)
+        for path in glob.glob(os.path.join(os.environ['METRICS_DIR'], '*.json')):
+            os.remove(path)
+    else:
+        _metrics_tmpdir = os.environ['METRICS_DIR'] = tempfile.mkdtemp(prefix='crop-metrics-')
+
+    if SERVING_MODE == 'model_host' and MODEL_HOST_SPAWN:
+        # Inherited by the host and every worker forked after this
+        os.environ.setdefault('MODEL_HOST_AUTHKEY', secrets.token_hex(32))
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model_host.py')
+        _model_host = subprocess.Popen([sys.executable, script])
+        server.log.info("Started model host (pid %s)", _model_host.pid)
+
+
+def post_fork(server, worker):
+    """Give each worker an equal share of cores before the app is imported."""
+    if not os.environ.get('INFERENCE_THREADS'):
+        os.environ['INFERENCE_THREADS'] = str(max(1, (os.cpu_count() or 1) // server.cfg.workers))
+
+
+def post_worker_init(worker):
+    """
+    Load the model eagerly in every worker once the app is imported.
+
+    A worker that cannot load it stops gunicorn with a boot error instead of
+    serving forever unready, unless a model registry is configured: then it
+    stays up and becomes ready when a version is activated.
+    """
+    # ASGI workers (uvicorn) load it from the app's lifespan handler instead
+    if 'uvicorn' in worker.cfg.worker_class_str.lower():
+        return
+
+    import app
+    if app.init_model():
+        return
+    if app.model_registry is not None:
+        worker.log.warning("Worker %s has no model yet; waiting for a model registry version", worker.pid)
+        return
+    worker.log.error("Worker %s could not load the model (see the log above); shutting down", worker.pid)
+    sys.exit(Arbiter.WORKER_BOOT_ERROR)
+
+
+def on_exit(server):
+    """Stop the shared model host with the master."""
+    if _model_host is not None:
+        _model_host.terminate()
+        _model_host.wait(timeout=10)
+    if _metrics_tmpdir is not None:
+        shutil.rmtree(_metrics_tmpdir, ignore_errors=True)
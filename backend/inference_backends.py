@@ -0,0 +1,359 @@
+"""
+AI Crop Disease Detector - Inference Backends
+=============================================
+Interchangeable runtimes that turn a preprocessed (N, H, W, 3) float32
+batch with pixels in [0, 255] into (N, num_classes) probabilities.
+
+Backends:
+- keras: full TensorFlow/Keras model (`crop_model.h5`)
+- tflite_fp16: TensorFlow Lite, float16 weights (`crop_model_fp16.tflite`)
+- tflite_int8: TensorFlow Lite, full-integer quantized (`crop_model_int8.tflite`)
+- onnx: ONNX Runtime on CPU (`crop_model.onnx`)
+
+CascadeBackend chains two of them: a small low-resolution model answers
+confident images and only the rest reach the full model.
+
+The framework is imported only when a backend is created, so selecting a
+TFLite backend with `tflite-runtime` installed, or the ONNX backend, never
+imports TensorFlow.
+"""
+
+import hashlib
+import os
+import threading
+import time
+
+import numpy as np
+
+from metrics import Histogram
+from prediction_cache import model_fingerprint
+
+MODEL_DIR = os.environ.get(
+    'MODEL_DIR', os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'model'))
+)
+
+# Default artifact for each backend
+BACKEND_ARTIFACTS = {
+    'keras': os.path.join(MODEL_DIR, 'crop_model.h5'),
+    'tflite_fp16': os.path.join(MODEL_DIR, 'crop_model_fp16.tflite'),
+    'tflite_int8': os.path.join(MODEL_DIR, 'crop_model_int8.tflite'),
+    'onnx': os.path.join(MODEL_DIR, 'crop_model.onnx'),
+}
+
+# Batch sizes the Keras backend pads inputs up to (see KerasBackend)
+KERAS_BATCH_BUCKETS = (1, 2, 4, 8, 16, 32)
+
+# Cascade first-stage artifact for each backend (train_model.py --cascade-first-stage)
+CASCADE_ARTIFACTS = {
+    'keras': os.path.join(MODEL_DIR, 'crop_model_small.h5'),
+    'onnx': os.path.join(MODEL_DIR, 'crop_model_small.onnx'),
+}
+
+# Histogram bounds for cascade stage latency (milliseconds per forward pass)
+CASCADE_LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+class InferenceBackend:
+    """
+    Base class for inference runtimes.
+
+    Subclasses set `img_size` and `num_classes` when loading and implement
+    `predict`. `version` fingerprints the artifact for cache invalidation.
+    """
+
+    name = None
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+        self.version = model_fingerprint(model_path)
+        self.img_size = None
+        self.num_classes = None
+
+    def predict(self, batch):
+        raise NotImplementedError
+
+
+class KerasBackend(InferenceBackend):
+    """
+    Full Keras model served through TensorFlow.
+
+    The forward pass is traced once into a concrete function with a fixed
+    (None, H, W, 3) float32 signature and called directly, skipping the
+    data adapter and predict loop `model.predict` sets up on every call.
+
+    Batches are zero-padded up to the next of `batch_buckets` (larger ones
+    are split), so only a few input shapes ever reach TensorFlow: oneDNN
+    primitives and, with `jit_compile`, XLA executables are built once per
+    bucket instead of once per batch size. Pass an empty tuple to disable.
+    """
+
+    name = 'keras'
+
+    def __init__(self, model_path, num_threads=None, inter_op_threads=None, jit_compile=False,
+                 batch_buckets=KERAS_BATCH_BUCKETS):
+        super().__init__(model_path)
+        import tensorflow as tf
+        from tensorflow import keras
+
+        # Thread pools can only be sized before the TF runtime starts
+        try:
+            if num_threads:
+                tf.config.threading.set_intra_op_parallelism_threads(num_threads)
+            if inter_op_threads:
+                tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+        except RuntimeError:
+            print("⚠️  TensorFlow already initialized; thread settings ignored")
+
+        self.model = keras.models.load_model(model_path)
+        self.img_size = self.model.input_shape[1]
+        self.num_classes = self.model.output_shape[-1]
+
+        self.batch_buckets = tuple(sorted(set(batch_buckets)))
+        self._serve = tf.function(
+            lambda images: self.model(images, training=False),
+            input_signature=[tf.TensorSpec([None, self.img_size, self.img_size, 3], tf.float32)],
+            jit_compile=jit_compile
+        ).get_concrete_function()
+        self._to_tensor = tf.convert_to_tensor
+
+    def predict(self, batch):
+        count = len(batch)
+        if not self.batch_buckets:
+            return self._serve(self._to_tensor(batch, dtype='float32')).numpy()
+
+        largest = self.batch_buckets[-1]
+        if count > largest:
+            return np.concatenate([self.predict(batch[start:start + largest]) for start in range(0, count, largest)])
+
+        bucket = next(size for size in self.batch_buckets if size >= count)
+        if bucket > count:
+            padded = np.zeros((bucket,) + batch.shape[1:], dtype=np.float32)
+            padded[:count] = batch
+            batch = padded
+        return self._serve(self._to_tensor(batch, dtype='float32')).numpy()[:count]
+
+
+def _load_tflite_interpreter(model_path, num_threads):
+    """Prefer the standalone TFLite runtimes over full TensorFlow."""
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+    return Interpreter(model_path=model_path, num_threads=num_threads)
+
+
+class TFLiteBackend(InferenceBackend):
+    """
+    TensorFlow Lite interpreter (float16 or int8 quantized artifacts).
+
+    The interpreter is resized to the incoming batch size on demand and is
+    not thread-safe, so calls are serialized.
+    """
+
+    def __init__(self, model_path, num_threads=None):
+        super().__init__(model_path)
+        self.interpreter = _load_tflite_interpreter(model_path, num_threads)
+        self.interpreter.allocate_tensors()
+
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self.img_size = int(self._input['shape'][1])
+        self.num_classes = int(self._output['shape'][-1])
+        self.name = 'tflite_int8' if self._input['dtype'] != np.float32 else 'tflite_fp16'
+
+        self._batch_size = int(self._input['shape'][0])
+        self._lock = threading.Lock()
+
+    def _quantize(self, batch):
+        """Map float pixels onto a quantized input tensor."""
+        dtype = self._input['dtype']
+        if dtype == np.float32:
+            return batch
+        scale, zero_point = self._input['quantization']
+        info = np.iinfo(dtype)
+        return np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(dtype)
+
+    def _dequantize(self, outputs):
+        scale, zero_point = self._output['quantization']
+        if self._output['dtype'] == np.float32 or scale == 0:
+            return outputs.astype(np.float32, copy=False)
+        return (outputs.astype(np.float32) - zero_point) * scale
+
+    def predict(self, batch):
+        with self._lock:
+            if len(batch) != self._batch_size:
+                self.interpreter.resize_tensor_input(
+                    self._input['index'], [len(batch), self.img_size, self.img_size, 3]
+                )
+                self.interpreter.allocate_tensors()
+                self._batch_size = len(batch)
+
+            self.interpreter.set_tensor(self._input['index'], self._quantize(batch))
+            self.interpreter.invoke()
+            return self._dequantize(self.interpreter.get_tensor(self._output['index']))
+
+
+class OnnxBackend(InferenceBackend):
+    """
+    ONNX Runtime CPU session.
+
+    `num_threads` sizes the intra-op pool (threads per operator) and
+    `inter_op_threads` the pool for independent graph branches; size them
+    so that workers x threads does not exceed the machine's cores.
+    """
+
+    name = 'onnx'
+
+    def __init__(self, model_path, num_threads=None, inter_op_threads=None):
+        super().__init__(model_path)
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        if inter_op_threads:
+            options.inter_op_num_threads = inter_op_threads
+            options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=['CPUExecutionProvider'])
+        model_input = self.session.get_inputs()[0]
+        self._input_name = model_input.name
+        self.img_size = int(model_input.shape[1])
+        self.num_classes = int(self.session.get_outputs()[0].shape[-1])
+
+    def predict(self, batch):
+        return self.session.run(None, {self._input_name: batch})[0]
+
+
+class CascadeBackend(InferenceBackend):
+    """
+    Two-stage cascade over two loaded backends.
+
+    `first` (a small, low-resolution model that takes the same input size)
+    runs on every image; images whose top probability is below `threshold`
+    are escalated to `second`, the full model, and take its output instead.
+    Pick the threshold with benchmarks/calibrate_cascade.py.
+
+    Escalation counts and per-stage latency are reported by `stats`.
+    """
+
+    name = 'cascade'
+
+    def __init__(self, first, second, threshold):
+        if (first.img_size, first.num_classes) != (second.img_size, second.num_classes):
+            raise ValueError(
+                f"Cascade stages disagree: first stage takes {first.img_size}px and returns {first.num_classes} "
+                f"classes, full model {second.img_size}px and {second.num_classes} classes"
+            )
+        self.first = first
+        self.second = second
+        self.threshold = threshold
+        self.model_path = second.model_path
+        self.version = hashlib.sha256(f'{first.version}:{second.version}:{threshold}'.encode()).hexdigest()[:16]
+        self.img_size = second.img_size
+        self.num_classes = second.num_classes
+        self.batch_buckets = getattr(first, 'batch_buckets', ())
+
+        self.images = 0
+        self.escalated = 0
+        self.first_stage_histogram = Histogram(CASCADE_LATENCY_BUCKETS_MS)
+        self.second_stage_histogram = Histogram(CASCADE_LATENCY_BUCKETS_MS)
+        self._lock = threading.Lock()
+
+    @property
+    def stages(self):
+        return (self.first, self.second)
+
+    def predict(self, batch):
+        start = time.perf_counter()
+        probabilities = self.first.predict(batch)
+        self.first_stage_histogram.observe((time.perf_counter() - start) * 1000.0)
+
+        uncertain = np.flatnonzero(probabilities.max(axis=1) < self.threshold)
+        if len(uncertain):
+            start = time.perf_counter()
+            probabilities = np.array(probabilities, dtype=np.float32)
+            probabilities[uncertain] = self.second.predict(batch[uncertain])
+            self.second_stage_histogram.observe((time.perf_counter() - start) * 1000.0)
+
+        with self._lock:
+            self.images += len(batch)
+            self.escalated += len(uncertain)
+        return probabilities
+
+    def stats(self):
+        """Escalation counts and per-stage latency per forward pass (ms)."""
+        first_stage = self.first_stage_histogram.snapshot()
+        second_stage = self.second_stage_histogram.snapshot()
+        return {
+            'threshold': self.threshold,
+            'images': self.images,
+            'escalated': self.escalated,
+            'escalation_rate': self.escalated / self.images if self.images else 0.0,
+            'first_stage_mean_ms': first_stage['sum'] / first_stage['count'] if first_stage['count'] else 0.0,
+            'second_stage_mean_ms': second_stage['sum'] / second_stage['count'] if second_stage['count'] else 0.0,
+            'first_stage_ms': first_stage,
+            'second_stage_ms': second_stage
+        }
+
+
+def create_backend(name, model_path=None, num_threads=None, inter_op_threads=None, jit_compile=False,
+                   batch_buckets=KERAS_BATCH_BUCKETS):
+    """
+    Create an inference backend by name.
+
+    Args:
+        name: One of BACKEND_ARTIFACTS
+        model_path: Artifact path (defaults to the backend's standard artifact)
+        num_threads: CPU (intra-op) threads for the runtime
+        inter_op_threads: Inter-op threads (Keras and ONNX only)
+        jit_compile: XLA-compile the forward pass (Keras only)
+        batch_buckets: Batch sizes inputs are padded up to (Keras only)
+
+    Raises:
+        ValueError: Unknown backend name
+        FileNotFoundError: Artifact does not exist
+    """
+    if name not in BACKEND_ARTIFACTS:
+        raise ValueError(f"Unknown inference backend '{name}'. Choose from: {', '.join(BACKEND_ARTIFACTS)}")
+
+    model_path = model_path or BACKEND_ARTIFACTS[name]
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model file not found at {model_path}")
+
+    if name == 'keras':
+        return KerasBackend(
+            model_path, num_threads=num_threads, inter_op_threads=inter_op_threads,
+            jit_compile=jit_compile, batch_buckets=batch_buckets
+        )
+    if name == 'onnx':
+        return OnnxBackend(model_path, num_threads=num_threads, inter_op_threads=inter_op_threads)
+    return TFLiteBackend(model_path, num_threads=num_threads)
+
+
+def create_cascade(name, model_path=None, first_stage_path=None, threshold=0.9, **options):
+    """
+    Create a CascadeBackend with both stages on the same runtime.
+
+    Args:
+        name: One of CASCADE_ARTIFACTS
+        model_path: Full model artifact (defaults to the backend's standard artifact)
+        first_stage_path: First-stage artifact (defaults to CASCADE_ARTIFACTS[name])
+        threshold: Top probability at or above which the first stage answers
+        **options: Passed to create_backend for both stages
+
+    Raises:
+        ValueError: Backend without cascade support
+        FileNotFoundError: Artifact does not exist
+    """
+    if name not in CASCADE_ARTIFACTS:
+        raise ValueError(f"Cascade inference supports: {', '.join(CASCADE_ARTIFACTS)} (got '{name}')")
+
+    second = create_backend(name, model_path, **options)
+    first = create_backend(name, first_stage_path or CASCADE_ARTIFACTS[name], **options)
+    return CascadeBackend(first, second, threshold)
@@ -0,0 +1,355 @@
+"""
+AI Crop Disease Detector - Metrics Primitives
+==============================================
+Small, dependency-free metric types shared by the serving subsystems,
+and a registry that exposes them to Prometheus (GET /metrics).
+"""
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class Histogram:
+    """
+    Thread-safe cumulative histogram with fixed upper bucket bounds.
+
+    Bucket counts are cumulative (Prometheus style): the count for a bound
+    includes every observation less than or equal to it.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * len(self.buckets)
+        self._count = 0
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """Record a single observation."""
+        with self._lock:
+            self._count += 1
+            self._sum += value
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self._counts[i] += 1
+
+    def snapshot(self):
+        """Return a JSON-serializable copy of the current state."""
+        with self._lock:
+            return {
+                'buckets': {str(bound): count for bound, count in zip(self.buckets, self._counts)},
+                'count': self._count,
+                'sum': self._sum
+            }
+
+
+# Counters and histograms of exited processes, folded together (see MetricsRegistry)
+RETIRED_FILE = 'retired.json'
+
+# Default bounds for latencies in seconds
+LATENCY_BUCKETS_SECONDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def scale_histogram(snapshot, factor):
+    """Rescale a histogram snapshot's bounds and sum, e.g. milliseconds to seconds."""
+    return {
+        'buckets': {str(float(bound) * factor): count for bound, count in snapshot['buckets'].items()},
+        'count': snapshot['count'],
+        'sum': snapshot['sum'] * factor
+    }
+
+
+def process_rss_bytes():
+    """Resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class MetricsRegistry:
+    """
+    Labelled counters, gauges and histograms for one process, with
+    Prometheus text rendering and multi-process aggregation.
+
+    Metrics are declared once with `counter`, `gauge` or `histogram` and
+    updated by name with keyword labels. Collectors are called on every
+    snapshot to report state owned elsewhere (cache or batcher stats).
+
+    With `directory` set, each process writes its snapshot to its own file
+    there every `flush_interval` seconds and at exit; `render` merges the
+    files of all processes (e.g. gunicorn workers), so any worker can
+    answer a scrape for the whole server. Counters and histograms are
+    summed, including those of exited workers; gauges are reported per
+    live process with a `pid` label.
+
+    When a scrape finds an exited process's file, its counters and
+    histograms are folded into RETIRED_FILE and the file is deleted, so the
+    directory does not grow as workers are recycled. The folded file names
+    are recorded with the totals, so a file is never counted twice.
+    """
+
+    def __init__(self, directory=None, flush_interval=1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._definitions = {}
+        self._values = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+        self._flusher = None
+        self._file = None
+
+    # -- Declaration and updates ------------------------------------------
+    def counter(self, name, help):
+        self._definitions[name] = ('counter', help, None)
+
+    def gauge(self, name, help):
+        self._definitions[name] = ('gauge', help, None)
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS_SECONDS):
+        self._definitions[name] = ('histogram', help, tuple(buckets))
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] = value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._values.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._values.setdefault(key, Histogram(self._definitions[name][2]))
+        histogram.observe(value)
+
+    @contextmanager
+    def time(self, name, **labels):
+        """Observe the duration of the block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def add_collector(self, key, collect):
+        """
+        Register `collect()` under `key` (replacing any previous one). It
+        returns (name, labels, value) samples; histogram values are
+        `Histogram.snapshot()` dicts.
+        """
+        self._collectors[key] = collect
+
+    # -- Snapshots ---------------------------------------------------------
+    def snapshot(self):
+        """JSON-serializable samples of this process: [[name, labels, value], ...]."""
+        with self._lock:
+            items = list(self._values.items())
+        samples = [
+            [name, dict(labels), value.snapshot() if isinstance(value, Histogram) else value]
+            for (name, labels), value in items
+        ]
+        for collect in list(self._collectors.values()):
+            try:
+                samples.extend([name, labels, value] for name, labels, value in collect())
+            except Exception as e:
+                print(f"⚠️  Metrics collector failed: {e}")
+        return {'pid': os.getpid(), 'samples': samples}
+
+    def start(self):
+        """Begin writing snapshots to `directory` (no-op without one)."""
+        if not self.directory or self._flusher is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        # Unique per process start, so a reused pid never overwrites an exited worker's counts
+        self._file = os.path.join(self.directory, f'{os.getpid()}-{time.time_ns()}.json')
+        self._flusher = threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+
+    def flush(self):
+        if self._file is None:
+            return
+        temp_path = f'{self._file}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(temp_path, self._file)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"⚠️  Metrics flush failed: {e}")
+
+    def _snapshots(self):
+        """
+        This process's live snapshot, the last snapshot of every other
+        process and the retired totals of exited ones.
+        """
+        snapshots = [self.snapshot()]
+        if self._file is None:
+            return snapshots
+        # Read the totals before listing: a file folded meanwhile is then
+        # counted from its snapshot, never from both
+        retired = self._read_retired()
+        folded = set(retired['folded'])
+        exited = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if not name.endswith('.json') or path == self._file or name == RETIRED_FILE:
+                continue
+            if name in folded:
+                # Already counted in the totals; only the delete is left
+                exited.append(name)
+                continue
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            snapshots.append(snapshot)
+            if not _pid_alive(snapshot['pid']):
+                exited.append(name)
+        if retired['samples']:
+            snapshots.append(retired)
+        if exited and fcntl is not None:
+            try:
+                self._retire(exited)
+            except OSError as e:
+                print(f"⚠️  Retiring exited workers' metrics failed: {e}")
+        return snapshots
+
+    def _read_retired(self):
+        try:
+            with open(os.path.join(self.directory, RETIRED_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'pid': None, 'samples': [], 'folded': []}
+
+    def _retire(self, names):
+        """Fold exited processes' counters and histograms into RETIRED_FILE, then delete their files."""
+        with open(os.path.join(self.directory, f'.{RETIRED_FILE}.lock'), 'a') as lock:
+            # Workers scrape concurrently; one folds at a time
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            retired = self._read_retired()
+            totals = {(name, tuple(sorted(labels.items()))): value for name, labels, value in retired['samples']}
+            # Names whose files are gone can no longer be double-counted
+            folded = {name for name in retired['folded'] if os.path.exists(os.path.join(self.directory, name))}
+            for name in names:
+                if name in folded:
+                    continue
+                try:
+                    with open(os.path.join(self.directory, name)) as f:
+                        samples = json.load(f)['samples']
+                except FileNotFoundError:
+                    continue
+                except ValueError:
+                    samples = []
+                for sample_name, labels, value in samples:
+                    kind = self._definitions.get(sample_name, ('gauge', None, None))[0]
+                    key = (sample_name, tuple(sorted(labels.items())))
+                    if kind == 'histogram':
+                        totals[key] = _merge_histograms(totals.get(key), value)
+                    elif kind == 'counter':
+                        totals[key] = totals.get(key, 0) + value
+                folded.add(name)
+
+            retired = {
+                'pid': None,
+                'samples': [[name, dict(labels), value] for (name, labels), value in totals.items()],
+                'folded': sorted(folded)
+            }
+            path = os.path.join(self.directory, RETIRED_FILE)
+            with open(f'{path}.tmp', 'w') as f:
+                json.dump(retired, f)
+            os.replace(f'{path}.tmp', path)
+            for name in folded:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+
+    # -- Rendering ---------------------------------------------------------
+    def render(self):
+        """All processes' metrics in the Prometheus text exposition format."""
+        merged = {}
+        for snapshot in self._snapshots():
+            alive = snapshot['pid'] is not None and (snapshot['pid'] == os.getpid() or _pid_alive(snapshot['pid']))
+            for name, labels, value in snapshot['samples']:
+                kind = self._definitions.get(name, ('gauge', None, None))[0]
+                if kind == 'gauge':
+                    if not alive:
+                        continue
+                    labels = {**labels, 'pid': snapshot['pid']}
+                key = (name, tuple(sorted(labels.items())))
+                if kind == 'histogram':
+                    merged[key] = _merge_histograms(merged.get(key), value)
+                else:
+                    merged[key] = merged.get(key, 0) + value
+
+        lines = []
+        for name in sorted({name for name, _ in merged}):
+            kind, help, _ = self._definitions.get(name, ('gauge', name, None))
+            lines.append(f'# HELP {name} {help}')
+            lines.append(f'# TYPE {name} {kind}')
+            for (sample_name, labels), value in sorted(merged.items(), key=lambda item: str(item[0])):
+                if sample_name != name:
+                    continue
+                if kind == 'histogram':
+                    for bound, count in sorted(value['buckets'].items(), key=lambda item: float(item[0])):
+                        lines.append(f'{name}_bucket{_format_labels(labels + (("le", bound),))} {count}')
+                    lines.append(f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {value["count"]}')
+                    lines.append(f'{name}_sum{_format_labels(labels)} {value["sum"]}')
+                    lines.append(f'{name}_count{_format_labels(labels)} {value["count"]}')
+                else:
+                    lines.append(f'{name}{_format_labels(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _merge_histograms(total, snapshot):
+    if total is None:
+        return {'buckets': dict(snapshot['buckets']), 'count': snapshot['count'], 'sum': snapshot['sum']}
+    for bound, count in snapshot['buckets'].items():
+        total['buckets'][bound] = total['buckets'].get(bound, 0) + count
+    total['count'] += snapshot['count']
+    total['sum'] += snapshot['sum']
+    return total
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{' + pairs + '}'
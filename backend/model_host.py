@@ -0,0 +1,279 @@
+"""
+AI Crop Disease Detector - Shared Model Host
+============================================
+Runs the model in one dedicated process that serves every web worker.
+
+Web workers connect over a Unix socket and exchange tensors through a
+shared-memory block per connection, so they never import TensorFlow or
+hold a copy of the weights. Requests from all workers are merged by a
+MicroBatcher inside the host.
+
+Protocol (per connection):
+1. Host sends (img_size, num_classes, model_version)
+2. Client creates a SharedMemory block of `capacity` input images followed
+   by `capacity` output rows and sends (shm_name, capacity)
+3. For each request the client writes N images and sends N; the host
+   writes N output rows and replies None, or an error message
+
+Connections are authenticated with the secret in MODEL_HOST_AUTHKEY.
+gunicorn.conf.py generates a fresh one whenever it spawns the host; set
+it yourself for a host started on its own.
+
+Run standalone:
+    MODEL_HOST_AUTHKEY=<secret> python model_host.py [--backend keras] [--model PATH] [--address /tmp/crop-model-host.sock]
+"""
+
+import argparse
+import os
+import queue
+import threading
+import time
+from multiprocessing import AuthenticationError, resource_tracker
+from multiprocessing.connection import Client, Listener
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from batching import MicroBatcher
+from inference_backends import create_backend, create_cascade
+
+DEFAULT_ADDRESS = os.environ.get('MODEL_HOST_ADDRESS', '/tmp/crop-model-host.sock')
+
+
+def authkey_from_env():
+    """The shared secret for host connections, from MODEL_HOST_AUTHKEY."""
+    authkey = os.environ.get('MODEL_HOST_AUTHKEY')
+    if not authkey:
+        raise RuntimeError('MODEL_HOST_AUTHKEY is not set; the model host and its clients need a shared secret')
+    return authkey.encode()
+
+
+def _tensor_views(buf, capacity, img_size, num_classes):
+    """Map the input and output arrays onto a shared-memory buffer."""
+    inputs = np.ndarray((capacity, img_size, img_size, 3), dtype=np.float32, buffer=buf)
+    outputs = np.ndarray((capacity, num_classes), dtype=np.float32, buffer=buf, offset=inputs.nbytes)
+    return inputs, outputs
+
+
+def _shared_memory_size(capacity, img_size, num_classes):
+    return capacity * (img_size * img_size * 3 + num_classes) * np.dtype(np.float32).itemsize
+
+
+# =====================================================
+# Host
+# =====================================================
+class ModelHost:
+    """Owns the model and answers inference requests from web workers."""
+
+    def __init__(self, backend_name, model_path=None, address=DEFAULT_ADDRESS, authkey=None,
+                 max_batch_size=16, max_wait_ms=5.0, cascade_threshold=None, cascade_model_path=None):
+        self.backend_name = backend_name
+        self.model_path = model_path
+        self.cascade_threshold = cascade_threshold
+        self.cascade_model_path = cascade_model_path
+        self.address = address
+        self.authkey = authkey or authkey_from_env()
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+
+    def load(self):
+        """Load the model and start the cross-worker batcher."""
+        if self.cascade_threshold is not None:
+            print(f"Model host loading {self.backend_name} cascade (threshold {self.cascade_threshold})...")
+            self.model = create_cascade(
+                self.backend_name, self.model_path, self.cascade_model_path, self.cascade_threshold
+            )
+        else:
+            print(f"Model host loading {self.backend_name} model...")
+            self.model = create_backend(self.backend_name, self.model_path)
+        self.img_size = self.model.img_size
+        self.num_classes = self.model.num_classes
+        self.model_version = self.model.version
+        self.batcher = MicroBatcher(
+            self.model.predict,
+            max_batch_size=self.max_batch_size,
+            max_wait_ms=self.max_wait_ms
+        )
+
+        # Warm up before accepting connections (every padding bucket a batch can hit)
+        buckets = getattr(self.model, 'batch_buckets', ())
+        for batch_size in sorted({1, self.max_batch_size, *(size for size in buckets if size <= self.max_batch_size)}):
+            for stage in getattr(self.model, 'stages', (self.model,)):
+                stage.predict(np.zeros((batch_size, self.img_size, self.img_size, 3), dtype=np.float32))
+        self.batcher.predict(np.zeros((1, self.img_size, self.img_size, 3), dtype=np.float32))
+        print("✓ Model host ready")
+
+    def serve_forever(self):
+        """Accept worker connections, one handler thread per connection."""
+        if os.path.exists(self.address):
+            os.remove(self.address)
+
+        with Listener(self.address, family='AF_UNIX', authkey=self.authkey) as listener:
+            print(f"✓ Model host listening on {self.address}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except (AuthenticationError, EOFError, OSError) as e:
+                    print(f"⚠️ Rejected model host connection: {e}")
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        shm = None
+        try:
+            conn.send((self.img_size, self.num_classes, self.model_version))
+            shm_name, capacity = conn.recv()
+
+            # The client owns the block; stop our resource tracker unlinking it
+            shm = SharedMemory(name=shm_name)
+            resource_tracker.unregister(shm._name, 'shared_memory')
+            inputs, outputs = _tensor_views(shm.buf, capacity, self.img_size, self.num_classes)
+
+            while True:
+                count = conn.recv()
+                if not isinstance(count, int) or not 0 <= count <= capacity:
+                    conn.send(f'Invalid request of {count!r} images (channel capacity {capacity})')
+                    continue
+                try:
+                    outputs[:count] = self.batcher.predict(inputs[:count])
+                    conn.send(None)
+                except Exception as e:
+                    conn.send(f'Inference failed: {str(e)}')
+        except (EOFError, OSError):
+            pass
+        finally:
+            # Drop array views before closing the mapping
+            inputs = outputs = None
+            if shm is not None:
+                shm.close()
+            conn.close()
+
+
+# =====================================================
+# Client
+# =====================================================
+class _Channel:
+    """One connection to the host with its own shared-memory block."""
+
+    def __init__(self, address, authkey, capacity):
+        self.conn = Client(address, family='AF_UNIX', authkey=authkey)
+        self.img_size, self.num_classes, self.model_version = self.conn.recv()
+        self.capacity = capacity
+        self.broken = False
+        self.shm = SharedMemory(create=True, size=_shared_memory_size(capacity, self.img_size, self.num_classes))
+        self.inputs, self.outputs = _tensor_views(self.shm.buf, capacity, self.img_size, self.num_classes)
+        self.conn.send((self.shm.name, capacity))
+
+    def predict(self, img_array):
+        count = len(img_array)
+        self.inputs[:count] = img_array
+        # Out of step with the host until its reply arrives
+        self.broken = True
+        self.conn.send(count)
+        error = self.conn.recv()
+        self.broken = False
+        if error is not None:
+            raise RuntimeError(error)
+        return self.outputs[:count].copy()
+
+    def close(self):
+        self.inputs = self.outputs = None
+        self.conn.close()
+        self.shm.close()
+        self.shm.unlink()
+
+
+class ModelHostClient:
+    """
+    Web-worker side of the model host.
+
+    Keeps a pool of channels so each request thread has its own shared
+    buffer; channels are opened lazily and reused.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, authkey=None, capacity=16):
+        self.address = address
+        self.authkey = authkey or authkey_from_env()
+        self.capacity = capacity
+        self.model_version = None
+        self._idle = queue.LifoQueue()
+        self._channels = []
+        self._lock = threading.Lock()
+
+    def connect(self, timeout=60.0):
+        """Wait for the host to come up and open the first channel."""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                channel = self._open_channel()
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.5)
+        self.model_version = channel.model_version
+        self._idle.put(channel)
+
+    def _open_channel(self):
+        channel = _Channel(self.address, self.authkey, self.capacity)
+        with self._lock:
+            self._channels.append(channel)
+        return channel
+
+    def predict(self, img_array):
+        """Run inference in the host; large inputs are sent in chunks."""
+        try:
+            channel = self._idle.get_nowait()
+        except queue.Empty:
+            channel = self._open_channel()
+
+        try:
+            return np.concatenate([
+                channel.predict(img_array[start:start + self.capacity])
+                for start in range(0, len(img_array), self.capacity)
+            ], axis=0)
+        finally:
+            if channel.broken:
+                # Host went away mid-request: drop the channel instead of reusing it
+                with self._lock:
+                    self._channels.remove(channel)
+                channel.close()
+            else:
+                # Includes inference errors reported by the host; the channel is still in step
+                self._idle.put(channel)
+
+    def close(self):
+        with self._lock:
+            for channel in self._channels:
+                channel.close()
+            self._channels.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the shared model host process')
+    parser.add_argument('--backend', default=os.environ.get('INFERENCE_BACKEND', 'keras'))
+    parser.add_argument('--model', default=os.environ.get('MODEL_PATH'),
+                        help="Model artifact (defaults to the backend's standard artifact)")
+    parser.add_argument('--address', default=DEFAULT_ADDRESS)
+    parser.add_argument('--max-batch-size', type=int, default=int(os.environ.get('BATCH_MAX_SIZE', 16)))
+    parser.add_argument('--max-wait-ms', type=float, default=float(os.environ.get('BATCH_MAX_WAIT_MS', 5)))
+    parser.add_argument('--cascade', action='store_true',
+                        default=os.environ.get('CASCADE_ENABLED', 'false').lower() == 'true',
+                        help='Serve a two-stage cascade (small first-stage model, then the full model)')
+    parser.add_argument('--cascade-model', default=os.environ.get('CASCADE_MODEL_PATH'),
+                        help="First-stage artifact (defaults to the backend's standard one)")
+    parser.add_argument('--cascade-threshold', type=float, default=float(os.environ.get('CASCADE_THRESHOLD', 0.9)))
+    args = parser.parse_args()
+    if not os.environ.get('MODEL_HOST_AUTHKEY'):
+        parser.error('set MODEL_HOST_AUTHKEY to the secret shared with the web workers')
+
+    host = ModelHost(args.backend, args.model, address=args.address,
+                     max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms,
+                     cascade_threshold=args.cascade_threshold if args.cascade else None,
+                     cascade_model_path=args.cascade_model)
+    host.load()
+    host.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,386 @@
+"""
+AI Crop Disease Detector - Model Registry
+=========================================
+Versioned model artifacts that running workers switch between without a
+restart.
+
+Layout of MODEL_REGISTRY_DIR:
+    ACTIVE                      {"version": ..., "history": [...]}
+    versions/<version>/
+        manifest.json           trained classes, input size, checksums
+        crop_model.h5           any of the standard artifacts (see
+        crop_model.onnx         BACKEND_ARTIFACTS and CASCADE_ARTIFACTS)
+        ...
+
+A version is published by copying a model directory into a temporary
+directory and renaming it into place, so a half-copied version is never
+visible. The class list comes from the class_names.json that training
+writes next to the model (or --classes), never from this server's own
+list, so a model trained on another class set is refused at load time.
+
+Published versions are never modified. Activating a version or rolling
+back only rewrites ACTIVE (atomically); every worker's RegistryWatcher
+notices the change and hot-swaps its model (see app.swap_model).
+
+Usage:
+    python model_registry.py publish ../model [--version v2] [--activate]
+                                              [--classes class_names.json]
+    python model_registry.py list
+    python model_registry.py activate v2
+    python model_registry.py rollback
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+
+from class_registry import CLASS_NAMES_FILE, DISEASE_CLASSES, read_class_names
+from inference_backends import BACKEND_ARTIFACTS, CASCADE_ARTIFACTS, MODEL_DIR
+from preprocessing import IMG_SIZE
+
+ACTIVE_FILE = 'ACTIVE'
+MANIFEST_FILE = 'manifest.json'
+MANIFEST_FORMAT = 1
+VERSION_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$')
+
+# Activations remembered in ACTIVE for rollback
+HISTORY_LIMIT = 20
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class RegistryError(Exception):
+    """A registry version is missing, corrupt or incompatible with this server."""
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_class_names(path):
+    """
+    The trained class list from a class names file.
+
+    Raises:
+        RegistryError: Missing or malformed file
+    """
+    try:
+        return read_class_names(path)
+    except FileNotFoundError:
+        raise RegistryError(
+            f"No {os.path.basename(path)} at {path}; it is written next to the model by model/train_model.py "
+            "(or pass --classes with the class list the model was trained on)"
+        ) from None
+    except (OSError, ValueError) as e:
+        raise RegistryError(f"Unreadable class list {path}: {e}") from None
+
+
+def _artifact_files(artifacts):
+    """Backend name -> artifact file name, from a BACKEND_ARTIFACTS-style mapping."""
+    return {name: os.path.basename(path) for name, path in artifacts.items()}
+
+
+class ModelRegistry:
+    """
+    A directory of published model versions and the active-version pointer.
+
+    Manifests record, per backend, the artifact file and its sha256, for the
+    full model ('artifacts') and the cascade first stage ('first_stage').
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.versions_dir = os.path.join(root, 'versions')
+        self.active_path = os.path.join(root, ACTIVE_FILE)
+
+    # -- Reading -----------------------------------------------------------
+    def versions(self):
+        """Manifests of all published versions, oldest first."""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        manifests = []
+        for version in os.listdir(self.versions_dir):
+            if VERSION_PATTERN.match(version):
+                try:
+                    manifests.append(self.manifest(version))
+                except RegistryError:
+                    continue
+        return sorted(manifests, key=lambda manifest: manifest['created_at'])
+
+    def manifest(self, version):
+        """The manifest of a published version."""
+        if not VERSION_PATTERN.match(version or ''):
+            raise RegistryError(f"Invalid model version '{version}'")
+        path = os.path.join(self.versions_dir, version, MANIFEST_FILE)
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise RegistryError(f"Model version '{version}' is not in the registry at {self.root}") from None
+        except (OSError, ValueError) as e:
+            raise RegistryError(f"Unreadable manifest for model version '{version}': {e}") from None
+
+    def state(self):
+        """The active version and activation history (oldest first)."""
+        try:
+            with open(self.active_path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return {'version': None, 'history': []}
+        except (OSError, ValueError) as e:
+            raise RegistryError(f"Unreadable {self.active_path}: {e}") from None
+        return {'version': state.get('version'), 'history': list(state.get('history', []))}
+
+    def active_version(self):
+        return self.state()['version']
+
+    def artifact_path(self, version, backend, first_stage=False):
+        """Path of a version's artifact for `backend` (the cascade first stage if `first_stage`)."""
+        artifacts = self.manifest(version).get('first_stage' if first_stage else 'artifacts', {})
+        if backend not in artifacts:
+            kind = 'cascade first-stage' if first_stage else 'model'
+            raise RegistryError(f"Model version '{version}' has no {backend} {kind} artifact")
+        return os.path.join(self.versions_dir, version, artifacts[backend]['file'])
+
+    def verify(self, version, backend, classes, img_size, first_stage=False):
+        """
+        Check that a version can be served by this server.
+
+        The class list must match the API's response table exactly and the
+        input size the preprocessing pipeline; the artifacts `backend` loads
+        must match their recorded checksums. Returns the manifest.
+
+        Raises:
+            RegistryError: Missing, corrupt or incompatible version
+        """
+        manifest = self.manifest(version)
+        trained = manifest.get('classes', [])
+        if trained != list(classes):
+            if len(trained) != len(classes):
+                detail = f"{len(trained)} vs {len(classes)} classes"
+            else:
+                index = next(i for i, (a, b) in enumerate(zip(trained, classes)) if a != b)
+                detail = f"class {index} is '{trained[index]}', the server's is '{classes[index]}'"
+            raise RegistryError(
+                f"Model version '{version}' was trained on a different class list than this server's ({detail})"
+            )
+        if manifest.get('img_size') != img_size:
+            raise RegistryError(
+                f"Model version '{version}' expects {manifest.get('img_size')}px inputs, server preprocesses to {img_size}px"
+            )
+        kinds = (False, True) if first_stage else (False,)
+        for is_first_stage in kinds:
+            path = self.artifact_path(version, backend, first_stage=is_first_stage)
+            section = manifest['first_stage' if is_first_stage else 'artifacts'][backend]
+            if not os.path.exists(path):
+                raise RegistryError(f"Model version '{version}' is missing {path}")
+            if file_sha256(path) != section['sha256']:
+                raise RegistryError(f"Checksum mismatch for {path}; the artifact is corrupt or was modified")
+        return manifest
+
+    # -- Writing -----------------------------------------------------------
+    def publish(self, source_dir, version=None, classes=None, img_size=IMG_SIZE, notes=''):
+        """
+        Copy the standard artifacts found in `source_dir` into a new version.
+
+        `classes` is the class list the model was trained on; by default it
+        is read from the CLASS_NAMES_FILE training wrote into `source_dir`.
+        Returns the new version's manifest. The version is not activated.
+
+        Raises:
+            RegistryError: Invalid or existing version, no artifacts or no class list found
+        """
+        version = version or time.strftime('%Y%m%d-%H%M%S')
+        if not VERSION_PATTERN.match(version):
+            raise RegistryError(f"Invalid model version '{version}' (letters, digits, '.', '_' and '-')")
+        target = os.path.join(self.versions_dir, version)
+        if os.path.exists(target):
+            raise RegistryError(f"Model version '{version}' already exists")
+
+        sections = {
+            'artifacts': _artifact_files(BACKEND_ARTIFACTS),
+            'first_stage': _artifact_files(CASCADE_ARTIFACTS)
+        }
+        found = {
+            section: {name: filename for name, filename in files.items()
+                      if os.path.isfile(os.path.join(source_dir, filename))}
+            for section, files in sections.items()
+        }
+        if not found['artifacts']:
+            raise RegistryError(
+                f"No model artifacts in {source_dir} (expected any of: {', '.join(sections['artifacts'].values())})"
+            )
+        if classes is None:
+            classes = load_class_names(os.path.join(source_dir, CLASS_NAMES_FILE))
+
+        os.makedirs(self.versions_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f'.{version}-', dir=self.versions_dir)
+        try:
+            manifest = {
+                'format': MANIFEST_FORMAT,
+                'version': version,
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'classes': list(classes),
+                'img_size': img_size,
+                'notes': notes
+            }
+            for section, files in found.items():
+                manifest[section] = {}
+                for name, filename in files.items():
+                    path = os.path.join(staging, filename)
+                    shutil.copyfile(os.path.join(source_dir, filename), path)
+                    manifest[section][name] = {
+                        'file': filename,
+                        'sha256': file_sha256(path),
+                        'bytes': os.path.getsize(path)
+                    }
+            with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+                json.dump(manifest, f, indent=2)
+            os.chmod(staging, 0o755)
+            os.rename(staging, target)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return manifest
+
+    def activate(self, version):
+        """Point ACTIVE at a published version; workers pick it up on their next poll."""
+        self.manifest(version)
+        state = self.state()
+        if state['version'] == version:
+            return state
+        history = (state['history'] + [version])[-HISTORY_LIMIT:]
+        return self._write_state({'version': version, 'history': history})
+
+    def rollback(self):
+        """
+        Re-activate the version that was active before the current one.
+
+        Raises:
+            RegistryError: No earlier activation to return to
+        """
+        state = self.state()
+        history = state['history']
+        if len(history) < 2:
+            raise RegistryError('No earlier version to roll back to')
+        self.manifest(history[-2])
+        return self._write_state({'version': history[-2], 'history': history[:-1]})
+
+    def _write_state(self, state):
+        os.makedirs(self.root, exist_ok=True)
+        temp_path = f'{self.active_path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.active_path)
+        return state
+
+
+class RegistryWatcher:
+    """
+    Polls the registry's active version and reports changes.
+
+    `on_change(version)` runs on the watcher's daemon thread and returns
+    whether the version is now served. A version that fails is not retried
+    until ACTIVE changes again, so a bad publish is logged once instead of
+    being reloaded on every poll.
+    """
+
+    def __init__(self, registry, on_change, current=None, interval=5.0):
+        self.registry = registry
+        self.on_change = on_change
+        self.current = current
+        self.interval = interval
+        self._failed = None
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='model-registry-watcher', daemon=True)
+            self._thread.start()
+
+    def check(self):
+        """Compare ACTIVE with the served version once; True if a new version was swapped in."""
+        try:
+            version = self.registry.active_version()
+        except RegistryError as e:
+            print(f"⚠️  {e}")
+            return False
+        if version is None or version in (self.current, self._failed):
+            return False
+        if self.on_change(version):
+            self.current, self._failed = version, None
+            return True
+        self._failed = version
+        return False
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.check()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage versioned model artifacts')
+    parser.add_argument('--registry', default=os.environ.get('MODEL_REGISTRY_DIR', './model_registry'),
+                        help='Registry directory (default: MODEL_REGISTRY_DIR or ./model_registry)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    publish = commands.add_parser('publish', help='Publish the artifacts in a model directory as a new version')
+    publish.add_argument('source', nargs='?', default=MODEL_DIR, help='Directory holding the exported artifacts')
+    publish.add_argument('--version', default=None, help='Version name (default: a timestamp)')
+    publish.add_argument('--classes', default=None,
+                         help=f'JSON list of the classes the model was trained on (default: SOURCE/{CLASS_NAMES_FILE})')
+    publish.add_argument('--img-size', type=int, default=IMG_SIZE, help='Model input size in pixels')
+    publish.add_argument('--notes', default='', help='Free-form description stored in the manifest')
+    publish.add_argument('--activate', action='store_true', help='Make the new version active')
+
+    commands.add_parser('list', help='List published versions')
+    activate = commands.add_parser('activate', help='Make a published version active')
+    activate.add_argument('version')
+    commands.add_parser('rollback', help='Re-activate the previously active version')
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.registry)
+    try:
+        if args.command == 'publish':
+            classes = load_class_names(args.classes) if args.classes else None
+            manifest = registry.publish(args.source, args.version, classes=classes,
+                                        img_size=args.img_size, notes=args.notes)
+            backends = ', '.join(manifest['artifacts'])
+            if manifest['first_stage']:
+                backends += f" (cascade first stage: {', '.join(manifest['first_stage'])})"
+            print(f"✓ Published model version {manifest['version']}: {backends}")
+            if manifest['classes'] != DISEASE_CLASSES:
+                print("⚠️  The model was trained on a different class list than this server's; "
+                      "servers with the current class list will refuse it")
+            if args.activate:
+                registry.activate(manifest['version'])
+                print(f"✓ Activated {manifest['version']}")
+        elif args.command == 'list':
+            active = registry.active_version()
+            for manifest in registry.versions():
+                marker = '*' if manifest['version'] == active else ' '
+                print(f"{marker} {manifest['version']:<24}{manifest['created_at']:<26}"
+                      f"{', '.join(manifest['artifacts']):<40}{manifest.get('notes', '')}")
+        elif args.command == 'activate':
+            registry.activate(args.version)
+            print(f"✓ Activated {args.version}")
+        else:
+            state = registry.rollback()
+            print(f"✓ Rolled back to {state['version']}")
+    except RegistryError as e:
+        parser.exit(1, f"Error: {e}\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+"""
+AI Crop Disease Detector - Prediction Cache
+===========================================
+Caches prediction responses keyed by a hash of the uploaded image bytes.
+
+Two storage backends are available:
+- MemoryStore: per-process LRU with TTL (default)
+- SQLiteStore: on-disk store shared by every gunicorn worker on the host
+
+Keys are namespaced by a fingerprint of the loaded model file, so a new
+`crop_model.h5` never serves predictions made by the previous one.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def content_key(stream):
+    """Hash a binary stream's contents and rewind it for decoding."""
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    return 'bytes:' + digest.hexdigest()
+
+
+def bytes_key(data):
+    """Hash an in-memory upload."""
+    return 'bytes:' + hashlib.sha256(data).hexdigest()
+
+
+def tensor_key(img_array):
+    """Hash a preprocessed input tensor (catches re-uploads with stripped metadata)."""
+    return 'tensor:' + hashlib.sha256(memoryview(img_array).cast('B')).hexdigest()
+
+
+def model_fingerprint(model_path):
+    """Identify a model file by path, size and modification time."""
+    stat = os.stat(model_path)
+    return hashlib.sha256(f'{model_path}:{stat.st_size}:{stat.st_mtime_ns}'.encode()).hexdigest()[:16]
+
+
+class MemoryStore:
+    """Bounded in-process LRU store with per-entry TTL."""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, payload = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def put(self, key, payload):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteStore:
+    """
+    On-disk store shared across worker processes.
+
+    Each process opens its own connection lazily (connections must not
+    cross a fork). Eviction trims the least recently used rows once the
+    table grows past `max_entries`.
+    """
+
+    EVICT_EVERY = 64
+
+    def __init__(self, path, max_entries, ttl):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evictions = 0
+        self._puts = 0
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS predictions ('
+                'key TEXT PRIMARY KEY, payload TEXT NOT NULL, '
+                'stored_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_accessed ON predictions (accessed_at)')
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                'SELECT payload FROM predictions WHERE key = ? AND stored_at > ?',
+                (key, now - self.ttl)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute('UPDATE predictions SET accessed_at = ? WHERE key = ?', (now, key))
+            conn.commit()
+        return json.loads(row[0])
+
+    def put(self, key, payload):
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)',
+                (key, json.dumps(payload), now, now)
+            )
+            self._puts += 1
+            if self._puts % self.EVICT_EVERY == 0:
+                self._evict(conn, now)
+            conn.commit()
+
+    def _evict(self, conn, now):
+        """Drop expired rows, then the oldest-accessed rows above the limit."""
+        expired = conn.execute('DELETE FROM predictions WHERE stored_at <= ?', (now - self.ttl,)).rowcount
+        excess = conn.execute(
+            'DELETE FROM predictions WHERE key IN ('
+            'SELECT key FROM predictions ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,)
+        ).rowcount
+        self.evictions += expired + excess
+
+    def clear(self):
+        with self._lock:
+            conn = self._connection()
+            conn.execute('DELETE FROM predictions')
+            conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection().execute('SELECT COUNT(*) FROM predictions').fetchone()[0]
+
+
+class PredictionCache:
+    """
+    Prediction response cache with hit/miss counters.
+
+    Call `set_model_version` whenever a model is loaded; entries from other
+    model versions are no longer reachable (and the memory store is cleared).
+    Payloads are JSON-serializable (the API stores (class id, confidence)
+    pairs); bump PAYLOAD_VERSION when their format changes so a shared
+    store never returns entries written by older code.
+    """
+
+    PAYLOAD_VERSION = 2
+
+    def __init__(self, store):
+        self.store = store
+        self.model_version = None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def set_model_version(self, version):
+        if version != self.model_version:
+            if self.model_version is not None and isinstance(self.store, MemoryStore):
+                self.store.clear()
+            self.model_version = version
+
+    def get(self, key):
+        payload = self.store.get(f'{self.model_version}.{self.PAYLOAD_VERSION}:{key}')
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return payload
+
+    def put(self, key, payload, model_version=None):
+        """
+        Store a payload. Pass the `model_version` read before computing it
+        to drop payloads made by a model that was swapped out meanwhile.
+        """
+        if model_version is not None and model_version != self.model_version:
+            return
+        self.store.put(f'{self.model_version}.{self.PAYLOAD_VERSION}:{key}', payload)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'backend': type(self.store).__name__,
+            'model_version': self.model_version,
+            'entries': len(self.store),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.store.evictions
+        }
@@ -0,0 +1,73 @@
+"""
+AI Crop Disease Detector - Image Preprocessing
+==============================================
+Decodes uploaded images into model-ready float32 arrays.
+
+The model normalizes its own input with a Rescaling(1./127.5, offset=-1)
+layer, so preprocessing only decodes, resizes and casts: pixel values stay
+in [0, 255]. This module has no TensorFlow dependency.
+"""
+
+from contextlib import nullcontext
+
+import numpy as np
+from PIL import Image
+
+IMG_SIZE = 224
+
+
+def new_batch_buffer(batch_size, img_size=IMG_SIZE):
+    """Allocate an uninitialized (N, H, W, 3) float32 input buffer."""
+    return np.empty((batch_size, img_size, img_size, 3), dtype=np.float32)
+
+
+def _no_timer(stage):
+    return nullcontext()
+
+
+def preprocess_image(image_source, out=None, stage_timer=_no_timer):
+    """
+    Load and preprocess image for model prediction.
+
+    `image_source` may be a file path or a readable binary stream (such as
+    an uploaded file), so uploads are decoded without a disk round-trip.
+
+    Steps:
+    1. Load image (JPEGs are decoded at reduced scale via draft mode)
+    2. Resize to 224x224
+    3. Cast to float32 in [0, 255] directly into `out`
+
+    Args:
+        image_source: File path or binary stream
+        out: Optional preallocated float32 buffer of shape (H, W, 3) or
+             (1, H, W, 3), e.g. one row of `new_batch_buffer`
+        stage_timer: Optional callable returning a context manager per
+             stage name ('decode', then 'preprocess' for resize and cast)
+
+    Returns:
+        `out`, or a new (1, H, W, 3) array when no buffer was given
+    """
+    try:
+        with stage_timer('decode'):
+            img = Image.open(image_source)
+
+            # Let the JPEG decoder downscale by 1/2, 1/4 or 1/8 while decoding,
+            # never below the target size
+            img.draft('RGB', (IMG_SIZE, IMG_SIZE))
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+            img.load()
+
+        with stage_timer('preprocess'):
+            # Resize to required dimensions
+            img = img.resize((IMG_SIZE, IMG_SIZE))
+
+            if out is None:
+                out = new_batch_buffer(1)
+
+            # Single uint8 -> float32 cast into the destination buffer
+            np.copyto(out, np.asarray(img), casting='unsafe')
+
+        return out
+    except Exception as e:
+        raise Exception(f"Image preprocessing failed: {str(e)}")
@@ -0,0 +1,269 @@
+"""
+AI Crop Disease Detector - Static Assets
+========================================
+Serves the frontend from memory with long-lived caching.
+
+The frontend directory is built once per process, on the first asset
+request:
+- Every asset except index.html gets a content-hashed name
+  (`style.3f9a1c2b7d4e.css`) and references to it in the other files are
+  rewritten, so a changed file is a new URL
+- Text assets are precompressed with gzip, and with brotli when the
+  `brotli` package is installed
+- Every representation gets a strong ETag
+
+Hashed names are served with `Cache-Control: public, max-age=31536000,
+immutable`, so browsers never ask for them again. index.html and the
+original unhashed names revalidate on every use (`no-cache`) and get a 304
+when unchanged. A request never touches the filesystem or the model.
+
+`python static_assets.py build` writes the same output to disk (with .gz
+and .br files) for nginx or a CDN, so asset traffic can bypass the API
+workers entirely (see docs/DEPLOYMENT.md).
+"""
+
+import argparse
+import copy
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import threading
+
+ENTRY_POINT = 'index.html'
+URL_PREFIX = '/frontend/'
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+# Content types worth compressing (images and fonts already are)
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+# Server preference when the client accepts several encodings equally
+ENCODING_PREFERENCE = ('br', 'gzip', 'identity')
+
+HASH_LENGTH = 12
+
+
+def _brotli():
+    """The brotli module, or None when it is not installed (gzip only)."""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def _content_type(name):
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    if content_type.startswith('text/') or content_type == 'application/javascript':
+        content_type += '; charset=utf-8'
+    return content_type
+
+
+def hashed_name(name, content):
+    """`style.css` -> `style.<hash>.css` for the given content."""
+    stem, extension = os.path.splitext(name)
+    return f'{stem}.{hashlib.sha256(content).hexdigest()[:HASH_LENGTH]}{extension}'
+
+
+def parse_accept_encoding(header):
+    """Encodings the client accepts, mapped to their q-value."""
+    accepted = {}
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        match = re.search(r'q\s*=\s*([0-9.]+)', params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def negotiate_encoding(header, available):
+    """
+    The best encoding in `available` for an Accept-Encoding header.
+
+    Identity is acceptable unless the client refuses it explicitly.
+    """
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*')
+    best, best_q = None, 0.0
+    for encoding in ENCODING_PREFERENCE:
+        if encoding not in available:
+            continue
+        q = accepted.get(encoding, wildcard)
+        if q is None:
+            q = 1.0 if encoding == 'identity' else 0.0
+        if q > best_q:
+            best, best_q = encoding, q
+    return best or 'identity'
+
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison of an If-None-Match header against a strong ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    return any(tag.strip().removeprefix('W/') == etag for tag in if_none_match.split(','))
+
+
+class Asset:
+    """One built asset: its body in each encoding and their ETags."""
+
+    def __init__(self, name, content, immutable):
+        self.name = name
+        self.content_type = _content_type(name)
+        self.immutable = immutable
+        digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+        self.bodies = {'identity': content}
+        self.etags = {'identity': f'"{digest}"'}
+        if self.content_type.startswith(COMPRESSIBLE_TYPES):
+            compressed = {'gzip': gzip.compress(content, 9, mtime=0)}
+            brotli = _brotli()
+            if brotli is not None:
+                compressed['br'] = brotli.compress(content, quality=11)
+            for encoding, body in compressed.items():
+                if len(body) < len(content):
+                    self.bodies[encoding] = body
+                    self.etags[encoding] = f'"{digest}-{encoding}"'
+
+    def alias(self, name, immutable):
+        """The same bodies and ETags, served under another name and cache policy."""
+        alias = copy.copy(self)
+        alias.name, alias.immutable = name, immutable
+        return alias
+
+    @property
+    def cache_control(self):
+        return IMMUTABLE_CACHE_CONTROL if self.immutable else REVALIDATE_CACHE_CONTROL
+
+
+class StaticAssets:
+    """
+    The frontend directory, built in memory on first use.
+
+    `respond()` returns (status, headers, body) so the Flask and ASGI apps
+    share the caching and content negotiation.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.hashed_names = {}
+        self._assets = None
+        self._lock = threading.Lock()
+
+    @property
+    def assets(self):
+        if self._assets is None:
+            with self._lock:
+                if self._assets is None:
+                    self._assets = self.build()
+        return self._assets
+
+    def build(self):
+        """
+        Hash, rewrite and compress every file in the directory.
+
+        Returns {served name: Asset}; each file is served under its hashed
+        name (immutable, see `hashed_names`) and its original name
+        (revalidated). Assets are processed in order (other files, then
+        CSS/JS, then HTML), so a reference is rewritten to the hash of the
+        already-rewritten file.
+        """
+        if not os.path.isdir(self.directory):
+            print(f"⚠️  Frontend directory not found at {self.directory}; not serving the frontend")
+            return {}
+        names = sorted(
+            name for name in os.listdir(self.directory)
+            if os.path.isfile(os.path.join(self.directory, name)) and not name.startswith('.')
+        )
+        order = {'.css': 1, '.js': 1, '.html': 2}
+        names.sort(key=lambda name: order.get(os.path.splitext(name)[1], 0))
+
+        assets, renamed = {}, {}
+        for name in names:
+            with open(os.path.join(self.directory, name), 'rb') as f:
+                content = f.read()
+            if os.path.splitext(name)[1] in order:
+                text = content.decode('utf-8')
+                for original, hashed in renamed.items():
+                    text = text.replace(URL_PREFIX + original, URL_PREFIX + hashed)
+                content = text.encode('utf-8')
+            if name == ENTRY_POINT:
+                assets[name] = Asset(name, content, immutable=False)
+                continue
+            renamed[name] = hashed_name(name, content)
+            asset = assets[renamed[name]] = Asset(renamed[name], content, immutable=True)
+            assets[name] = asset.alias(name, immutable=False)
+        self.hashed_names = renamed
+        return assets
+
+    def respond(self, name, if_none_match=None, accept_encoding=None):
+        """
+        (status, headers, body) for GET `name`, or None if there is no such asset.
+
+        Returns 304 with an empty body when `if_none_match` matches the
+        representation the client would receive.
+        """
+        asset = self.assets.get(name or ENTRY_POINT)
+        if asset is None:
+            return None
+        encoding = negotiate_encoding(accept_encoding, asset.bodies)
+        headers = {
+            'ETag': asset.etags[encoding],
+            'Cache-Control': asset.cache_control,
+            'Vary': 'Accept-Encoding'
+        }
+        if etag_matches(if_none_match, asset.etags[encoding]):
+            return 304, headers, b''
+        headers['Content-Type'] = asset.content_type
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        return 200, headers, asset.bodies[encoding]
+
+    def write(self, output_dir):
+        """
+        Write the built assets for a static file server.
+
+        Each served name gets the identity file plus `.gz`/`.br` siblings,
+        and manifest.json maps original names to hashed ones.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        for name, asset in self.assets.items():
+            for encoding, body in asset.bodies.items():
+                suffix = {'identity': '', 'gzip': '.gz', 'br': '.br'}[encoding]
+                with open(os.path.join(output_dir, name + suffix), 'wb') as f:
+                    f.write(body)
+        with open(os.path.join(output_dir, 'manifest.json'), 'w') as f:
+            json.dump(self.hashed_names, f, indent=2)
+        return self.hashed_names
+
+
+def main():
+    default_source = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'frontend'))
+    parser = argparse.ArgumentParser(description='Build the frontend with hashed names and precompressed variants')
+    parser.add_argument('command', choices=['build'])
+    parser.add_argument('--source', default=default_source)
+    parser.add_argument('--output', default=os.path.join(default_source, 'dist'))
+    args = parser.parse_args()
+
+    static_assets = StaticAssets(args.source)
+    manifest = static_assets.write(args.output)
+    encodings = sorted({encoding for asset in static_assets.assets.values() for encoding in asset.bodies})
+    for original, hashed in manifest.items():
+        print(f"  {original} -> {hashed}")
+    print(f"✓ Built {len(static_assets.assets)} assets into {args.output} ({', '.join(encodings)})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,344 @@
+"""
+AI Crop Disease Detector - Weather Service
+==========================================
+Cached, coalesced weather lookups for the /weather endpoint.
+
+- Locations are snapped to a grid (WEATHER_GRID degrees, ~11 km at 0.1),
+  so nearby farms share one cache entry and one upstream call
+- Entries are fresh for WEATHER_TTL seconds; for WEATHER_STALE_TTL seconds
+  after that the stale value is returned at once while one background
+  request refreshes it (stale-while-revalidate)
+- Concurrent misses for the same cell wait on a single upstream request
+- Upstream connections are pooled and reused
+
+The upstream defaults to wttr.in; point WEATHER_API_URL at any server that
+returns the same JSON (e.g. a local stub, see benchmarks/bench_weather.py).
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+WEATHER_API_URL = os.environ.get('WEATHER_API_URL', 'https://wttr.in/')
+WEATHER_TIMEOUT = float(os.environ.get('WEATHER_TIMEOUT', 5))  # seconds
+WEATHER_GRID = float(os.environ.get('WEATHER_GRID', 0.1))  # degrees
+WEATHER_TTL = float(os.environ.get('WEATHER_TTL', 600))
+WEATHER_STALE_TTL = float(os.environ.get('WEATHER_STALE_TTL', 3600))
+WEATHER_CACHE_SIZE = int(os.environ.get('WEATHER_CACHE_SIZE', 4096))
+WEATHER_POOL_SIZE = int(os.environ.get('WEATHER_POOL_SIZE', 10))
+
+# Returned when the weather service is unreachable
+WEATHER_FALLBACK = {
+    'success': True,
+    'temperature': 25,
+    'humidity': 65,
+    'weather': 'Unknown',
+    'risk_level': 'medium',
+    'risk_message': '🌤️ Weather data unavailable - assuming moderate risk',
+    'recommendations': [
+        'Monitor local weather conditions',
+        'Maintain proper plant care routine',
+        'Check weather forecast regularly'
+    ]
+}
+
+
+def parse_coordinates(lat, lon):
+    """
+    Validate latitude/longitude query values.
+
+    Raises:
+        ValueError: Not numbers or out of range
+    """
+    lat, lon = float(lat), float(lon)
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError('Latitude must be within [-90, 90] and longitude within [-180, 180]')
+    return lat, lon
+
+
+def weather_response(data):
+    """Turn a wttr.in JSON payload into the /weather response with disease risk."""
+    # Extract current weather data
+    current = data['current_condition'][0]
+    temperature = float(current['temp_C'])
+    humidity = int(current['humidity'])
+    weather_desc = current['weatherDesc'][0]['value']
+
+    # Assess risk based on humidity and weather conditions
+    risk_level = 'low'
+    risk_message = 'Fungal disease risk is low'
+    recommendations = []
+
+    if humidity >= 80:
+        risk_level = 'critical'
+        risk_message = '⚠️ CRITICAL: Very high humidity - extreme fungal disease risk'
+        recommendations = [
+            '🚨 Increase ventilation immediately',
+            '🌿 Remove affected leaves quickly',
+            '💧 Reduce watering frequency',
+            '🔬 Apply fungicide preventatively',
+            '👀 Monitor plants daily'
+        ]
+    elif humidity >= 70:
+        risk_level = 'high'
+        risk_message = '🌦️ High humidity - increased fungal disease risk'
+        recommendations = [
+            '🌬️ Improve air circulation',
+            '💧 Water early morning, avoid evening',
+            '🔬 Consider preventive fungicide',
+            '👀 Monitor for symptoms',
+            '🌿 Prune dense leaf areas'
+        ]
+    elif humidity >= 50:
+        risk_level = 'medium'
+        risk_message = '🌤️ Moderate humidity - normal fungal disease risk'
+        recommendations = [
+            '💧 Continue regular watering routine',
+            '🌬️ Maintain good spacing between plants',
+            '👀 Regular inspections recommended',
+            '🔬 Keep fungicide on hand'
+        ]
+    else:
+        risk_level = 'low'
+        risk_message = '☀️ Low humidity - fungal disease risk is low'
+        recommendations = [
+            '✅ Fungal disease risk minimal',
+            '💧 Monitor irrigation for drought stress',
+            '☀️ Ideal conditions for most crops',
+            '🌿 Good air circulation maintained'
+        ]
+
+    # Add temperature-based warnings
+    if temperature > 32:
+        recommendations.insert(0, '🔥 Very hot - ensure adequate watering')
+    elif temperature < 10:
+        recommendations.insert(0, '❄️ Cold conditions - reduced disease pressure')
+
+    return {
+        'success': True,
+        'temperature': temperature,
+        'humidity': humidity,
+        'weather': weather_desc,
+        'risk_level': risk_level,
+        'risk_message': risk_message,
+        'recommendations': recommendations
+    }
+
+
+class _WeatherCache:
+    """Grid-cell cache and counters shared by the sync and async services."""
+
+    def __init__(self, api_url=WEATHER_API_URL, timeout=WEATHER_TIMEOUT, grid=WEATHER_GRID,
+                 ttl=WEATHER_TTL, stale_ttl=WEATHER_STALE_TTL, max_entries=WEATHER_CACHE_SIZE):
+        self.api_url = api_url
+        self.timeout = timeout
+        self.grid = grid
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.upstream_calls = 0
+        self.upstream_errors = 0
+
+    def grid_cell(self, lat, lon):
+        """Snap a location to the centre of its grid cell."""
+        return (round(round(lat / self.grid) * self.grid, 4),
+                round(round(lon / self.grid) * self.grid, 4))
+
+    def request_params(self, cell):
+        return {'format': 'j1', 'lat': cell[0], 'lon': cell[1]}
+
+    def _lookup(self, cell):
+        """Return (response, is_fresh), or (None, False) on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(cell)
+            if entry is not None:
+                fetched_at, response = entry
+                age = now - fetched_at
+                if age < self.ttl:
+                    self._entries.move_to_end(cell)
+                    self.hits += 1
+                    return response, True
+                if age < self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(cell)
+                    self.stale_hits += 1
+                    return response, False
+                del self._entries[cell]
+            self.misses += 1
+            return None, False
+
+    def _store(self, cell, response):
+        with self._lock:
+            self._entries[cell] = (time.monotonic(), response)
+            self._entries.move_to_end(cell)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _parse(self, cell, data):
+        """Cache a successful upstream payload and return the response."""
+        response = weather_response(data)
+        self._store(cell, response)
+        return response
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+                'coalesced': self.coalesced,
+                'upstream_calls': self.upstream_calls,
+                'upstream_errors': self.upstream_errors,
+                'grid_degrees': self.grid,
+                'ttl_seconds': self.ttl
+            }
+
+
+class WeatherService(_WeatherCache):
+    """
+    Blocking weather lookups for the Flask app.
+
+    Uses one pooled `requests` session, created on the first upstream
+    call so importing the app does not import `requests`; stale entries
+    are refreshed on a small background pool.
+    """
+
+    def __init__(self, pool_size=WEATHER_POOL_SIZE, **kwargs):
+        super().__init__(**kwargs)
+        self.pool_size = pool_size
+        self._session = None
+        self._requests = None
+        self._inflight = {}
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix='weather-refresh')
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self._requests, self._session = requests, session
+        return self._session
+
+    def get(self, lat, lon):
+        """Weather and disease risk for a location; never raises on upstream errors."""
+        cell = self.grid_cell(lat, lon)
+        response, fresh = self._lookup(cell)
+        if response is not None:
+            if not fresh:
+                self._refresh(cell)
+            return response
+        return self._fetch_coalesced(cell).result() or WEATHER_FALLBACK
+
+    def _refresh(self, cell):
+        with self._lock:
+            if cell in self._inflight:
+                return
+        self._refresher.submit(self._fetch_coalesced, cell)
+
+    def _fetch_coalesced(self, cell):
+        """Start an upstream request for `cell`, or join the one in flight."""
+        session = self.session
+        with self._lock:
+            future = self._inflight.get(cell)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            future = self._inflight[cell] = Future()
+            self.upstream_calls += 1
+
+        try:
+            response = session.get(self.api_url, params=self.request_params(cell), timeout=self.timeout)
+            response.raise_for_status()
+            future.set_result(self._parse(cell, response.json()))
+        except Exception:
+            # Any failure, including a malformed payload, must settle the
+            # future: coalesced callers are blocked on it
+            with self._lock:
+                self.upstream_errors += 1
+            future.set_result(None)
+        finally:
+            with self._lock:
+                del self._inflight[cell]
+        return future
+
+    def close(self):
+        self._refresher.shutdown(wait=False)
+        if self._session is not None:
+            self._session.close()
+
+
+class AsyncWeatherService(_WeatherCache):
+    """
+    Non-blocking weather lookups for the ASGI app.
+
+    Uses one pooled `httpx.AsyncClient`; must be used from a single event
+    loop and closed with `aclose()`.
+    """
+
+    def __init__(self, pool_size=WEATHER_POOL_SIZE, **kwargs):
+        super().__init__(**kwargs)
+        import httpx
+
+        self._httpx = httpx
+        self.client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=pool_size)
+        )
+        self._inflight = {}
+
+    async def get(self, lat, lon):
+        """Weather and disease risk for a location; never raises on upstream errors."""
+        cell = self.grid_cell(lat, lon)
+        response, fresh = self._lookup(cell)
+        if response is not None:
+            if not fresh and cell not in self._inflight:
+                self._start_fetch(cell)
+            return response
+        return await self._fetch_coalesced(cell) or WEATHER_FALLBACK
+
+    def _start_fetch(self, cell):
+        self.upstream_calls += 1
+        task = self._inflight[cell] = asyncio.ensure_future(self._fetch(cell))
+        task.add_done_callback(lambda _: self._inflight.pop(cell, None))
+        return task
+
+    async def _fetch_coalesced(self, cell):
+        """Start an upstream request for `cell`, or join the one in flight."""
+        task = self._inflight.get(cell)
+        if task is None:
+            task = self._start_fetch(cell)
+        else:
+            self.coalesced += 1
+        # A cancelled client must not cancel the shared request
+        return await asyncio.shield(task)
+
+    async def _fetch(self, cell):
+        try:
+            response = await self.client.get(self.api_url, params=self.request_params(cell))
+            response.raise_for_status()
+            return self._parse(cell, response.json())
+        except Exception:
+            # Network errors and malformed payloads alike fall back for every waiter
+            self.upstream_errors += 1
+            return None
+
+    async def aclose(self):
+        await self.client.aclose()
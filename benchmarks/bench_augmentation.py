@@ -0,0 +1,104 @@
+"""
+Augmentation Throughput Benchmark
+=================================
+Compares the former per-image ImageDataGenerator augmentation (a Python
+call per image through tf.numpy_function) with the vectorized batch
+augmentation used by model/train_model.py, on synthetic in-memory images.
+
+Both pipelines get the same parallel map and prefetching, so the numbers
+isolate the cost of the augmentation itself. Reports augmented images
+per second.
+
+Usage:
+    python benchmarks/bench_augmentation.py [--images 1024] [--batch-size 32] [--epochs 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import tensorflow as tf
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'model'))
+
+from train_model import AUTOTUNE, IMG_SIZE, RANDOM_SEED, make_augmentation  # noqa: E402
+
+
+def synthetic_images(count, seed=RANDOM_SEED):
+    rng = np.random.default_rng(seed)
+    images = rng.integers(0, 256, size=(count, IMG_SIZE, IMG_SIZE, 3), dtype=np.uint8).astype(np.float32)
+    labels = rng.integers(0, 38, size=count).astype(np.int32)
+    return images, labels
+
+
+def legacy_dataset(images, labels, batch_size):
+    """The original pipeline: ImageDataGenerator.random_transform per image."""
+    from tensorflow.keras.preprocessing.image import ImageDataGenerator
+
+    generator = ImageDataGenerator(
+        rotation_range=20,
+        width_shift_range=0.2,
+        height_shift_range=0.2,
+        shear_range=0.2,
+        zoom_range=0.2,
+        horizontal_flip=True,
+        fill_mode='nearest'
+    )
+
+    def augment(image, label):
+        image = tf.numpy_function(lambda x: generator.random_transform(x).astype(np.float32), [image], tf.float32)
+        image.set_shape((IMG_SIZE, IMG_SIZE, 3))
+        return image, label
+
+    dataset = tf.data.Dataset.from_tensor_slices((images, labels))
+    dataset = dataset.map(augment, num_parallel_calls=AUTOTUNE)
+    return dataset.batch(batch_size).prefetch(AUTOTUNE)
+
+
+def vectorized_dataset(images, labels, batch_size):
+    """The current pipeline: one batched affine warp per batch."""
+    augment = make_augmentation()
+    dataset = tf.data.Dataset.from_tensor_slices((images, labels)).batch(batch_size)
+    seeds = tf.data.Dataset.random(seed=RANDOM_SEED, rerandomize_each_iteration=True).batch(2)
+    dataset = tf.data.Dataset.zip((dataset, seeds)).map(
+        lambda batch, seed: augment(*batch, seed), num_parallel_calls=AUTOTUNE
+    )
+    return dataset.prefetch(AUTOTUNE)
+
+
+def measure(dataset, epochs):
+    """Augmented images per second, after one warm-up epoch."""
+    for _ in dataset:
+        pass
+
+    count = 0
+    start = time.perf_counter()
+    for _ in range(epochs):
+        for images, _ in dataset:
+            count += int(images.shape[0])
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark training-time augmentation throughput')
+    parser.add_argument('--images', type=int, default=1024)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--epochs', type=int, default=3)
+    args = parser.parse_args()
+
+    images, labels = synthetic_images(args.images)
+    print(f"{args.images} images of {IMG_SIZE}x{IMG_SIZE}, batch size {args.batch_size}, "
+          f"{args.epochs} epochs, {os.cpu_count()} CPUs\n")
+    print(f"{'pipeline':<26}{'img/s':>10}{'speedup':>10}")
+
+    baseline = measure(legacy_dataset(images, labels, args.batch_size), args.epochs)
+    print(f"{'ImageDataGenerator':<26}{baseline:>10.1f}{1.0:>9.1f}x")
+
+    vectorized = measure(vectorized_dataset(images, labels, args.batch_size), args.epochs)
+    print(f"{'vectorized (batched)':<26}{vectorized:>10.1f}{vectorized / baseline:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Keras Serving Overhead Benchmark
+================================
+Compares per-call latency of the original `model.predict(batch, verbose=0)`
+with the keras backend's concrete-function path (backend/inference_backends.py),
+with and without padding to batch buckets.
+
+The concrete function without padding is the pure forward pass; the
+difference to it is the per-call framework overhead of each path.
+
+Usage:
+    python benchmarks/bench_keras_serving.py [--model ../model/crop_model.h5]
+                                             [--batch-sizes 1 3 8 16] [--iterations 50]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from inference_backends import BACKEND_ARTIFACTS, KERAS_BATCH_BUCKETS, KerasBackend  # noqa: E402
+
+
+def median_ms(func, batch, iterations):
+    """Median milliseconds per call, after two warm-up calls."""
+    func(batch)
+    func(batch)
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func(batch)
+        timings.append((time.perf_counter() - start) * 1000.0)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark model.predict against the concrete-function serving path')
+    parser.add_argument('--model', default=BACKEND_ARTIFACTS['keras'])
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 3, 8, 16])
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--threads', type=int, default=None)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        print(f"Model file not found at {args.model}. Train the model first.")
+        return
+
+    padded = KerasBackend(args.model, num_threads=args.threads)
+    unpadded = KerasBackend(args.model, batch_buckets=())
+    model = padded.model
+    paths = {
+        'model.predict': lambda batch: model.predict(batch, verbose=0),
+        'concrete fn': unpadded.predict,
+        'concrete fn + buckets': padded.predict,
+    }
+
+    rng = np.random.default_rng(42)
+    print(f"Model {args.model}, buckets {KERAS_BATCH_BUCKETS}, {os.cpu_count()} CPUs\n")
+    print(f"{'batch':>6}  {'path':<24}{'ms/call':>10}{'overhead ms':>13}{'speedup':>9}")
+    for batch_size in args.batch_sizes:
+        batch = rng.uniform(0, 255, size=(batch_size, padded.img_size, padded.img_size, 3)).astype(np.float32)
+        reference = model.predict(batch, verbose=0)
+        for path in paths.values():
+            np.testing.assert_allclose(path(batch), reference, atol=1e-5)
+
+        timings = {name: median_ms(path, batch, args.iterations) for name, path in paths.items()}
+        baseline, forward = timings['model.predict'], timings['concrete fn']
+        for name, ms in timings.items():
+            print(f"{batch_size:>6}  {name:<24}{ms:>10.2f}{ms - forward:>13.2f}{baseline / ms:>8.2f}x")
+        print()
+
+
+if __name__ == '__main__':
+    main()
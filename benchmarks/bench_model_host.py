@@ -0,0 +1,161 @@
+"""
+Model Host Memory Benchmark
+===========================
+Compares the memory footprint of N web workers that each load the model
+(in-process mode) with N workers that share one model host process.
+
+Memory is reported as PSS (proportional set size) where available, so
+pages shared between processes are not double counted.
+
+Usage:
+    python benchmarks/bench_model_host.py [--workers 4] [--model PATH]
+
+Without --model (and no trained model present) a MobileNetV2 model with
+random weights and the production head is built in a temp directory.
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import secrets
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+sys.path.insert(0, BACKEND_DIR)
+
+DEFAULT_MODEL_PATH = os.path.join(BACKEND_DIR, '..', 'model', 'crop_model.h5')
+IMG_SIZE = 224
+NUM_CLASSES = 38
+
+
+def build_stand_in_model(path):
+    """Save a MobileNetV2 model with random weights and the production head."""
+    from tensorflow import keras
+    from tensorflow.keras import layers
+
+    base_model = keras.applications.MobileNetV2(
+        input_shape=(IMG_SIZE, IMG_SIZE, 3), include_top=False, weights=None
+    )
+    model = keras.Sequential([
+        layers.Input(shape=(IMG_SIZE, IMG_SIZE, 3)),
+        layers.Rescaling(1./127.5, offset=-1),
+        base_model,
+        layers.GlobalAveragePooling2D(),
+        layers.Dense(256, activation='relu'),
+        layers.Dropout(0.5),
+        layers.Dense(128, activation='relu'),
+        layers.Dropout(0.3),
+        layers.Dense(NUM_CLASSES, activation='softmax')
+    ])
+    model.save(path)
+
+
+def process_memory_mb(pid):
+    """PSS of a process in MB, falling back to RSS."""
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024.0
+    return 0.0
+
+
+def in_process_worker(model_path, ready, done):
+    """Web worker that loads its own model copy."""
+    from tensorflow import keras
+
+    model = keras.models.load_model(model_path)
+    model.predict(np.zeros((4, IMG_SIZE, IMG_SIZE, 3), dtype=np.float32), verbose=0)
+    ready.set()
+    done.wait()
+
+
+def model_host_worker(address, ready, done):
+    """Web worker that sends tensors to the shared host."""
+    from model_host import ModelHostClient
+
+    client = ModelHostClient(address, capacity=16)
+    client.connect()
+    client.predict(np.zeros((4, IMG_SIZE, IMG_SIZE, 3), dtype=np.float32))
+    ready.set()
+    done.wait()
+    client.close()
+
+
+def run_workers(target, arg, num_workers, extra_pids=()):
+    """Start workers, wait until each has served a request, measure, stop."""
+    ctx = mp.get_context('spawn')
+    done = ctx.Event()
+    workers = []
+    for _ in range(num_workers):
+        ready = ctx.Event()
+        process = ctx.Process(target=target, args=(arg, ready, done))
+        process.start()
+        workers.append((process, ready))
+
+    for _, ready in workers:
+        ready.wait(timeout=300)
+    time.sleep(1)
+
+    worker_mb = [process_memory_mb(process.pid) for process, _ in workers]
+    extra_mb = [process_memory_mb(pid) for pid in extra_pids]
+
+    done.set()
+    for process, _ in workers:
+        process.join()
+    return worker_mb, extra_mb
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare in-process and model-host memory use')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--model', default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = args.model or DEFAULT_MODEL_PATH
+        if args.model is None and not os.path.exists(model_path):
+            model_path = os.path.join(tmp, 'stand_in_model.h5')
+            print("Building stand-in MobileNetV2 model...")
+            build_stand_in_model(model_path)
+
+        print(f"\nIn-process mode: {args.workers} workers, each loading the model")
+        in_process_mb, _ = run_workers(in_process_worker, model_path, args.workers)
+
+        print(f"Model-host mode: 1 host + {args.workers} workers")
+        address = os.path.join(tmp, 'model-host.sock')
+        os.environ.setdefault('MODEL_HOST_AUTHKEY', secrets.token_hex(32))
+        host = subprocess.Popen(
+            [sys.executable, os.path.join(BACKEND_DIR, 'model_host.py'),
+             '--model', model_path, '--address', address],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            host_workers_mb, (host_mb,) = run_workers(model_host_worker, address, args.workers, [host.pid])
+        finally:
+            host.terminate()
+            host.wait()
+
+    in_process_total = sum(in_process_mb)
+    host_total = sum(host_workers_mb) + host_mb
+
+    print(f"\n{'mode':<14}{'per worker MB':>16}{'host MB':>10}{'total MB':>12}")
+    print(f"{'in_process':<14}{np.mean(in_process_mb):>16.1f}{'-':>10}{in_process_total:>12.1f}")
+    print(f"{'model_host':<14}{np.mean(host_workers_mb):>16.1f}{host_mb:>10.1f}{host_total:>12.1f}")
+    print(f"\nMemory saved: {in_process_total - host_total:.1f} MB "
+          f"({(1 - host_total / in_process_total) * 100:.0f}%)")
+
+
+if __name__ == '__main__':
+    main()
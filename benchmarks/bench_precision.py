@@ -0,0 +1,161 @@
+"""
+Precision and XLA Benchmark
+===========================
+Trains and serves the model from model/train_model.py under each
+combination of float32 / mixed bfloat16 precision and XLA on/off, using
+the dummy data from `create_dummy_data`.
+
+Every combination starts from the same initial weights and reports:
+- inference latency of the fixed-signature serving function (median ms)
+- top-1 agreement and largest probability difference with float32 without
+  XLA, on the shared initial weights
+- training step time on the same batches (median ms per batch)
+- accuracy on the dummy data after those steps, and its delta to float32
+  without XLA (dropout masks differ between modes, so expect some noise)
+
+bfloat16 rows are skipped on CPUs without native bfloat16 instructions.
+The default random backbone weights need no download; their BatchNorm
+statistics are fitted to the dummy images so activations keep a realistic
+scale. Timings match the ImageNet weights (`--weights imagenet`).
+
+Usage:
+    python benchmarks/bench_precision.py [--steps 10] [--batch-size 16] [--inference-batch 16]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras import layers
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'model'))
+
+from train_model import (  # noqa: E402
+    DISEASE_CLASSES, RANDOM_SEED, compile_model, cpu_supports_bfloat16, create_dummy_data, create_model,
+    make_serving_function, set_precision_policy
+)
+
+COMBINATIONS = [
+    # (mixed precision, XLA)
+    (False, False),
+    (False, True),
+    (True, False),
+    (True, True),
+]
+
+
+def calibrate_batch_norm(model, images):
+    """
+    Set BatchNorm moving statistics of a randomly initialized backbone to
+    the statistics of `images`; otherwise activations vanish with depth and
+    every prediction is uniform.
+    """
+    batch_norms = [layer for layer in model._flatten_layers() if isinstance(layer, layers.BatchNormalization)]
+    trainable = [layer.trainable for layer in model.layers]
+    momentum = [layer.momentum for layer in batch_norms]
+    for layer in model.layers:
+        layer.trainable = True
+    for layer in batch_norms:
+        layer.momentum = 0.0
+    model(images, training=True)
+    for layer, value in zip(model.layers, trainable):
+        layer.trainable = value
+    for layer, value in zip(batch_norms, momentum):
+        layer.momentum = value
+
+
+def time_training(model, x, y, batch_size, steps, warmup=2):
+    """Median milliseconds per training step, after `warmup` steps (tracing/compilation)."""
+    batches = [(x[i:i + batch_size], y[i:i + batch_size]) for i in range(0, len(x) - batch_size + 1, batch_size)]
+    timings = []
+    for step in range(warmup + steps):
+        images, labels = batches[step % len(batches)]
+        start = time.perf_counter()
+        model.train_on_batch(images, labels)
+        if step >= warmup:
+            timings.append((time.perf_counter() - start) * 1000.0)
+    return float(np.median(timings))
+
+
+def time_inference(serve, batch, repeats):
+    """Median milliseconds per call of the serving function, after one warm-up call."""
+    batch = tf.constant(batch)
+    serve(batch).numpy()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        serve(batch).numpy()
+        timings.append((time.perf_counter() - start) * 1000.0)
+    return float(np.median(timings))
+
+
+def predict(serve, x, batch_size):
+    return np.concatenate([serve(tf.constant(x[i:i + batch_size])).numpy() for i in range(0, len(x), batch_size)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark mixed precision and XLA for training and serving')
+    parser.add_argument('--steps', type=int, default=10, help='Timed training steps per combination')
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--inference-batch', type=int, default=16)
+    parser.add_argument('--repeats', type=int, default=20, help='Timed inference calls per combination')
+    parser.add_argument('--weights', choices=['none', 'imagenet'], default='none',
+                        help='Backbone initialization')
+    args = parser.parse_args()
+
+    weights = None if args.weights == 'none' else args.weights
+    np.random.seed(RANDOM_SEED)
+    tf.random.set_seed(RANDOM_SEED)
+    x, y = create_dummy_data()
+    num_classes = len(DISEASE_CLASSES)
+
+    set_precision_policy(False)
+    model = create_model(num_classes, weights=weights)
+    if weights is None:
+        calibrate_batch_norm(model, x[:32])
+    initial_weights = model.get_weights()
+
+    bfloat16 = cpu_supports_bfloat16()
+    results = []
+    reference = None
+    for mixed, jit in COMBINATIONS:
+        if mixed and not bfloat16:
+            print(f"Skipping bfloat16{' + XLA' if jit else ''}: no native bfloat16 support on this CPU")
+            continue
+
+        policy = set_precision_policy(mixed)
+        tf.random.set_seed(RANDOM_SEED)
+        model = compile_model(create_model(num_classes, weights=weights), jit_compile=jit)
+        model.set_weights(initial_weights)
+
+        serve = make_serving_function(model, jit_compile=jit)
+        latency_ms = time_inference(serve, x[:args.inference_batch], args.repeats)
+        initial = predict(serve, x, args.inference_batch)
+
+        step_ms = time_training(model, x, y, args.batch_size, args.steps)
+        accuracy = float(np.mean(predict(serve, x, args.inference_batch).argmax(axis=1) == y))
+
+        if reference is None:
+            reference = (initial, accuracy)
+        agreement = float(np.mean(initial.argmax(axis=1) == reference[0].argmax(axis=1)))
+        max_diff = float(np.abs(initial - reference[0]).max())
+
+        results.append((policy, 'on' if jit else 'off', latency_ms, agreement, max_diff,
+                        step_ms, accuracy, accuracy - reference[1]))
+
+    set_precision_policy(False)
+
+    print(f"\n{len(x)} dummy images, training batch {args.batch_size} ({args.steps} steps), "
+          f"inference batch {args.inference_batch}, {os.cpu_count()} CPUs\n")
+    print(f"{'policy':<16}{'XLA':>5}{'infer ms':>10}{'agree':>7}{'max |dp|':>10}"
+          f"{'step ms':>10}{'accuracy':>10}{'delta':>9}")
+    for policy, jit, latency_ms, agreement, max_diff, step_ms, accuracy, delta in results:
+        print(f"{policy:<16}{jit:>5}{latency_ms:>10.1f}{agreement:>7.2f}{max_diff:>10.4f}"
+              f"{step_ms:>10.1f}{accuracy:>10.3f}{delta:>+9.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+Preprocessing Benchmark
+=======================
+Compares the original preprocess_image (full decode, float64 / 255.0) with
+the current draft-mode, preallocated float32 pipeline on 12-megapixel
+camera-sized JPEGs.
+
+The test image is generated once by the parent; each mode then runs in its
+own subprocess so peak RSS is measured in isolation.
+
+Usage:
+    python benchmarks/bench_preprocess.py [--iterations 20] [--width 4000 --height 3000]
+"""
+
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from preprocessing import IMG_SIZE, new_batch_buffer, preprocess_image  # noqa: E402
+
+
+def legacy_preprocess_image(image_source):
+    """Original implementation, kept here as the baseline."""
+    img = Image.open(image_source).convert('RGB')
+    img = img.resize((IMG_SIZE, IMG_SIZE))
+    img_array = np.array(img)
+    img_array = img_array / 255.0
+    img_array = np.expand_dims(img_array, axis=0)
+    return img_array
+
+
+def make_jpeg(width, height, seed=0):
+    """Encode a synthetic camera-sized JPEG with smooth leaf-like content."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    green = (128 + 100 * np.sin(x / 97.0) * np.cos(y / 53.0)).astype(np.uint8)
+    noise = rng.integers(0, 40, size=(height, width), dtype=np.uint8)
+    pixels = np.stack([green // 3 + noise, green, green // 4 + noise], axis=-1)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process in MB.
+
+    Prefers VmHWM from /proc, because ru_maxrss is inherited from the parent
+    across fork/exec and would hide the child's own peak.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def run_mode(mode, data, iterations):
+    """Time one preprocessing mode and report latency and RSS growth."""
+    rss_before = peak_rss_mb()
+    buffer = new_batch_buffer(1)
+    timings = []
+
+    for _ in range(iterations):
+        start = time.perf_counter()
+        if mode == 'legacy':
+            legacy_preprocess_image(io.BytesIO(data))
+        else:
+            preprocess_image(io.BytesIO(data), out=buffer)
+        timings.append((time.perf_counter() - start) * 1000.0)
+
+    return {
+        'mode': mode,
+        'iterations': iterations,
+        'mean_ms': float(np.mean(timings)),
+        'p50_ms': float(np.percentile(timings, 50)),
+        'p95_ms': float(np.percentile(timings, 95)),
+        'peak_rss_mb': peak_rss_mb(),
+        'peak_rss_growth_mb': peak_rss_mb() - rss_before
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark image preprocessing')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--width', type=int, default=4000)
+    parser.add_argument('--height', type=int, default=3000)
+    parser.add_argument('--mode', choices=['legacy', 'current'], help=argparse.SUPPRESS)
+    parser.add_argument('--input', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        # Child process: measure a single mode and print JSON
+        with open(args.input, 'rb') as f:
+            data = f.read()
+        print(json.dumps(run_mode(args.mode, data, args.iterations)))
+        return
+
+    print(f"Preprocessing {args.width}x{args.height} JPEG, {args.iterations} iterations per mode\n")
+    with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as f:
+        f.write(make_jpeg(args.width, args.height))
+
+    results = []
+    try:
+        for mode in ('legacy', 'current'):
+            output = subprocess.run(
+                [sys.executable, __file__, '--mode', mode, '--input', f.name,
+                 '--iterations', str(args.iterations)],
+                check=True, capture_output=True, text=True
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+    finally:
+        os.remove(f.name)
+
+    print(f"{'mode':<10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'RSS growth MB':>16}")
+    for r in results:
+        print(f"{r['mode']:<10}{r['mean_ms']:>10.1f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}"
+              f"{r['peak_rss_growth_mb']:>16.1f}")
+
+    legacy, current = results
+    print(f"\nSpeedup: {legacy['mean_ms'] / current['mean_ms']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
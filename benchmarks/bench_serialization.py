@@ -0,0 +1,134 @@
+"""
+Response Serialization Benchmark
+================================
+Compares building and encoding prediction responses the original way
+(split the class name, scan TREATMENT_GUIDE, jsonify) with the class
+registry's pre-encoded fragments, for /predict and a /predict/batch of
+BATCH images.
+
+Every mode's output is checked to decode to the same JSON as the original.
+
+Usage:
+    python benchmarks/bench_serialization.py [--iterations 20000] [--batch 32]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from flask import Flask, jsonify
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+import class_registry  # noqa: E402
+from class_registry import CLASS_REGISTRY, DISEASE_CLASSES, TREATMENT_GUIDE, dumps  # noqa: E402
+
+
+def legacy_get_disease_info(disease_name):
+    """Original lookup, kept here as the baseline (falls back to 'healthy')."""
+    disease = disease_name.split('___')[-1]
+    for key, info in TREATMENT_GUIDE.items():
+        if key.lower() == disease.lower():
+            return info
+    return TREATMENT_GUIDE.get('healthy', {})
+
+
+def legacy_format_prediction_response(class_index, confidence):
+    """Original response builder, kept here as the baseline."""
+    disease_class = DISEASE_CLASSES[class_index]
+    crop, disease = disease_class.split('___')
+    disease_info = legacy_get_disease_info(disease_class)
+    return {
+        'success': True,
+        'crop': crop,
+        'disease': disease,
+        'confidence': f"{float(confidence):.2f}%",
+        'confidence_value': float(confidence),
+        'severity': disease_info.get('severity', 'Unknown'),
+        'description': disease_info.get('description', ''),
+        'treatment': disease_info.get('treatment', []),
+        'prevention': disease_info.get('prevention', [])
+    }
+
+
+def encode_single(mode, class_index, confidence):
+    if mode == 'legacy (jsonify)':
+        return jsonify(legacy_format_prediction_response(class_index, confidence)).get_data()
+    if mode == 'registry dict + json':
+        return json.dumps(CLASS_REGISTRY.response(class_index, confidence)).encode('utf-8')
+    if mode == 'registry dict + dumps':
+        return dumps(CLASS_REGISTRY.response(class_index, confidence))
+    return CLASS_REGISTRY.response_json(class_index, confidence)
+
+
+def encode_batch(mode, predictions):
+    if mode == 'legacy (jsonify)':
+        results = [
+            {'filename': f'leaf_{i}.jpg', **legacy_format_prediction_response(class_index, confidence)}
+            for i, (class_index, confidence) in enumerate(predictions)
+        ]
+        return jsonify({'success': True, 'count': len(results), 'results': results}).get_data()
+    if mode in ('registry dict + json', 'registry dict + dumps'):
+        encode = dumps if mode == 'registry dict + dumps' else lambda obj: json.dumps(obj).encode('utf-8')
+        results = [
+            {'filename': f'leaf_{i}.jpg', **CLASS_REGISTRY.response(class_index, confidence)}
+            for i, (class_index, confidence) in enumerate(predictions)
+        ]
+        return encode({'success': True, 'count': len(results), 'results': results})
+    results = [
+        CLASS_REGISTRY.response_json(class_index, confidence, filename=f'leaf_{i}.jpg')
+        for i, (class_index, confidence) in enumerate(predictions)
+    ]
+    return b'{"success":true,"count":%d,"results":[%s]}' % (len(results), b','.join(results))
+
+
+def time_mode(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=20000, help='Responses encoded per mode')
+    parser.add_argument('--batch', type=int, default=32, help='Images per /predict/batch response')
+    args = parser.parse_args()
+
+    # Classes with a treatment guide, so the legacy lookup returns the same content
+    covered = [i for i, name in enumerate(DISEASE_CLASSES) if name not in CLASS_REGISTRY.missing_treatment]
+    predictions = [(covered[i % len(covered)], 50.0 + i * 1.37) for i in range(args.batch)]
+    modes = ('legacy (jsonify)', 'registry dict + json', 'registry dict + dumps', 'pre-encoded splice')
+
+    print(f"JSON encoder for dumps(): {'orjson' if class_registry.orjson is not None else 'json'}")
+    print(f"{len(CLASS_REGISTRY.missing_treatment)} of {len(CLASS_REGISTRY)} classes have no treatment guide "
+          "(the original lookup reported them as healthy)\n")
+
+    app = Flask(__name__)
+    with app.app_context():
+        for class_index, confidence in predictions:
+            expected = json.loads(encode_single(modes[0], class_index, confidence))
+            for mode in modes[1:]:
+                assert json.loads(encode_single(mode, class_index, confidence)) == expected, mode
+        expected = json.loads(encode_batch(modes[0], predictions))
+        for mode in modes[1:]:
+            assert json.loads(encode_batch(mode, predictions)) == expected, mode
+
+        batch_iterations = max(1, args.iterations // args.batch)
+        rows = []
+        for mode in modes:
+            single = time_mode(lambda: encode_single(mode, *predictions[0]), args.iterations)
+            batch = time_mode(lambda: encode_batch(mode, predictions), batch_iterations)
+            rows.append((mode, single, batch))
+
+    baseline_single, baseline_batch = rows[0][1], rows[0][2]
+    print(f"{'mode':<24}{'/predict us':>13}{'speedup':>9}{f'batch of {args.batch} us':>18}{'speedup':>9}")
+    for mode, single, batch in rows:
+        print(f"{mode:<24}{single:>13.2f}{baseline_single / single:>8.1f}x"
+              f"{batch:>18.1f}{baseline_batch / batch:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+Startup Benchmark
+=================
+Guards how fast the web tier imports and answers its first request.
+
+Each run starts a fresh interpreter that imports the app module (app or
+asgi) and serves GET /health in-process, reporting import time, time to
+the first response and resident memory. A separate `python -X importtime`
+run breaks the import down by top-level package.
+
+Importing the app must never import an inference framework: TensorFlow,
+Keras, ONNX Runtime, TFLite and h5py are only loaded with the model
+(init_model, or the first prediction). --with-model also times that phase.
+
+Exits non-zero when a framework is imported or the median import time
+exceeds --max-import-ms, so it can run in CI.
+
+Usage:
+    python benchmarks/bench_startup.py [--module app] [--runs 5] [--max-import-ms 1500] [--with-model]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+# Loaded with the model, never by importing the app
+FRAMEWORK_MODULES = ('tensorflow', 'keras', 'onnxruntime', 'tflite_runtime', 'h5py')
+
+# (untimed setup, first request) per app module; the request runs after the import is timed
+FIRST_REQUEST = {
+    'app': ('', "app.app.test_client().get('/health')"),
+    'asgi': ('from starlette.testclient import TestClient', "TestClient(asgi.app).get('/health')"),
+}
+
+PROBE = """
+import json, sys, time
+{setup}
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+frameworks = sorted(name for name in {frameworks!r} if name in sys.modules)
+{first_request}
+responded = time.perf_counter()
+from metrics import process_rss_bytes
+result = {{
+    'import_ms': (imported - start) * 1000,
+    'first_request_ms': (responded - imported) * 1000,
+    'rss_mb': process_rss_bytes() / 2**20,
+    'frameworks': frameworks,
+    'modules': len(sys.modules)
+}}
+if {with_model}:
+    import app
+    start = time.perf_counter()
+    result['model_loaded'] = app.init_model()
+    result['init_model_ms'] = (time.perf_counter() - start) * 1000
+    result['model_rss_mb'] = process_rss_bytes() / 2**20
+print(json.dumps(result))
+"""
+
+
+def run_probe(module, with_model=False):
+    """One cold start of `module` in a fresh interpreter."""
+    setup, first_request = FIRST_REQUEST[module]
+    code = PROBE.format(module=module, setup=setup, frameworks=FRAMEWORK_MODULES,
+                        first_request=first_request, with_model=with_model)
+    output = subprocess.run(
+        [sys.executable, '-c', code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def import_breakdown(module):
+    """
+    Parse `python -X importtime` output for importing `module`.
+
+    Returns (self time per top-level package, total import time), in
+    milliseconds. Self times add up, unlike cumulative ones, so the
+    breakdown shows where the whole import goes.
+    """
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stderr
+    packages, total = defaultdict(float), 0.0
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len('import time:'):].split('|'))
+        packages[name.split('.')[0]] += int(self_us) / 1000
+        if name == module:
+            total = int(cumulative_us) / 1000
+    return packages, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='app', choices=list(FIRST_REQUEST))
+    parser.add_argument('--runs', type=int, default=5, help='Cold starts to take the median of')
+    parser.add_argument('--top', type=int, default=12, help='Packages to list in the breakdown')
+    parser.add_argument('--max-import-ms', type=float, default=1500, help='Fail above this median import time')
+    parser.add_argument('--with-model', action='store_true', help='Also time init_model (framework import, load, warm-up)')
+    parser.add_argument('--json', default=None, help='Write results to this file')
+    args = parser.parse_args()
+
+    runs = [run_probe(args.module) for _ in range(args.runs)]
+    import_ms = statistics.median(run['import_ms'] for run in runs)
+    first_request_ms = statistics.median(run['first_request_ms'] for run in runs)
+    rss_mb = statistics.median(run['rss_mb'] for run in runs)
+    frameworks = sorted({name for run in runs for name in run['frameworks']})
+
+    packages, total_ms = import_breakdown(args.module)
+    print(f"\n`import {args.module}`: {import_ms:.0f} ms (median of {args.runs} cold starts), "
+          f"first /health {first_request_ms:.1f} ms, RSS {rss_mb:.0f} MB, {runs[0]['modules']} modules\n")
+    print(f"{'package (-X importtime)':<28}{'self ms':>10}{'share':>8}")
+    for name, self_ms in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:<28}{self_ms:>10.1f}{self_ms / total_ms:>8.1%}")
+
+    result = {
+        'module': args.module,
+        'import_ms': import_ms,
+        'first_request_ms': first_request_ms,
+        'rss_mb': rss_mb,
+        'frameworks_imported': frameworks,
+        'packages_ms': dict(sorted(packages.items(), key=lambda item: -item[1])[:args.top])
+    }
+
+    if args.with_model:
+        loaded = run_probe(args.module, with_model=True)
+        result.update({key: loaded[key] for key in ('model_loaded', 'init_model_ms', 'model_rss_mb')})
+        status = 'loaded and warmed up' if loaded['model_loaded'] else 'failed to load (no model?)'
+        print(f"\ninit_model: {loaded['init_model_ms']:.0f} ms, model {status}, "
+              f"RSS {loaded['rss_mb']:.0f} -> {loaded['model_rss_mb']:.0f} MB")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+
+    failures = []
+    if frameworks:
+        failures.append(f"importing {args.module} imported {', '.join(frameworks)}")
+    if import_ms > args.max_import_ms:
+        failures.append(f"import took {import_ms:.0f} ms (budget {args.max_import_ms:.0f} ms)")
+    for failure in failures:
+        print(f"\n✗ {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"\n✓ No inference framework imported; import within {args.max_import_ms:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+Static Asset Benchmark
+======================
+Compares serving the frontend the original way (send_from_directory per
+file) with the in-memory static asset pipeline (backend/static_assets.py)
+for a first page view and a repeat view.
+
+A page view is index.html plus every /frontend/ asset it references. On a
+repeat view the browser revalidates what it must (If-None-Match) and skips
+what its cache still holds: with the original headers every file is
+revalidated; hashed assets are immutable, so only index.html is.
+
+Reports requests, bytes sent and server time per page view.
+
+Usage:
+    python benchmarks/bench_static_assets.py [--iterations 500] [--encoding br]
+"""
+
+import argparse
+import gzip
+import os
+import re
+import sys
+import time
+
+from flask import Flask, Response, request, send_from_directory
+from werkzeug.exceptions import NotFound
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from static_assets import IMMUTABLE_CACHE_CONTROL, StaticAssets, _brotli  # noqa: E402
+
+FRONTEND_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'frontend'))
+
+
+def legacy_app():
+    """The original frontend routes, kept here as the baseline."""
+    app = Flask(__name__)
+
+    @app.route('/')
+    def root():
+        return send_from_directory(FRONTEND_DIR, 'index.html')
+
+    @app.route('/frontend/<path:filename>')
+    def assets(filename):
+        return send_from_directory(FRONTEND_DIR, filename)
+
+    return app
+
+
+def pipeline_app():
+    """The same routes backed by StaticAssets, as in app.py."""
+    app = Flask(__name__)
+    static_assets = StaticAssets(FRONTEND_DIR)
+
+    def respond(filename):
+        result = static_assets.respond(
+            filename, request.headers.get('If-None-Match'), request.headers.get('Accept-Encoding')
+        )
+        if result is None:
+            raise NotFound()
+        status, headers, body = result
+        return Response(body, status=status, headers=headers)
+
+    app.add_url_rule('/', 'root', lambda: respond('index.html'))
+    app.add_url_rule('/frontend/<path:filename>', 'assets', respond)
+    return app
+
+
+def page_view(client, encoding, cache=None):
+    """
+    Fetch index.html and its assets like a browser with `cache` ({url: etag}).
+
+    Returns (requests, bytes sent, updated cache).
+    """
+    cache = dict(cache or {})
+    headers = {'Accept-Encoding': encoding}
+    requests, sent = 0, 0
+
+    def fetch(url):
+        nonlocal requests, sent
+        request_headers = dict(headers)
+        if url in cache:
+            request_headers['If-None-Match'] = cache[url]
+        response = client.get(url, headers=request_headers)
+        requests += 1
+        sent += len(response.data)
+        if response.headers.get('ETag'):
+            cache[url] = response.headers['ETag']
+        return response
+
+    index = fetch('/')
+    html = index.data
+    if index.status_code == 304:
+        html = cache['/html']
+    elif index.headers.get('Content-Encoding') == 'br':
+        html = _brotli().decompress(html)
+    elif index.headers.get('Content-Encoding') == 'gzip':
+        html = gzip.decompress(html)
+    cache['/html'] = html
+
+    for url in re.findall(rb'/frontend/[\w.\-]+', html):
+        url = url.decode()
+        if cache.get(f'{url}:immutable'):
+            continue
+        response = fetch(url)
+        if response.headers.get('Cache-Control') == IMMUTABLE_CACHE_CONTROL:
+            cache[f'{url}:immutable'] = True
+    return requests, sent, cache
+
+
+def measure(app, encoding, iterations):
+    client = app.test_client()
+    first_requests, first_bytes, cache = page_view(client, encoding)
+    repeat_requests, repeat_bytes, _ = page_view(client, encoding, cache)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        page_view(client, encoding)
+    first_us = (time.perf_counter() - start) / iterations * 1e6
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        page_view(client, encoding, cache)
+    repeat_us = (time.perf_counter() - start) / iterations * 1e6
+    return (first_requests, first_bytes, first_us), (repeat_requests, repeat_bytes, repeat_us)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=500, help='Page views timed per mode')
+    parser.add_argument('--encoding', default='br' if _brotli() is not None else 'gzip',
+                        help='Accept-Encoding the client sends')
+    args = parser.parse_args()
+
+    print(f"\nAccept-Encoding: {args.encoding}; server time includes the Flask test client\n")
+    print(f"{'mode':<22}{'view':<8}{'requests':>9}{'bytes':>9}{'us/view':>10}")
+    for mode, app in (('send_from_directory', legacy_app()), ('static asset pipeline', pipeline_app())):
+        first, repeat = measure(app, args.encoding, args.iterations)
+        for view, (requests, sent, us) in (('first', first), ('repeat', repeat)):
+            print(f"{mode:<22}{view:<8}{requests:>9}{sent:>9}{us:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
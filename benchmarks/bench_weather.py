@@ -0,0 +1,172 @@
+"""
+Weather Lookup Benchmark
+========================
+Runs the weather service against a local stub of wttr.in and compares it
+with the original uncached lookup (a new connection per request).
+
+The stub answers with wttr.in-shaped JSON after a fixed delay and counts
+upstream requests, so cache hits, coalescing and stale-while-revalidate
+can be checked without network access.
+
+Usage:
+    python benchmarks/bench_weather.py [--clients 200] [--farms 20] [--delay-ms 300]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from weather import AsyncWeatherService, WeatherService, weather_response  # noqa: E402
+
+
+class StubWeatherServer(ThreadingHTTPServer):
+    """Local stand-in for wttr.in that counts requests."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, delay_ms=300, humidity=75):
+        super().__init__(('127.0.0.1', 0), _StubHandler)
+        self.delay = delay_ms / 1000.0
+        self.humidity = humidity
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/'
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        with self.server._lock:
+            self.server.requests += 1
+        time.sleep(self.server.delay)
+        body = json.dumps({'current_condition': [{
+            'temp_C': '27', 'humidity': str(self.server.humidity), 'weatherDesc': [{'value': 'Partly cloudy'}]
+        }]}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def farm_locations(farms, clients, seed=42):
+    """Client coordinates scattered within ~2 km of a few farm centres."""
+    rng = np.random.default_rng(seed)
+    centres = rng.uniform([8, 70], [30, 90], size=(farms, 2))
+    picks = centres[rng.integers(0, farms, clients)]
+    return picks + rng.uniform(-0.01, 0.01, size=picks.shape)
+
+
+def uncached_lookup(url, lat, lon):
+    """The original handler: one new connection and upstream call per request."""
+    response = requests.get(url, params={'format': 'j1', 'lat': lat, 'lon': lon}, timeout=5)
+    response.raise_for_status()
+    return weather_response(response.json())
+
+
+def run_threads(lookup, locations, concurrency):
+    def timed(location):
+        start = time.perf_counter()
+        lookup(*location)
+        return (time.perf_counter() - start) * 1000.0
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(timed, locations))
+
+
+async def run_async(service, locations):
+    async def timed(location):
+        start = time.perf_counter()
+        await service.get(*location)
+        return (time.perf_counter() - start) * 1000.0
+
+    return await asyncio.gather(*(timed(location) for location in locations))
+
+
+def report(name, timings, upstream, elapsed):
+    print(f"{name:<22}{len(timings):>9}{upstream:>10}{np.percentile(timings, 50):>10.1f}"
+          f"{np.percentile(timings, 95):>10.1f}{len(timings) / elapsed:>10.1f}")
+
+
+def measure(name, server, run):
+    before = server.requests
+    start = time.perf_counter()
+    timings = run()
+    report(name, timings, server.requests - before, time.perf_counter() - start)
+
+
+def check_stale_while_revalidate(server):
+    """A stale entry is served at once and refreshed by one background call."""
+    service = WeatherService(api_url=server.url, ttl=0.2, stale_ttl=60)
+    service.get(12.97, 77.59)
+    time.sleep(0.3)
+    start = time.perf_counter()
+    service.get(12.97, 77.59)
+    stale_ms = (time.perf_counter() - start) * 1000.0
+    time.sleep(server.delay + 0.2)
+    stats = service.stats()
+    service.close()
+    print(f"\nStale-while-revalidate: stale hit served in {stale_ms:.1f} ms, "
+          f"{stats['upstream_calls']} upstream calls, {stats['stale_hits']} stale hits")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark cached weather lookups against a stub server')
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--farms', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--delay-ms', type=float, default=300)
+    args = parser.parse_args()
+
+    server = StubWeatherServer(args.delay_ms).start()
+    locations = [tuple(location) for location in farm_locations(args.farms, args.clients)]
+
+    print(f"{args.clients} lookups around {args.farms} farms, upstream delay {args.delay_ms:.0f} ms\n")
+    print(f"{'mode':<22}{'lookups':>9}{'upstream':>10}{'p50 ms':>10}{'p95 ms':>10}{'req/s':>10}")
+
+    measure('uncached', server, lambda: run_threads(
+        lambda lat, lon: uncached_lookup(server.url, lat, lon), locations, args.concurrency))
+
+    service = WeatherService(api_url=server.url)
+    measure('service (cold)', server, lambda: run_threads(service.get, locations, args.concurrency))
+    measure('service (warm)', server, lambda: run_threads(service.get, locations, args.concurrency))
+    service.close()
+
+    async def run_async_service():
+        service = AsyncWeatherService(api_url=server.url)
+        try:
+            return await run_async(service, locations)
+        finally:
+            await service.aclose()
+
+    measure('async service (cold)', server, lambda: asyncio.run(run_async_service()))
+
+    check_stale_while_revalidate(server)
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
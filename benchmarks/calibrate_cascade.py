@@ -0,0 +1,175 @@
+"""
+Cascade Threshold Calibration
+=============================
+Picks CASCADE_THRESHOLD for cascade inference (see CascadeBackend in
+backend/inference_backends.py).
+
+The first-stage model and the full model both run over labelled images.
+The chosen threshold is the lowest one whose accuracy stays within
+--max-accuracy-drop of the full model alone. The lowest threshold means the
+most images are answered by the first stage. The threshold is chosen on one
+part of the images and checked on the held-out rest (--holdout).
+
+Without --dataset, the full model's own predictions serve as labels, so the
+accuracy drop is the rate at which the cascade disagrees with it.
+
+Reports the escalation rate, accuracy and expected per-image latency for
+each candidate threshold. Expected latency is the first stage plus the
+escalation rate times the full model, from measured single-image latencies.
+The cascade is then timed end to end at the chosen threshold.
+
+Usage:
+    python benchmarks/calibrate_cascade.py [--dataset ./dataset] [--samples 500]
+                                           [--max-accuracy-drop 0.005] [--backend keras]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from compare_backends import load_dataset_images, measure_latency, predict_all, synthetic_images  # noqa: E402
+from inference_backends import CASCADE_ARTIFACTS, CascadeBackend, create_backend  # noqa: E402
+
+
+def cascade_outcomes(first_probabilities, second_top1, labels, thresholds):
+    """Escalation rate and accuracy of the cascade at each threshold."""
+    confidence = first_probabilities.max(axis=1)
+    first_top1 = first_probabilities.argmax(axis=1)
+    rows = []
+    for threshold in thresholds:
+        escalate = confidence < threshold
+        top1 = np.where(escalate, second_top1, first_top1)
+        rows.append({
+            'threshold': float(threshold),
+            'escalation_rate': float(escalate.mean()),
+            'accuracy': float(np.mean(top1 == labels))
+        })
+    return rows
+
+
+def choose_threshold(rows, full_accuracy, max_accuracy_drop):
+    """The lowest threshold (rows ascending) within the allowed accuracy drop."""
+    for row in rows:
+        if full_accuracy - row['accuracy'] <= max_accuracy_drop:
+            return row
+    return rows[-1]
+
+
+def measure_cascade(cascade, images):
+    """Mean single-image latency (ms) and escalation rate of the cascade end to end."""
+    cascade.predict(images[:1])
+    images_before, escalated_before = cascade.images, cascade.escalated
+    start = time.perf_counter()
+    for i in range(len(images)):
+        cascade.predict(images[i:i + 1])
+    elapsed_ms = (time.perf_counter() - start) * 1000.0
+    escalation_rate = (cascade.escalated - escalated_before) / (cascade.images - images_before)
+    return elapsed_ms / len(images), escalation_rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Calibrate the cascade inference threshold')
+    parser.add_argument('--backend', default='keras', choices=list(CASCADE_ARTIFACTS))
+    parser.add_argument('--model', default=None, help="Full model (defaults to the backend's standard artifact)")
+    parser.add_argument('--first-stage', default=None, help='First-stage model (defaults to CASCADE_ARTIFACTS)')
+    parser.add_argument('--dataset', default=None)
+    parser.add_argument('--samples', type=int, default=500)
+    parser.add_argument('--holdout', type=float, default=0.3, help='Fraction of images kept to check the threshold')
+    parser.add_argument('--max-accuracy-drop', type=float, default=0.005,
+                        help='Allowed top-1 accuracy loss versus the full model (0.005 = 0.5 points)')
+    parser.add_argument('--step', type=float, default=0.01, help='Threshold grid step')
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--json', default=None, help='Write results to this file')
+    args = parser.parse_args()
+
+    second = create_backend(args.backend, args.model, num_threads=args.threads)
+    first = create_backend(args.backend, args.first_stage or CASCADE_ARTIFACTS[args.backend], num_threads=args.threads)
+
+    if args.dataset:
+        images, labels = load_dataset_images(args.dataset, args.samples)
+    else:
+        images, labels = synthetic_images(args.samples, second.img_size)
+
+    first_probabilities = predict_all(first, images, args.batch_size)
+    second_top1 = predict_all(second, images, args.batch_size).argmax(axis=1)
+    if labels is None:
+        labels = second_top1
+
+    # Calibrate on one part of the images, check on the rest
+    order = np.random.default_rng(42).permutation(len(images))
+    split = max(1, int(len(images) * (1 - args.holdout)))
+    calibration, holdout = order[:split], order[split:]
+
+    # Candidate thresholds; the last one escalates every image
+    thresholds = np.append(np.arange(0.0, 1.0, args.step), 1.0 + args.step)
+    full_accuracy = float(np.mean(second_top1[calibration] == labels[calibration]))
+    first_accuracy = float(np.mean(first_probabilities[calibration].argmax(axis=1) == labels[calibration]))
+    rows = cascade_outcomes(first_probabilities[calibration], second_top1[calibration], labels[calibration], thresholds)
+    chosen = choose_threshold(rows, full_accuracy, args.max_accuracy_drop)
+
+    first_p50, _ = measure_latency(first, images, args.iterations)
+    second_p50, _ = measure_latency(second, images, args.iterations)
+    for row in rows:
+        row['expected_latency_ms'] = first_p50 + row['escalation_rate'] * second_p50
+
+    source = f'dataset {args.dataset}' if args.dataset else "synthetic images, full model's predictions as labels"
+    print(f"\n{len(calibration)} calibration / {len(holdout)} held-out images from {source}")
+    print(f"Full model accuracy {full_accuracy:.3f} ({second_p50:.2f} ms/image), "
+          f"first stage alone {first_accuracy:.3f} ({first_p50:.2f} ms/image)\n")
+    print(f"{'threshold':>10}{'escalated':>11}{'accuracy':>10}{'drop':>8}{'exp. ms':>9}")
+    shown = {round(t, 2) for t in np.arange(0.0, 1.0, 0.1)} | {chosen['threshold']}
+    for row in rows:
+        if round(row['threshold'], 2) in shown or row is rows[-1]:
+            marker = '  <- chosen' if row is chosen else ''
+            print(f"{row['threshold']:>10.2f}{row['escalation_rate']:>11.1%}{row['accuracy']:>10.3f}"
+                  f"{full_accuracy - row['accuracy']:>8.3f}{row['expected_latency_ms']:>9.2f}{marker}")
+
+    result = {
+        'backend': args.backend,
+        'max_accuracy_drop': args.max_accuracy_drop,
+        'threshold': chosen['threshold'],
+        'full_model_ms': second_p50,
+        'first_stage_ms': first_p50,
+        'calibration': {
+            'images': len(calibration),
+            'full_accuracy': full_accuracy,
+            'first_stage_accuracy': first_accuracy,
+            **chosen
+        },
+        'thresholds': rows
+    }
+
+    if len(holdout):
+        check = cascade_outcomes(first_probabilities[holdout], second_top1[holdout], labels[holdout],
+                                 [chosen['threshold']])[0]
+        holdout_full = float(np.mean(second_top1[holdout] == labels[holdout]))
+        cascade_ms, escalation_rate = measure_cascade(CascadeBackend(first, second, chosen['threshold']),
+                                                      images[holdout])
+        result['holdout'] = {
+            'images': len(holdout),
+            'full_accuracy': holdout_full,
+            'accuracy': check['accuracy'],
+            'escalation_rate': escalation_rate,
+            'cascade_ms': cascade_ms
+        }
+        print(f"\nHeld-out check at {chosen['threshold']:.2f}: accuracy {check['accuracy']:.3f} "
+              f"(full model {holdout_full:.3f}), {escalation_rate:.1%} escalated, "
+              f"{cascade_ms:.2f} ms/image end to end vs {second_p50:.2f} ms full model")
+
+    print(f"\nSet CASCADE_ENABLED=true CASCADE_THRESHOLD={chosen['threshold']:.2f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Inference Backend Comparison
+============================
+Measures accuracy parity, latency and throughput of every available
+inference backend against the Keras reference model.
+
+Evaluation images come from a PlantVillage-style dataset directory when
+given (enabling true accuracy), otherwise from synthetic images (parity
+against the Keras model only).
+
+Usage:
+    python benchmarks/compare_backends.py [--dataset ./dataset] [--samples 200]
+                                          [--backends keras tflite_fp16 tflite_int8]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from class_registry import DISEASE_CLASSES  # noqa: E402
+from inference_backends import BACKEND_ARTIFACTS, create_backend  # noqa: E402
+from preprocessing import new_batch_buffer, preprocess_image  # noqa: E402
+
+
+def load_dataset_images(dataset_path, samples, seed=42):
+    """Sample labelled images from class subdirectories."""
+    paths = []
+    for class_index, disease_class in enumerate(DISEASE_CLASSES):
+        class_path = os.path.join(dataset_path, disease_class)
+        if os.path.isdir(class_path):
+            paths.extend((os.path.join(class_path, name), class_index) for name in sorted(os.listdir(class_path)))
+
+    rng = np.random.default_rng(seed)
+    chosen = rng.choice(len(paths), min(samples, len(paths)), replace=False)
+    images = new_batch_buffer(len(chosen))
+    labels = np.empty(len(chosen), dtype=np.int64)
+    for row, i in enumerate(chosen):
+        preprocess_image(paths[i][0], out=images[row])
+        labels[row] = paths[i][1]
+    return images, labels
+
+
+def synthetic_images(samples, img_size, seed=42):
+    """Random leaf-coloured images for parity checks without a dataset."""
+    rng = np.random.default_rng(seed)
+    images = rng.uniform(0, 255, size=(samples, img_size, img_size, 3)).astype(np.float32)
+    images[..., 1] = np.maximum(images[..., 1], 96)
+    return images, None
+
+
+def predict_all(backend, images, batch_size):
+    return np.concatenate([
+        backend.predict(images[start:start + batch_size])
+        for start in range(0, len(images), batch_size)
+    ], axis=0)
+
+
+def measure_latency(backend, images, iterations):
+    """Per-call latency for single-image requests, in milliseconds."""
+    backend.predict(images[:1])
+    timings = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        backend.predict(images[i % len(images):i % len(images) + 1])
+        timings.append((time.perf_counter() - start) * 1000.0)
+    return float(np.percentile(timings, 50)), float(np.percentile(timings, 95))
+
+
+def measure_throughput(backend, images, batch_size):
+    """Images per second at the given batch size."""
+    backend.predict(images[:batch_size])
+    start = time.perf_counter()
+    predict_all(backend, images, batch_size)
+    return len(images) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare inference backends')
+    parser.add_argument('--backends', nargs='+', default=list(BACKEND_ARTIFACTS))
+    parser.add_argument('--dataset', default=None)
+    parser.add_argument('--samples', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--json', default=None, help='Write results to this file')
+    args = parser.parse_args()
+
+    backends = {}
+    for name in args.backends:
+        try:
+            backends[name] = create_backend(name, num_threads=args.threads)
+        except FileNotFoundError as e:
+            print(f"⚠️  Skipping {name}: {e}")
+    if not backends:
+        print("No backend artifacts found. Train and export the model first.")
+        return
+
+    reference_name = 'keras' if 'keras' in backends else next(iter(backends))
+    reference = backends[reference_name]
+    if args.dataset:
+        images, labels = load_dataset_images(args.dataset, args.samples)
+    else:
+        images, labels = synthetic_images(args.samples, reference.img_size)
+    reference_top1 = predict_all(reference, images, args.batch_size).argmax(axis=1)
+
+    results = []
+    for name, backend in backends.items():
+        probabilities = predict_all(backend, images, args.batch_size)
+        top1 = probabilities.argmax(axis=1)
+        p50, p95 = measure_latency(backend, images, args.iterations)
+        results.append({
+            'backend': name,
+            'artifact_mb': os.path.getsize(backend.model_path) / (1024 * 1024),
+            'agreement': float(np.mean(top1 == reference_top1)),
+            'accuracy': float(np.mean(top1 == labels)) if labels is not None else None,
+            'latency_p50_ms': p50,
+            'latency_p95_ms': p95,
+            'throughput_ips': measure_throughput(backend, images, args.batch_size)
+        })
+
+    source = f'dataset {args.dataset}' if args.dataset else 'synthetic images'
+    print(f"\n{len(images)} images from {source}; agreement is top-1 match with {reference_name}\n")
+    print(f"{'backend':<14}{'size MB':>9}{'agree':>8}{'acc':>8}{'p50 ms':>9}{'p95 ms':>9}{'img/s':>9}")
+    for r in results:
+        accuracy = f"{r['accuracy']:.3f}" if r['accuracy'] is not None else '-'
+        print(f"{r['backend']:<14}{r['artifact_mb']:>9.2f}{r['agreement']:>8.3f}{accuracy:>8}"
+              f"{r['latency_p50_ms']:>9.2f}{r['latency_p95_ms']:>9.2f}{r['throughput_ips']:>9.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,21 @@
+"""
+API Load Test Suite
+===================
+Drives /predict, /info and /health with synthetic leaf images and reports
+p50/p95/p99 latency, throughput and errors per endpoint.
+
+Targets:
+- in-process: the Flask app through its test client (no network, one process)
+- live: a running server (--url), or a local Gunicorn started for the run
+  (--live, with --workers/--threads like the Dockerfile)
+
+Without --model a MobileNetV2 stand-in is built with create_model() from
+model/train_model.py on random weights, so the suite runs offline.
+Results are written as JSON (--output) and can be compared with an earlier
+run (--baseline).
+
+Usage (from the repository root):
+    python -m benchmarks.loadtest [--requests 200] [--concurrency 8]
+    python -m benchmarks.loadtest --live --workers 4 --output after.json --baseline before.json
+    python -m benchmarks.loadtest --url http://localhost:5000 --endpoints predict
+"""
@@ -0,0 +1,109 @@
+"""Command-line entry point: python -m benchmarks.loadtest --help"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from contextlib import ExitStack
+
+from .drivers import REPO_DIR, FlaskDriver, HttpDriver, build_stand_in_model, local_server
+from .images import image_pool
+from .runner import print_comparison, print_results, run_endpoint
+
+ENDPOINTS = ('health', 'info', 'predict')
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.loadtest', description='Load test the API')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--url', help='Test a running server instead of the in-process Flask app')
+    target.add_argument('--live', action='store_true', help='Start a local Gunicorn server for the run')
+    parser.add_argument('--workers', type=int, default=2, help='Gunicorn workers for --live')
+    parser.add_argument('--threads', type=int, default=8, help='Threads per Gunicorn worker for --live')
+    parser.add_argument('--model', help='Model to serve (default: random-weight stand-in from create_model)')
+    parser.add_argument('--endpoints', nargs='+', choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent client threads')
+    parser.add_argument('--images', type=int, default=24, help='Distinct synthetic images to upload')
+    parser.add_argument('--allow-cache', action='store_true',
+                        help='Re-upload identical bytes so the prediction cache can answer')
+    parser.add_argument('--label', help='Name for this run in the JSON output')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--baseline', help='Compare with a JSON file from an earlier run')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    with ExitStack() as stack:
+        model_path = args.model
+        if model_path is None and args.url is None:
+            workdir = stack.enter_context(tempfile.TemporaryDirectory(prefix='crop-loadtest-'))
+            print("Building stand-in model (create_model, random weights)...")
+            model_path = build_stand_in_model(os.path.join(workdir, 'stand_in_model.h5'))
+
+        if args.url:
+            driver = HttpDriver(args.url)
+        elif args.live:
+            print(f"Starting Gunicorn with {args.workers} workers x {args.threads} threads...")
+            driver = HttpDriver(stack.enter_context(local_server(os.path.abspath(model_path), args.workers, args.threads)))
+        else:
+            driver = FlaskDriver(os.path.abspath(model_path))
+
+        pool = image_pool(args.images) if 'predict' in args.endpoints else []
+        print(f"\nTarget: {args.url or driver.name}, {args.requests} requests per endpoint, "
+              f"concurrency {args.concurrency}, {len(pool)} synthetic images\n")
+
+        results = [
+            run_endpoint(driver, endpoint, args.requests, args.concurrency, pool, unique=not args.allow_cache)
+            for endpoint in args.endpoints
+        ]
+
+    print_results(results)
+
+    report = {
+        'config': {
+            'label': args.label,
+            'target': args.url or driver.name,
+            'workers': args.workers if args.live else None,
+            'threads': args.threads if args.live else None,
+            'model': args.model or 'stand-in',
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'images': args.images,
+            'allow_cache': args.allow_cache
+        },
+        'environment': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count()
+        },
+        'results': results
+    }
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            print_comparison(results, json.load(f))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
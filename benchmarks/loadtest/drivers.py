@@ -0,0 +1,124 @@
+"""Request drivers: the Flask test client, a live HTTP server, and a local Gunicorn launcher."""
+
+import io
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+BACKEND_DIR = os.path.join(REPO_DIR, 'backend')
+MODEL_DIR = os.path.join(REPO_DIR, 'model')
+
+
+def build_stand_in_model(path):
+    """Save the production architecture (create_model) with random weights to `path`."""
+    sys.path.insert(0, MODEL_DIR)
+    from train_model import DISEASE_CLASSES, create_model
+
+    create_model(len(DISEASE_CLASSES), weights=None).save(path)
+    return path
+
+
+class FlaskDriver:
+    """In-process requests through the Flask test client (one client per thread)."""
+
+    name = 'in-process'
+
+    def __init__(self, model_path):
+        # The app reads its configuration at import time
+        os.environ['MODEL_PATH'] = model_path
+        os.environ.setdefault('INFERENCE_BACKEND', 'keras')
+        sys.path.insert(0, BACKEND_DIR)
+        import app as api
+
+        if not api.init_model():
+            raise RuntimeError(f'Could not load model from {model_path}')
+        self.app = api.app
+        self._local = threading.local()
+
+    def request(self, endpoint, upload=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        if endpoint == 'predict':
+            filename, data, content_type = upload
+            response = client.post('/predict', data={'file': (io.BytesIO(data), filename, content_type)},
+                                   content_type='multipart/form-data')
+        else:
+            response = client.get(f'/{endpoint}')
+        return response.status_code
+
+
+class HttpDriver:
+    """Requests to a live server over pooled HTTP connections (one session per thread)."""
+
+    name = 'live'
+
+    def __init__(self, url, timeout=60):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def request(self, endpoint, upload=None):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        if endpoint == 'predict':
+            response = session.post(f'{self.url}/predict', files={'file': upload}, timeout=self.timeout)
+        else:
+            response = session.get(f'{self.url}/{endpoint}', timeout=self.timeout)
+        return response.status_code
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _ready_workers(url):
+    """Workers reporting a warmed-up model in /metrics."""
+    try:
+        text = requests.get(f'{url}/metrics', timeout=2).text
+    except requests.exceptions.RequestException:
+        return 0
+    return sum(1 for line in text.splitlines() if line.startswith('crop_model_ready{') and line.endswith(' 1'))
+
+
+@contextmanager
+def local_server(model_path, workers, threads, startup_timeout=300):
+    """
+    Run backend/app.py under Gunicorn (backend/gunicorn.conf.py) on a free
+    port and yield its URL once every worker has loaded the model.
+    """
+    url = f'http://127.0.0.1:{_free_port()}'
+    env = {
+        **os.environ,
+        'BIND': url.split('//')[1],
+        'WEB_CONCURRENCY': str(workers),
+        'WORKER_THREADS': str(threads),
+        'MODEL_PATH': model_path,
+    }
+    env.pop('METRICS_DIR', None)
+    log = open(os.path.join(os.path.dirname(model_path), 'gunicorn.log'), 'w')
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+                              cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        deadline = time.monotonic() + startup_timeout
+        while _ready_workers(url) < workers:
+            if server.poll() is not None:
+                raise RuntimeError(f'Gunicorn exited with code {server.returncode}; see {log.name}')
+            if time.monotonic() > deadline:
+                raise RuntimeError(f'Workers not ready after {startup_timeout}s; see {log.name}')
+            time.sleep(1)
+        yield url
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        log.close()
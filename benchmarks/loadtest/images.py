@@ -0,0 +1,78 @@
+"""Synthetic leaf images of varied sizes and formats."""
+
+import io
+import math
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+# (width, height): thumbnail, web upload, phone photo, 12 MP camera
+IMAGE_SIZES = ((320, 240), (800, 600), (1600, 1200), (4000, 3000))
+IMAGE_FORMATS = (('JPEG', 'jpg', 'image/jpeg'), ('PNG', 'png', 'image/png'), ('GIF', 'gif', 'image/gif'))
+
+
+def synthetic_leaf(width, height, seed):
+    """A green leaf with veins and brown lesions on a soil-coloured background."""
+    rng = np.random.default_rng(seed)
+    background = tuple(int(c) for c in rng.integers([70, 50, 30], [130, 100, 70]))
+    img = Image.new('RGB', (width, height), background)
+    draw = ImageDraw.Draw(img)
+
+    cx, cy = width / 2, height / 2
+    rx, ry = width * rng.uniform(0.3, 0.45), height * rng.uniform(0.25, 0.4)
+    leaf = tuple(int(c) for c in rng.integers([30, 110, 20], [80, 190, 70]))
+    draw.ellipse([cx - rx, cy - ry, cx + rx, cy + ry], fill=leaf)
+
+    vein = tuple(min(255, c + 50) for c in leaf)
+    line_width = max(1, width // 200)
+    draw.line([cx - rx, cy, cx + rx, cy], fill=vein, width=line_width * 2)
+    for offset in np.linspace(-0.7, 0.7, 7):
+        x = cx + offset * rx
+        draw.line([x, cy, x + 0.3 * rx * math.copysign(1, offset or 1), cy - 0.7 * ry], fill=vein, width=line_width)
+        draw.line([x, cy, x + 0.3 * rx * math.copysign(1, offset or 1), cy + 0.7 * ry], fill=vein, width=line_width)
+
+    for _ in range(int(rng.integers(0, 12))):
+        x, y = cx + rng.uniform(-0.7, 0.7) * rx, cy + rng.uniform(-0.6, 0.6) * ry
+        r = rng.uniform(0.01, 0.04) * width
+        spot = tuple(int(c) for c in rng.integers([90, 50, 10], [150, 90, 40]))
+        draw.ellipse([x - r, y - r, x + r, y + r], fill=spot)
+
+    # Camera-like texture so encoded sizes are realistic
+    noise = rng.normal(0, 6, size=(height, width, 3))
+    pixels = np.clip(np.asarray(img, dtype=np.float32) + noise, 0, 255).astype(np.uint8)
+    return Image.fromarray(pixels).filter(ImageFilter.SMOOTH)
+
+
+def image_pool(count, sizes=IMAGE_SIZES, formats=IMAGE_FORMATS, seed=42, max_bytes=10 * 1024 * 1024):
+    """
+    `count` encoded images cycling through every size and format.
+
+    Images that would exceed `max_bytes` (the API's upload limit) in a
+    lossless format are encoded as JPEG instead, as a camera would.
+    Returns (filename, bytes, content type) tuples.
+    """
+    pool = []
+    for i in range(count):
+        width, height = sizes[i % len(sizes)]
+        fmt, extension, content_type = formats[(i // len(sizes)) % len(formats)]
+        image = synthetic_leaf(width, height, seed + i)
+        buffer = io.BytesIO()
+        if fmt != 'JPEG':
+            image.save(buffer, fmt)
+        if fmt == 'JPEG' or buffer.tell() > max_bytes:
+            fmt, extension, content_type = IMAGE_FORMATS[0]
+            buffer = io.BytesIO()
+            image.save(buffer, fmt, quality=90)
+        pool.append((f'leaf_{i:03d}_{width}x{height}.{extension}', buffer.getvalue(), content_type))
+    return pool
+
+
+def unique_upload(upload, sequence):
+    """
+    Make an upload byte-unique by appending a trailer after the image data.
+
+    Decoders ignore bytes after the end-of-image marker, but the prediction
+    cache keys on the raw bytes, so every request runs the full pipeline.
+    """
+    filename, data, content_type = upload
+    return filename, data + b'\0loadtest-%08d' % sequence, content_type
@@ -0,0 +1,96 @@
+"""Concurrent request runner and latency statistics."""
+
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .images import unique_upload
+
+
+def run_endpoint(driver, endpoint, requests, concurrency, pool, unique=True, warmup=5):
+    """
+    Send `requests` requests to `endpoint` from `concurrency` threads.
+
+    /predict uploads cycle through `pool`; with `unique` every upload is
+    byte-unique so the prediction cache never answers. Returns the summary
+    from `summarize`.
+    """
+    def upload_for(sequence):
+        if endpoint != 'predict':
+            return None
+        upload = pool[sequence % len(pool)]
+        return unique_upload(upload, sequence) if unique else upload
+
+    def send(sequence):
+        upload = upload_for(sequence)
+        start = time.perf_counter()
+        try:
+            status, error = driver.request(endpoint, upload), None
+        except Exception as e:
+            status, error = None, type(e).__name__
+        return (time.perf_counter() - start) * 1000.0, status, error
+
+    for sequence in range(warmup):
+        send(requests + sequence)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        start = time.perf_counter()
+        results = list(executor.map(send, range(requests)))
+        elapsed = time.perf_counter() - start
+
+    return summarize(endpoint, results, elapsed, concurrency)
+
+
+def summarize(endpoint, results, elapsed, concurrency):
+    """Latency percentiles (ms), throughput and error counts for one endpoint."""
+    latencies = np.array([latency for latency, _, _ in results])
+    statuses = Counter(str(status) for _, status, error in results if error is None)
+    exceptions = Counter(error for _, _, error in results if error is not None)
+    errors = sum(count for status, count in statuses.items() if status != '200') + sum(exceptions.values())
+    return {
+        'endpoint': endpoint,
+        'requests': len(results),
+        'concurrency': concurrency,
+        'duration_s': elapsed,
+        'throughput_rps': len(results) / elapsed,
+        'errors': errors,
+        'error_rate': errors / len(results),
+        'status_codes': dict(statuses),
+        'exceptions': dict(exceptions),
+        'latency_ms': {
+            'mean': float(latencies.mean()),
+            'p50': float(np.percentile(latencies, 50)),
+            'p95': float(np.percentile(latencies, 95)),
+            'p99': float(np.percentile(latencies, 99)),
+            'max': float(latencies.max())
+        }
+    }
+
+
+def print_results(results):
+    print(f"{'endpoint':<10}{'requests':>9}{'conc':>6}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for r in results:
+        latency = r['latency_ms']
+        print(f"{r['endpoint']:<10}{r['requests']:>9}{r['concurrency']:>6}{r['throughput_rps']:>9.1f}"
+              f"{latency['p50']:>9.1f}{latency['p95']:>9.1f}{latency['p99']:>9.1f}{r['errors']:>8}")
+
+
+def print_comparison(results, baseline):
+    """Relative change of each endpoint against a baseline run (negative latency change is better)."""
+    previous = {r['endpoint']: r for r in baseline['results']}
+    print(f"\nChange vs baseline ({baseline['config'].get('label') or 'previous run'}):")
+    print(f"{'endpoint':<10}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'errors':>8}")
+
+    def change(new, old):
+        return f"{(new - old) / old * 100:+.1f}%" if old else 'n/a'
+
+    for r in results:
+        old = previous.get(r['endpoint'])
+        if old is None:
+            continue
+        latency, old_latency = r['latency_ms'], old['latency_ms']
+        print(f"{r['endpoint']:<10}{change(r['throughput_rps'], old['throughput_rps']):>9}"
+              f"{change(latency['p50'], old_latency['p50']):>9}{change(latency['p95'], old_latency['p95']):>9}"
+              f"{change(latency['p99'], old_latency['p99']):>9}{r['errors'] - old['errors']:>+8}")
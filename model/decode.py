@@ -0,0 +1,32 @@
+"""
+AI Crop Disease Detector - Image Decoding Workers
+=================================================
+Decodes training images in worker processes (see train_model.decode_images).
+
+This module must stay free of TensorFlow. Workers also re-run the
+training script as __mp_main__, which skips its TensorFlow imports there
+(see train_model.IN_DECODE_WORKER), so a pool of decode workers costs a
+few MB each instead of a TensorFlow runtime apiece.
+"""
+
+import numpy as np
+from PIL import Image
+
+
+def read_image(path, img_size):
+    """Decode and resize one image file to a uint8 array, like the serving code."""
+    with Image.open(path) as img:
+        img.draft('RGB', (img_size, img_size))
+        return np.asarray(img.convert('RGB').resize((img_size, img_size)), dtype=np.uint8)
+
+
+def decode_chunk(paths, img_size):
+    """Worker task: decode a chunk of images, returning (image, error) pairs."""
+    results = []
+    for path in paths:
+        try:
+            results.append((read_image(path, img_size), None))
+        except Exception as e:
+            results.append((None, f'{type(e).__name__}: {e}'))
+    return results
+
@@ -10,15 +10,34 @@ Architecture: MobileNetV2 + Custom Dense Layers
 """
 
 import os
+import sys
+import argparse
+import hashlib
+import json
+import multiprocessing as mp
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-import tensorflow as tf
-from tensorflow import keras
-from tensorflow.keras import layers, models
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
-from tensorflow.keras.applications import MobileNetV2
-from tensorflow.keras.optimizers import Adam
-from sklearn.model_selection import train_test_split
 import warnings
+
+# Image decode workers (see decode_images) re-run this script as __mp_main__
+# under forkserver/spawn but only call into decode.py, so they skip TensorFlow
+IN_DECODE_WORKER = __name__ == '__mp_main__'
+if not IN_DECODE_WORKER:
+    import tensorflow as tf
+    from tensorflow import keras
+    from tensorflow.keras import layers, models
+    from tensorflow.keras.applications import MobileNetV2
+    from tensorflow.keras.optimizers import Adam
+
+# Disease classes are shared with the API so class ids match between training
+# and serving (adjust backend/class_registry.py to your dataset)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from class_registry import CLASS_NAMES_FILE, DISEASE_CLASSES
+from decode import decode_chunk, read_image
+
 warnings.filterwarnings('ignore')
 
 # =====================================================
@@ -29,57 +48,53 @@ BATCH_SIZE = 32
 EPOCHS = 20
 LEARNING_RATE = 0.0001
 VALIDATION_SPLIT = 0.2
+TEST_SPLIT = 0.1
 RANDOM_SEED = 42
 
+# Streaming input pipeline
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp')
+AUTOTUNE = None if IN_DECODE_WORKER else tf.data.AUTOTUNE
+
+# Compiler and precision options (--jit-compile, --mixed-precision)
+JIT_COMPILE = False  # XLA-compile the training step and serving function
+MIXED_PRECISION = False  # bfloat16 compute with float32 weights, where the CPU supports it
+
+# Fast head training on cached backbone features (--cached-features)
+FEATURE_CACHE_DIR = './feature_cache/'
+FEATURE_VIEWS = 5  # augmented views per training image
+
+# Compiled dataset cache: resized uint8 images in memory-mapped .npy shards
+DATASET_CACHE_DIR = './dataset_cache/'
+SHARD_SIZE = 1024  # images per shard (~150 MB at 224x224)
+DATASET_CACHE_VERSION = 1
+
+# Parallel decoding for --compile-dataset
+DECODE_WORKERS = os.cpu_count() or 1
+DECODE_CHUNK_SIZE = 64  # images per task sent to a worker
+
 # Path to dataset
 DATASET_PATH = './dataset/'
 MODEL_SAVE_PATH = './crop_model.h5'
 
-# Disease classes (example - adjust based on your dataset)
-DISEASE_CLASSES = [
-    'Apple___Apple_scab',
-    'Apple___Black_rot',
-    'Apple___Cedar_apple_rust',
-    'Apple___healthy',
-    'Blueberry___healthy',
-    'Cherry___Powdery_mildew',
-    'Cherry___healthy',
-    'Corn___Cercospora_leaf_spot',
-    'Corn___Common_rust',
-    'Corn___Northern_Leaf_Blight',
-    'Corn___healthy',
-    'Grape___Black_rot',
-    'Grape___Esca',
-    'Grape___Leaf_blight',
-    'Grape___healthy',
-    'Orange___Haunglongbing',
-    'Peach___Bacterial_spot',
-    'Peach___healthy',
-    'Pepper___Bacterial_spot',
-    'Pepper___healthy',
-    'Potato___Early_blight',
-    'Potato___Late_blight',
-    'Potato___healthy',
-    'Raspberry___healthy',
-    'Soybean___healthy',
-    'Squash___Powdery_mildew',
-    'Strawberry___Leaf_scorch',
-    'Strawberry___healthy',
-    'Tomato___Bacterial_spot',
-    'Tomato___Early_blight',
-    'Tomato___Late_blight',
-    'Tomato___Leaf_Mold',
-    'Tomato___Septoria_leaf_spot',
-    'Tomato___Spider_mites',
-    'Tomato___Target_Spot',
-    'Tomato___Tomato_Yellow_Leaf_Curl_Virus',
-    'Tomato___Tomato_mosaic_virus',
-    'Tomato___healthy'
-]
-
-def load_and_preprocess_data(dataset_path):
-    """
-    Load images from dataset directory and preprocess them.
+# Quantized TensorFlow Lite artifacts (see backend/inference_backends.py)
+TFLITE_FP16_PATH = './crop_model_fp16.tflite'
+TFLITE_INT8_PATH = './crop_model_int8.tflite'
+CALIBRATION_SAMPLES = 200
+
+# ONNX artifact for ONNX Runtime serving
+ONNX_SAVE_PATH = './crop_model.onnx'
+ONNX_OPSET = 17
+
+# Cascade first stage: a small low-resolution model that answers confident
+# images before the full model (see CascadeBackend in backend/inference_backends.py)
+CASCADE_IMG_SIZE = 96
+CASCADE_ALPHA = 0.35
+CASCADE_MODEL_SAVE_PATH = './crop_model_small.h5'
+CASCADE_ONNX_SAVE_PATH = './crop_model_small.onnx'
+
+def list_dataset_files(dataset_path):
+    """
+    Index image files by class without loading them.
     
     Expected directory structure:
     dataset/
@@ -89,21 +104,11 @@ def load_and_preprocess_data(dataset_path):
         ├── class2/
         │   ├── image1.jpg
         │   ├── image2.jpg
-    """
-    print("Loading and preprocessing data...")
     
-    images = []
+    Returns (paths, labels) arrays; only file names are held in memory.
+    """
+    paths = []
     labels = []
-    
-    # Check if dataset directory exists
-    if not os.path.exists(dataset_path):
-        print(f"⚠️  Dataset directory '{dataset_path}' not found!")
-        print("Please download PlantVillage dataset and place in ./dataset/")
-        print("Dataset URL: https://www.kaggle.com/emmarex/plantvillage-dataset")
-        print("\nCreating dummy data for testing...")
-        return create_dummy_data()
-    
-    # Load images from subdirectories
     for class_index, disease_class in enumerate(DISEASE_CLASSES):
         class_path = os.path.join(dataset_path, disease_class)
         
@@ -111,28 +116,239 @@ def load_and_preprocess_data(dataset_path):
             print(f"⚠️  Class directory '{disease_class}' not found. Skipping...")
             continue
         
-        for img_name in os.listdir(class_path):
-            img_path = os.path.join(class_path, img_name)
-            
-            try:
-                # Load and preprocess image
-                img = keras.preprocessing.image.load_img(
-                    img_path, target_size=(IMG_SIZE, IMG_SIZE)
-                )
-                img_array = keras.preprocessing.image.img_to_array(img)
-                img_array = img_array / 255.0  # Normalize
-                
-                images.append(img_array)
+        for img_name in sorted(os.listdir(class_path)):
+            if img_name.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(class_path, img_name))
                 labels.append(class_index)
-            except Exception as e:
-                print(f"Error loading {img_path}: {str(e)}")
-                continue
     
-    if len(images) == 0:
-        print("⚠️  No images loaded. Creating dummy data for testing...")
-        return create_dummy_data()
+    return np.array(paths), np.array(labels, dtype=np.int32)
+
+def decode_image(path):
+    """
+    Read, decode and resize one image file inside the tf.data graph.
+    
+    Runs decode.read_image (PIL draft-mode decode, then a PIL resize), the
+    code behind the compiled shards and the serving preprocessing, so
+    training inputs are the same with or without --compile-dataset and
+    match what the model sees in production. Pixels stay in [0, 255]; the
+    model's Rescaling layer normalizes.
+    """
+    image = tf.numpy_function(lambda path: read_image(path.decode(), IMG_SIZE), [path], tf.uint8, stateful=False)
+    image.set_shape((IMG_SIZE, IMG_SIZE, 3))
+    return tf.cast(image, tf.float32)
+
+class ImageSource:
+    """
+    Training images addressed by integer index.
+    
+    Images are decoded lazily from `paths`, or gathered from an in-memory
+    `images` array (dummy data), so splits are index arrays and no image
+    data is copied. `signature` identifies the source images (see
+    dataset_signature); None for dummy data.
+    """
+    
+    def __init__(self, labels, paths=None, images=None, signature=None):
+        self.labels = np.asarray(labels, dtype=np.int32)
+        self.signature = signature
+        self._labels = tf.constant(self.labels)
+        self._paths = tf.constant(paths) if paths is not None else None
+        self._images = tf.constant(images) if images is not None else None
+    
+    def __len__(self):
+        return len(self.labels)
+    
+    def load(self, index):
+        """Graph function: index -> (float32 image in [0, 255], label)."""
+        if self._paths is not None:
+            image = decode_image(tf.gather(self._paths, index))
+        else:
+            image = tf.gather(self._images, index)
+        return image, tf.gather(self._labels, index)
+
+def dataset_signature(dataset_path, paths, labels):
+    """
+    Fingerprint the source images for cache invalidation.
+    
+    Covers every file's relative path, size, mtime and label, plus
+    IMG_SIZE, so adding, editing or relabelling an image, or changing the
+    input size, invalidates the compiled dataset.
+    """
+    digest = hashlib.sha256(f'v{DATASET_CACHE_VERSION}:{IMG_SIZE}'.encode())
+    for path, label in zip(paths, labels):
+        stat = os.stat(path)
+        digest.update(f'\n{os.path.relpath(path, dataset_path)}:{stat.st_size}:{stat.st_mtime_ns}:{label}'.encode())
+    return digest.hexdigest()
+
+def decode_images(paths, workers=DECODE_WORKERS, chunk_size=DECODE_CHUNK_SIZE):
+    """
+    Decode images across a process pool, yielding (image, error) in input order.
+    
+    Paths are handed out in chunks of `chunk_size`; at most two chunks per
+    worker are in flight, so decoded images never pile up in memory. Prints
+    progress with throughput in images per second.
+    """
+    chunks = (paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size))
+    start = last_report = time.perf_counter()
+    done = 0
+    
+    def report(final=False):
+        elapsed = time.perf_counter() - start
+        end = '\n' if final else ''
+        print(f"\r  Decoded {done}/{len(paths)} images ({done / max(elapsed, 1e-9):.0f} img/s)", end=end, flush=True)
+    
+    if workers <= 1:
+        results = (decode_chunk(chunk, IMG_SIZE) for chunk in chunks)
+        pool = None
+    else:
+        # forkserver avoids forking a process that imported TensorFlow; the
+        # workers re-import this script without it (see IN_DECODE_WORKER)
+        methods = mp.get_all_start_methods()
+        context = mp.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        pending = deque(pool.submit(decode_chunk, chunk, IMG_SIZE) for _, chunk in zip(range(2 * workers), chunks))
+        
+        def ordered_results():
+            while pending:
+                future = pending.popleft()
+                next_chunk = next(chunks, None)
+                if next_chunk is not None:
+                    pending.append(pool.submit(decode_chunk, next_chunk, IMG_SIZE))
+                yield future.result()
+        
+        results = ordered_results()
+    
+    try:
+        for chunk_results in results:
+            yield from chunk_results
+            done += len(chunk_results)
+            if time.perf_counter() - last_report >= 1.0:
+                report()
+                last_report = time.perf_counter()
+        report(final=True)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+def summarize_errors(errors, examples=3):
+    """Print unreadable images grouped by error type."""
+    by_type = {}
+    for path, error in errors:
+        by_type.setdefault(error.split(':', 1)[0], []).append(path)
+    for error_type, paths in sorted(by_type.items(), key=lambda item: -len(item[1])):
+        shown = ', '.join(os.path.basename(path) for path in paths[:examples])
+        more = f' and {len(paths) - examples} more' if len(paths) > examples else ''
+        print(f"  ⚠️  {error_type}: {len(paths)} images ({shown}{more})")
+
+class ShardSource:
+    """
+    Compiled dataset read from memory-mapped .npy shards.
+    
+    Same interface as ImageSource. Shards are mapped read-only, so images
+    are paged in from the OS page cache on demand instead of decoded.
+    """
     
-    return np.array(images), np.array(labels)
+    def __init__(self, cache_dir, manifest):
+        self.img_size = manifest['img_size']
+        self.shard_size = manifest['shard_size']
+        self.signature = manifest['signature']
+        self.labels = np.load(os.path.join(cache_dir, 'labels.npy'))
+        self._labels = tf.constant(self.labels)
+        self._shards = [
+            np.load(os.path.join(cache_dir, name), mmap_mode='r') for name in manifest['shards']
+        ]
+    
+    def __len__(self):
+        return len(self.labels)
+    
+    def _read(self, index):
+        shard, offset = divmod(int(index), self.shard_size)
+        return np.asarray(self._shards[shard][offset])
+    
+    def load(self, index):
+        """Graph function: index -> (float32 image in [0, 255], label)."""
+        image = tf.numpy_function(self._read, [index], tf.uint8)
+        image.set_shape((self.img_size, self.img_size, 3))
+        return tf.cast(image, tf.float32), tf.gather(self._labels, index)
+
+def open_dataset_cache(cache_dir, signature):
+    """Return a ShardSource if a compiled dataset matches `signature`, else None."""
+    manifest_path = os.path.join(cache_dir, 'manifest.json')
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get('signature') != signature:
+        print("⚠️  Compiled dataset is out of date (source images or IMG_SIZE changed). Ignoring it.")
+        print("Run with --compile-dataset to rebuild it.")
+        return None
+    return ShardSource(cache_dir, manifest)
+
+def compile_dataset(paths, labels, cache_dir, signature, workers=DECODE_WORKERS):
+    """
+    Decode and resize every image once into memory-mapped uint8 shards.
+    
+    Decoding is spread over `workers` processes (see decode_images).
+    Writes shard-NNNNN.npy files, labels.npy and a manifest.json index;
+    the manifest is written last, so an interrupted run leaves no valid
+    cache behind. Unreadable images are left out and reported.
+    """
+    print(f"Compiling {len(paths)} images into {cache_dir} with {workers} workers...")
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest_path = os.path.join(cache_dir, 'manifest.json')
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    for name in os.listdir(cache_dir):
+        if name.startswith('shard-') and name.endswith('.npy'):
+            os.remove(os.path.join(cache_dir, name))
+    
+    start = time.perf_counter()
+    shards = []
+    kept_labels = []
+    errors = []
+    
+    def write_shard(images):
+        name = f'shard-{len(shards):05d}.npy'
+        shard = np.lib.format.open_memmap(os.path.join(cache_dir, name), mode='w+', dtype=np.uint8, shape=images.shape)
+        shard[:] = images
+        shard.flush()
+        shards.append(name)
+    
+    # Every shard but the last holds exactly SHARD_SIZE images, so an index
+    # maps to (index // SHARD_SIZE, index % SHARD_SIZE)
+    buffer = np.empty((SHARD_SIZE, IMG_SIZE, IMG_SIZE, 3), dtype=np.uint8)
+    count = 0
+    for (image, error), path, label in zip(decode_images(paths, workers), paths, labels):
+        if error is not None:
+            errors.append((path, error))
+            continue
+        buffer[count] = image
+        kept_labels.append(label)
+        count += 1
+        if count == SHARD_SIZE:
+            write_shard(buffer)
+            count = 0
+    if count:
+        write_shard(buffer[:count])
+    np.save(os.path.join(cache_dir, 'labels.npy'), np.array(kept_labels, dtype=np.int32))
+    
+    manifest = {
+        'version': DATASET_CACHE_VERSION,
+        'signature': signature,
+        'img_size': IMG_SIZE,
+        'shard_size': SHARD_SIZE,
+        'num_images': len(kept_labels),
+        'shards': shards,
+        'skipped': [path for path, _ in errors]
+    }
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    
+    elapsed = time.perf_counter() - start
+    print(f"✓ Compiled {len(kept_labels)} images into {len(shards)} shards "
+          f"in {elapsed:.1f}s ({len(paths) / elapsed:.0f} img/s, {len(errors)} skipped)")
+    summarize_errors(errors)
+    return ShardSource(cache_dir, manifest)
 
 def create_dummy_data():
     """
@@ -141,13 +357,124 @@ def create_dummy_data():
     """
     print("Creating dummy training data for testing...")
     
-    # Create random dummy images
-    x_train = np.random.rand(100, IMG_SIZE, IMG_SIZE, 3)
+    # Create random dummy images (pixel range [0, 255], like real data)
+    x_train = (np.random.rand(100, IMG_SIZE, IMG_SIZE, 3) * 255).astype(np.float32)
     y_train = np.random.randint(0, len(DISEASE_CLASSES), 100)
     
     return x_train, y_train
 
-def create_model(num_classes):
+def load_data(dataset_path, cache_dir=DATASET_CACHE_DIR, compile_cache=False, decode_workers=DECODE_WORKERS):
+    """
+    Index the dataset for streaming; falls back to dummy data.
+    
+    Replaces loading every image into memory: peak memory no longer grows
+    with the size of the dataset. A compiled dataset in `cache_dir` that
+    matches the source images is used instead of decoding them; with
+    `compile_cache` it is (re)built first.
+    """
+    print("Indexing dataset...")
+    
+    # Check if dataset directory exists
+    if not os.path.exists(dataset_path):
+        print(f"⚠️  Dataset directory '{dataset_path}' not found!")
+        print("Please download PlantVillage dataset and place in ./dataset/")
+        print("Dataset URL: https://www.kaggle.com/emmarex/plantvillage-dataset")
+        print("\nCreating dummy data for testing...")
+        x_dummy, y_dummy = create_dummy_data()
+        return ImageSource(y_dummy, images=x_dummy)
+    
+    paths, labels = list_dataset_files(dataset_path)
+    
+    if len(paths) == 0:
+        print("⚠️  No images found. Creating dummy data for testing...")
+        x_dummy, y_dummy = create_dummy_data()
+        return ImageSource(y_dummy, images=x_dummy)
+    
+    signature = dataset_signature(dataset_path, paths, labels)
+    if compile_cache:
+        return compile_dataset(paths, labels, cache_dir, signature, workers=decode_workers)
+    
+    cached = open_dataset_cache(cache_dir, signature)
+    if cached is not None:
+        print(f"✓ Using compiled dataset from {cache_dir}")
+        return cached
+    
+    return ImageSource(labels, paths=paths, signature=signature)
+
+def split_indices(num_samples, test_fraction, seed=RANDOM_SEED):
+    """Shuffle sample indices and split off `test_fraction` (no data is copied)."""
+    indices = np.random.default_rng(seed).permutation(num_samples)
+    num_test = int(round(num_samples * test_fraction))
+    return indices[num_test:], indices[:num_test]
+
+def make_augmentation(rotation_range=20, zoom_range=0.2, shift_range=0.2, shear_range=0.2, horizontal_flip=True):
+    """
+    Random rotation, flip, zoom, shift and shear for a whole batch at once.
+    
+    Ranges follow the former ImageDataGenerator settings (rotation and
+    shear in degrees, shift as a fraction of the image size). All transforms
+    are composed into one affine matrix per image and applied to the batch
+    in a single vectorized warp with nearest-edge fill. Randomness is
+    stateless: the same `seed` tensor gives the same augmentation.
+    """
+    def augment(images, labels, seed):
+        batch_size = tf.shape(images)[0]
+        height, width = tf.cast(tf.shape(images)[1], tf.float32), tf.cast(tf.shape(images)[2], tf.float32)
+        params = tf.random.stateless_uniform([batch_size, 7], seed=seed, minval=-1.0, maxval=1.0)
+        
+        theta = params[:, 0] * np.deg2rad(rotation_range)
+        shear = params[:, 1] * np.deg2rad(shear_range)
+        zoom_x = 1.0 + params[:, 2] * zoom_range
+        zoom_y = 1.0 + params[:, 3] * zoom_range
+        shift_x = params[:, 4] * shift_range * width
+        shift_y = params[:, 5] * shift_range * height
+        flip = tf.where(params[:, 6] < 0, -1.0, 1.0) if horizontal_flip else tf.ones_like(theta)
+        
+        # Output -> input mapping: rotate @ shear @ zoom @ flip about the centre, then shift
+        a0 = tf.cos(theta) * zoom_x * flip
+        a1 = -tf.sin(theta + shear) * zoom_y
+        b0 = tf.sin(theta) * zoom_x * flip
+        b1 = tf.cos(theta + shear) * zoom_y
+        center_x, center_y = (width - 1) / 2, (height - 1) / 2
+        a2 = center_x - a0 * center_x - a1 * center_y + shift_x
+        b2 = center_y - b0 * center_x - b1 * center_y + shift_y
+        zeros = tf.zeros_like(a0)
+        transforms = tf.stack([a0, a1, a2, b0, b1, b2, zeros, zeros], axis=1)
+        
+        images = tf.raw_ops.ImageProjectiveTransformV3(
+            images=images, transforms=transforms, output_shape=tf.shape(images)[1:3],
+            fill_value=0.0, interpolation='BILINEAR', fill_mode='NEAREST'
+        )
+        return images, labels
+    
+    return augment
+
+def make_dataset(source, indices, batch_size=BATCH_SIZE, training=False, augment=None, seed=RANDOM_SEED):
+    """
+    Build a streaming tf.data pipeline over `indices` of `source`.
+    
+    Images are decoded in parallel, batched, augmented batch-wise and
+    prefetched while the model trains on the previous batch. Only index
+    arrays are shuffled, so memory stays flat regardless of dataset size.
+    Augmentation is seeded from `seed` and differs in every epoch.
+    Unreadable images are skipped with a warning.
+    """
+    dataset = tf.data.Dataset.from_tensor_slices(np.asarray(indices, dtype=np.int32))
+    if training:
+        dataset = dataset.shuffle(len(indices), seed=seed, reshuffle_each_iteration=True)
+    
+    dataset = dataset.map(source.load, num_parallel_calls=AUTOTUNE, deterministic=not training)
+    dataset = dataset.ignore_errors(log_warning=True)
+    dataset = dataset.batch(batch_size)
+    if augment is not None:
+        seeds = tf.data.Dataset.random(seed=seed, rerandomize_each_iteration=True).batch(2)
+        dataset = tf.data.Dataset.zip((dataset, seeds)).map(
+            lambda batch, batch_seed: augment(*batch, batch_seed), num_parallel_calls=AUTOTUNE
+        )
+    
+    return dataset.prefetch(AUTOTUNE)
+
+def create_model(num_classes, weights='imagenet', alpha=1.0, resolution=IMG_SIZE):
     """
     Create transfer learning model using MobileNetV2.
     
@@ -157,22 +484,34 @@ def create_model(num_classes):
     - Dense(256) + Dropout(0.5)
     - Dense(128) + Dropout(0.3)
     - Dense(num_classes) + Softmax - Classification
+    
+    The input is always IMG_SIZE x IMG_SIZE. With a lower `resolution` (and
+    usually a narrower `alpha`) the model resizes its input in-graph, so
+    the cascade first stage uses the same data pipeline and preprocessing.
+    
+    Layers compute in the global Keras precision policy (see
+    set_precision_policy); the output layer always stays float32.
     """
-    print("Creating transfer learning model...")
+    print(f"Creating transfer learning model (MobileNetV2 alpha {alpha}, {resolution}x{resolution})...")
     
     # Load pretrained MobileNetV2
     base_model = MobileNetV2(
-        input_shape=(IMG_SIZE, IMG_SIZE, 3),
+        input_shape=(resolution, resolution, 3),
+        alpha=alpha,
         include_top=False,
-        weights='imagenet'
+        weights=weights
     )
     
     # Freeze base model weights
     base_model.trainable = False
     
+    # Downscale in-graph for low-resolution models
+    resize = [layers.Resizing(resolution, resolution)] if resolution != IMG_SIZE else []
+    
     # Create new model
     model = models.Sequential([
         layers.Input(shape=(IMG_SIZE, IMG_SIZE, 3)),
+        *resize,
         
         # Preprocessing: normalize to [-1, 1]
         layers.Rescaling(1./127.5, offset=-1),
@@ -186,21 +525,78 @@ def create_model(num_classes):
         layers.Dropout(0.5),
         layers.Dense(128, activation='relu'),
         layers.Dropout(0.3),
-        layers.Dense(num_classes, activation='softmax')
+        layers.Dense(num_classes, activation='softmax', dtype='float32')
     ])
     
     return model
 
-def compile_model(model):
-    """Compile the model with appropriate optimizer and loss."""
+def compile_model(model, jit_compile=JIT_COMPILE):
+    """Compile the model with appropriate optimizer and loss; optionally XLA-compile the train step."""
     model.compile(
         optimizer=Adam(learning_rate=LEARNING_RATE),
         loss='sparse_categorical_crossentropy',
-        metrics=['accuracy']
+        metrics=['accuracy'],
+        jit_compile=jit_compile
     )
     return model
 
-def train_model(model, x_train, y_train):
+def cpu_supports_bfloat16():
+    """True if the CPU has native bfloat16 instructions (AVX512-BF16 or AMX-BF16)."""
+    try:
+        with open('/proc/cpuinfo') as f:
+            flags = set(f.read().split())
+    except OSError:
+        return False
+    return bool(flags & {'avx512_bf16', 'amx_bf16'})
+
+def set_precision_policy(mixed_precision=MIXED_PRECISION):
+    """
+    Set the global Keras precision policy for models created afterwards.
+    
+    Mixed precision computes in bfloat16 and keeps float32 weights. Without
+    native CPU support bfloat16 is emulated and slower than float32, so the
+    request falls back to float32 with a warning. Returns the policy name.
+    """
+    policy = 'float32'
+    if mixed_precision:
+        if cpu_supports_bfloat16():
+            policy = 'mixed_bfloat16'
+        else:
+            print("⚠️  CPU has no native bfloat16 support; training in float32")
+    keras.mixed_precision.set_global_policy(policy)
+    return policy
+
+def to_float32_model(model, alpha=1.0, resolution=IMG_SIZE):
+    """
+    Rebuild a mixed-precision model in float32 with the same weights.
+    
+    Saved and exported artifacts (h5, ONNX, TFLite) are always float32, so
+    the serving backends behave the same whichever policy trained them.
+    `alpha` and `resolution` must match the ones the model was created with.
+    """
+    if model.dtype_policy.name == 'float32':
+        return model
+    keras.mixed_precision.set_global_policy('float32')
+    float_model = create_model(model.output_shape[-1], weights=None, alpha=alpha, resolution=resolution)
+    float_model.set_weights(model.get_weights())
+    return compile_model(float_model, jit_compile=False)
+
+def make_serving_function(model, jit_compile=JIT_COMPILE):
+    """
+    Inference function with a fixed (None, IMG_SIZE, IMG_SIZE, 3) float32
+    signature, traced once instead of per call like `model.predict`.
+    With `jit_compile` the forward pass is compiled by XLA.
+    """
+    @tf.function(
+        input_signature=[tf.TensorSpec([None, IMG_SIZE, IMG_SIZE, 3], tf.float32, name='images')],
+        jit_compile=jit_compile
+    )
+    def serve(images):
+        return tf.cast(model(images, training=False), tf.float32)
+    
+    return serve
+
+def train_model(model, source, train_indices):
     """
     Train the model with data augmentation.
     
@@ -210,26 +606,17 @@ def train_model(model, x_train, y_train):
     - Random zoom
     - Random shifts
     """
-    print("Setting up data augmentation...")
-    
-    # Data augmentation for training
-    train_augmentation = ImageDataGenerator(
-        rotation_range=20,
-        horizontal_flip=True,
-        zoom_range=0.2,
-        width_shift_range=0.2,
-        height_shift_range=0.2,
-        shear_range=0.2,
-        fill_mode='nearest'
-    )
+    print("Setting up streaming input pipeline with data augmentation...")
     
-    # Split data into training and validation
-    x_train_split, x_val, y_train_split, y_val = train_test_split(
-        x_train, y_train, test_size=VALIDATION_SPLIT, random_state=RANDOM_SEED
-    )
+    # Split data into training and validation by index
+    train_split, val_split = split_indices(len(train_indices), VALIDATION_SPLIT)
+    train_split, val_split = train_indices[train_split], train_indices[val_split]
+    
+    print(f"Training set size: {len(train_split)}")
+    print(f"Validation set size: {len(val_split)}")
     
-    print(f"Training set size: {len(x_train_split)}")
-    print(f"Validation set size: {len(x_val)}")
+    train_dataset = make_dataset(source, train_split, training=True, augment=make_augmentation())
+    val_dataset = make_dataset(source, val_split)
     
     print("\nStarting model training...")
     
@@ -249,7 +636,115 @@ def train_model(model, x_train, y_train):
     
     # Train the model
     history = model.fit(
-        train_augmentation.flow(x_train_split, y_train_split, batch_size=BATCH_SIZE),
+        train_dataset,
+        validation_data=val_dataset,
+        epochs=EPOCHS,
+        callbacks=[early_stopping, reduce_lr],
+        verbose=1
+    )
+    
+    return model, history
+
+def split_backbone_and_head(model):
+    """
+    Split the model at the pooling layer into feature extractor and head.
+    
+    Both share the full model's layers, so training the head updates the
+    end-to-end model in place.
+    """
+    pool_index = next(i for i, layer in enumerate(model.layers) if isinstance(layer, layers.GlobalAveragePooling2D))
+    pooling = model.layers[pool_index]
+    extractor = keras.Model(model.inputs, pooling.output)
+    head = models.Sequential([layers.Input(shape=pooling.output.shape[1:]), *model.layers[pool_index + 1:]])
+    return extractor, head
+
+def extract_features(extractor, source, indices, views=1, augment=None, cache_key=None):
+    """
+    Run the frozen backbone once per view and return (features, labels).
+    
+    Features are stored as float16 in FEATURE_CACHE_DIR under `cache_key`
+    and reused by later runs; without a key nothing is written.
+    """
+    cache_path = os.path.join(FEATURE_CACHE_DIR, f'features-{cache_key}.npz') if cache_key else None
+    if cache_path and os.path.exists(cache_path):
+        with np.load(cache_path) as cached:
+            print(f"✓ Loaded cached features from {cache_path}")
+            return cached['features'].astype(np.float32), cached['labels']
+    
+    features, labels = [], []
+    for view in range(views):
+        print(f"Extracting backbone features: view {view + 1}/{views} of {len(indices)} images...")
+        dataset = make_dataset(source, indices, augment=augment, seed=RANDOM_SEED + view)
+        for images, batch_labels in dataset.as_numpy_iterator():
+            features.append(extractor.predict_on_batch(images).astype(np.float16))
+            labels.append(batch_labels)
+    features, labels = np.concatenate(features), np.concatenate(labels)
+    
+    if cache_path:
+        os.makedirs(FEATURE_CACHE_DIR, exist_ok=True)
+        np.savez(cache_path, features=features, labels=labels)
+    return features.astype(np.float32), labels
+
+def feature_cache_key(extractor, source, indices, views, split):
+    """Identify cached features by backbone, precision, source images, split, view count and input size."""
+    if source.signature is None:
+        return None
+    backbone = f'{[layer.name for layer in extractor.layers]}:{extractor.count_params()}'
+    digest = hashlib.sha256(
+        f'{backbone}:{extractor.dtype_policy.name}:{source.signature}:{type(source).__name__}:{IMG_SIZE}:'
+        f'{split}:{views}:{RANDOM_SEED}'.encode()
+    )
+    digest.update(np.asarray(indices, dtype=np.int64).tobytes())
+    return digest.hexdigest()[:16]
+
+def train_head_on_cached_features(model, source, train_indices, views=FEATURE_VIEWS, jit_compile=JIT_COMPILE):
+    """
+    Fast training mode for the frozen-backbone model.
+    
+    The MobileNetV2 backbone runs once per image and view instead of once
+    per image and epoch: embeddings of `views` augmented copies of each
+    training image (one plain copy for validation) are cached on disk and
+    only the Dense head is trained on them. The head's layers belong to
+    `model`, which is returned as a complete end-to-end model.
+    """
+    print("Setting up cached-feature head training...")
+    
+    # Split data into training and validation by index
+    train_split, val_split = split_indices(len(train_indices), VALIDATION_SPLIT)
+    train_split, val_split = train_indices[train_split], train_indices[val_split]
+    
+    print(f"Training set size: {len(train_split)} x {views} views")
+    print(f"Validation set size: {len(val_split)}")
+    
+    extractor, head = split_backbone_and_head(model)
+    x_train, y_train = extract_features(
+        extractor, source, train_split, views=views, augment=make_augmentation(),
+        cache_key=feature_cache_key(extractor, source, train_split, views, 'train')
+    )
+    x_val, y_val = extract_features(
+        extractor, source, val_split, cache_key=feature_cache_key(extractor, source, val_split, 1, 'val')
+    )
+    
+    print("\nStarting head training on cached features...")
+    head = compile_model(head, jit_compile=jit_compile)
+    
+    # Callbacks
+    early_stopping = keras.callbacks.EarlyStopping(
+        monitor='val_loss',
+        patience=3,
+        restore_best_weights=True
+    )
+    
+    reduce_lr = keras.callbacks.ReduceLROnPlateau(
+        monitor='val_loss',
+        factor=0.5,
+        patience=2,
+        min_lr=1e-7
+    )
+    
+    history = head.fit(
+        x_train, y_train,
+        batch_size=BATCH_SIZE,
         validation_data=(x_val, y_val),
         epochs=EPOCHS,
         callbacks=[early_stopping, reduce_lr],
@@ -258,10 +753,10 @@ def train_model(model, x_train, y_train):
     
     return model, history
 
-def evaluate_model(model, x_test, y_test):
+def evaluate_model(model, test_dataset):
     """Evaluate model on test dataset."""
     print("\nEvaluating model on test set...")
-    loss, accuracy = model.evaluate(x_test, y_test, verbose=0)
+    loss, accuracy = model.evaluate(test_dataset, verbose=0)
     print(f"Test Loss: {loss:.4f}")
     print(f"Test Accuracy: {accuracy:.4f} ({accuracy*100:.2f}%)")
     return loss, accuracy
@@ -272,6 +767,154 @@ def save_model(model, save_path):
     model.save(save_path)
     print(f"✓ Model saved successfully!")
 
+def save_class_names(save_path):
+    """
+    Record the classes the model was trained on, next to the model.
+    
+    The model registry publishes this list with the artifacts, so servers
+    refuse a model trained on a different class set.
+    """
+    path = os.path.join(os.path.dirname(save_path), CLASS_NAMES_FILE)
+    with open(path, 'w') as f:
+        json.dump(DISEASE_CLASSES, f, indent=2)
+    print(f"✓ Class names saved to {path}")
+
+def export_onnx_model(model, save_path):
+    """
+    Convert the model to ONNX for ONNX Runtime serving.
+    
+    The model is traced with a dynamic batch dimension. Keras 3 models are
+    converted through a tf.function, as tf2onnx's from_keras does not
+    support them.
+    """
+    import tf2onnx
+    
+    print(f"\nConverting model to ONNX: {save_path}...")
+    input_signature = (tf.TensorSpec((None, IMG_SIZE, IMG_SIZE, 3), tf.float32, name='image'),)
+    
+    @tf.function(input_signature=input_signature)
+    def serve(image):
+        return model(image, training=False)
+    
+    tf2onnx.convert.from_function(serve, input_signature=input_signature, opset=ONNX_OPSET, output_path=save_path)
+    print(f"✓ ONNX model saved successfully!")
+
+def verify_onnx_model(model, onnx_path, test_dataset, atol=1e-4):
+    """
+    Check the ONNX model reproduces the Keras model on held-out data.
+    
+    Reports the largest probability difference, top-1 agreement and both
+    accuracies; returns True when all outputs match within `atol`.
+    """
+    import onnxruntime as ort
+    
+    print("\nVerifying ONNX model against Keras model...")
+    session = ort.InferenceSession(onnx_path, providers=['CPUExecutionProvider'])
+    input_name = session.get_inputs()[0].name
+    
+    keras_probs, onnx_probs, labels = [], [], []
+    for images, batch_labels in test_dataset.as_numpy_iterator():
+        keras_probs.append(model.predict_on_batch(images))
+        onnx_probs.append(session.run(None, {input_name: images})[0])
+        labels.append(batch_labels)
+    keras_probs = np.concatenate(keras_probs)
+    onnx_probs = np.concatenate(onnx_probs)
+    y_test = np.concatenate(labels)
+    
+    max_diff = float(np.max(np.abs(keras_probs - onnx_probs)))
+    agreement = np.mean(keras_probs.argmax(axis=1) == onnx_probs.argmax(axis=1))
+    print(f"Max probability difference: {max_diff:.2e}")
+    print(f"Top-1 agreement: {agreement*100:.2f}%")
+    print(f"Keras accuracy: {np.mean(keras_probs.argmax(axis=1) == y_test)*100:.2f}% | "
+          f"ONNX accuracy: {np.mean(onnx_probs.argmax(axis=1) == y_test)*100:.2f}%")
+    
+    if max_diff > atol:
+        print(f"⚠️  ONNX outputs differ from Keras by more than {atol}")
+        return False
+    print("✓ ONNX model matches Keras model")
+    return True
+
+def export_tflite_models(model, source, train_indices):
+    """
+    Export float16 and int8 post-training quantized TFLite models.
+    
+    The int8 model is calibrated on a random sample of training images and
+    takes raw uint8 pixels, matching the [0, 255] input the Keras model's
+    Rescaling layer expects. Conversion goes through a SavedModel export,
+    which Keras 3 models require.
+    """
+    print("\nExporting TensorFlow Lite models...")
+    
+    rng = np.random.default_rng(RANDOM_SEED)
+    sample = rng.choice(train_indices, min(CALIBRATION_SAMPLES, len(train_indices)), replace=False)
+    
+    def representative_dataset():
+        for images, _ in make_dataset(source, sample, batch_size=1).as_numpy_iterator():
+            yield [images]
+    
+    with tempfile.TemporaryDirectory() as saved_model_dir:
+        model.export(saved_model_dir)
+        
+        # Float16 weights, float32 compute
+        converter = tf.lite.TFLiteConverter.from_saved_model(saved_model_dir)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+        with open(TFLITE_FP16_PATH, 'wb') as f:
+            f.write(converter.convert())
+        print(f"✓ Float16 model saved to {TFLITE_FP16_PATH}")
+        
+        # Full-integer quantization with representative-dataset calibration
+        converter = tf.lite.TFLiteConverter.from_saved_model(saved_model_dir)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.uint8
+        with open(TFLITE_INT8_PATH, 'wb') as f:
+            f.write(converter.convert())
+        print(f"✓ Int8 model saved to {TFLITE_INT8_PATH} ({len(sample)} calibration images)")
+
+def run_export(name, export, retry=None):
+    """
+    Run one post-training export; a failure prints a warning instead of
+    ending the run, since the trained model is already saved.
+    
+    `retry` is the command that repeats the export from the saved model.
+    """
+    try:
+        export()
+        return True
+    except Exception as e:
+        print(f"\n⚠️  {name} failed ({type(e).__name__}: {e}); the trained model is kept")
+        if retry:
+            print(f"   Retry once the export dependencies are fixed: python train_model.py {retry}")
+        return False
+
+def parse_args():
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description='Train the crop disease model')
+    parser.add_argument('--export-tflite', action='store_true',
+                        help=f'Only export TFLite models from an existing {MODEL_SAVE_PATH}')
+    parser.add_argument('--export-onnx', action='store_true',
+                        help=f'Only convert an existing {MODEL_SAVE_PATH} to ONNX and verify it')
+    parser.add_argument('--compile-dataset', action='store_true',
+                        help=f'Decode the dataset once into memory-mapped shards in {DATASET_CACHE_DIR}; '
+                             'later runs read them instead of the images')
+    parser.add_argument('--decode-workers', type=int, default=DECODE_WORKERS,
+                        help='Processes used to decode images for --compile-dataset')
+    parser.add_argument('--cached-features', action='store_true',
+                        help='Train only the classification head on cached backbone features (fast)')
+    parser.add_argument('--feature-views', type=int, default=FEATURE_VIEWS,
+                        help='Augmented views per training image for --cached-features')
+    parser.add_argument('--jit-compile', action='store_true', default=JIT_COMPILE,
+                        help='XLA-compile the training step')
+    parser.add_argument('--mixed-precision', action='store_true', default=MIXED_PRECISION,
+                        help='Train with bfloat16 compute where the CPU supports it; '
+                             'saved models are float32')
+    parser.add_argument('--cascade-first-stage', action='store_true',
+                        help=f'Train the small {CASCADE_IMG_SIZE}x{CASCADE_IMG_SIZE} alpha {CASCADE_ALPHA} '
+                             f'first-stage model for cascade inference ({CASCADE_MODEL_SAVE_PATH})')
+    return parser.parse_args()
+
 def main():
     """Main training pipeline."""
     print("=" * 60)
@@ -282,34 +925,73 @@ def main():
     np.random.seed(RANDOM_SEED)
     tf.random.set_seed(RANDOM_SEED)
     
-    # Load and preprocess data
-    x_data, y_data = load_and_preprocess_data(DATASET_PATH)
-    print(f"Loaded {len(x_data)} images from {len(DISEASE_CLASSES)} classes")
+    args = parse_args()
     
-    # Split into train and test sets
-    x_train, x_test, y_train, y_test = train_test_split(
-        x_data, y_data, test_size=0.1, random_state=RANDOM_SEED
-    )
+    # Index the data; images are decoded on the fly while training
+    source = load_data(DATASET_PATH, compile_cache=args.compile_dataset, decode_workers=args.decode_workers)
+    print(f"Found {len(source)} images from {len(DISEASE_CLASSES)} classes")
+    
+    # Split into train and test sets by index
+    train_indices, test_indices = split_indices(len(source), TEST_SPLIT)
+    test_dataset = make_dataset(source, test_indices)
+    
+    if args.export_tflite or args.export_onnx:
+        model = keras.models.load_model(MODEL_SAVE_PATH)
+        if args.export_tflite:
+            export_tflite_models(model, source, train_indices)
+        if args.export_onnx:
+            export_onnx_model(model, ONNX_SAVE_PATH)
+            verify_onnx_model(model, ONNX_SAVE_PATH, test_dataset)
+        return
     
-    # Create model
+    # Create model (in bfloat16 compute if requested and supported)
+    policy = set_precision_policy(args.mixed_precision)
+    print(f"Precision policy: {policy}, XLA: {'on' if args.jit_compile else 'off'}")
     num_classes = len(DISEASE_CLASSES)
-    model = create_model(num_classes)
+    if args.cascade_first_stage:
+        architecture = {'alpha': CASCADE_ALPHA, 'resolution': CASCADE_IMG_SIZE}
+        save_path, onnx_path = CASCADE_MODEL_SAVE_PATH, CASCADE_ONNX_SAVE_PATH
+    else:
+        architecture = {}
+        save_path, onnx_path = MODEL_SAVE_PATH, ONNX_SAVE_PATH
+    model = create_model(num_classes, **architecture)
     
     # Compile model
-    model = compile_model(model)
+    model = compile_model(model, jit_compile=args.jit_compile)
     
     # Print model summary
     print("\nModel Architecture:")
     model.summary()
     
-    # Train model
-    model, history = train_model(model, x_train, y_train)
+    # Train model (only the head, on cached backbone features, if requested)
+    if args.cached_features:
+        model, history = train_head_on_cached_features(
+            model, source, train_indices, views=args.feature_views, jit_compile=args.jit_compile
+        )
+    else:
+        model, history = train_model(model, source, train_indices)
     
-    # Evaluate model
-    evaluate_model(model, x_test, y_test)
+    # Artifacts are float32 regardless of the training precision
+    model = to_float32_model(model, **architecture)
     
-    # Save model
-    save_model(model, MODEL_SAVE_PATH)
+    # Evaluate model
+    evaluate_model(model, test_dataset)
+    
+    # Save model and the class list it was trained on
+    save_model(model, save_path)
+    save_class_names(save_path)
+    
+    # Convert to ONNX and check it against the held-out set; optional
+    # dependencies (tf2onnx, onnxruntime) failing must not lose the model
+    def onnx_export():
+        export_onnx_model(model, onnx_path)
+        verify_onnx_model(model, onnx_path, test_dataset)
+    run_export('ONNX export', onnx_export, retry=None if args.cascade_first_stage else '--export-onnx')
+    
+    # Export quantized models for lightweight serving (full model only)
+    if not args.cascade_first_stage:
+        run_export('TFLite export', lambda: export_tflite_models(model, source, train_indices),
+                   retry='--export-tflite')
     
     print("\n" + "=" * 60)
     print("Training Complete!")